@@ -3,11 +3,12 @@
 Basic test for running RFdiffusion via Modal
 """
 
+import hashlib
+import json
 import os
 import sys
 import time
-import random
-import string
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
 from typing import List
@@ -16,6 +17,66 @@ import modal
 
 # Import from your Modal initialization file
 from initialize_modal import app, models_volume, outputs_volume, image
+from symmetry import detect_symmetry
+from input_store import put_pdb, resolve_pdb
+from results_sink import ResultsSink
+from design_checkpoint import SamplerCheckpointer
+from fast_start import attach_gpu, preload_inference, run_inference, set_executor, startup_timings
+from cpu_backend import (
+    CPU_CORES, CPU_MEMORY_MB, CPU_WORKERS, CPUInferencePool, configure_threads, threads_per_worker,
+)
+from warm_pool import (
+    DEFAULT_MIN_CONTAINERS, DEFAULT_SCALEDOWN_WINDOW, ContainerStats, WarmPoolScheduler, count_starts,
+)
+
+def detect_mode(contigs):
+    """Classify a list of contigs as "free", "fixed" or "partial" diffusion"""
+    is_fixed, is_free = False, False
+    fixed_chains = []
+    
+    for contig in contigs:
+        for x in contig.split("/"):
+            a = x.split("-")[0]
+            if a[0].isalpha():
+                is_fixed = True
+                if a[0] not in fixed_chains:
+                    fixed_chains.append(a[0])
+            if a.isnumeric():
+                is_free = True
+                
+    if len(contigs) == 0 or not is_free:
+        mode = "partial"
+    elif is_fixed:
+        mode = "fixed"
+    else:
+        mode = "free"
+    return mode, fixed_chains
+
+BACKBONE_ATOMS = ("N", "CA", "C")
+
+def read_backbone(pdb_path):
+    """(L, 3, 3) float32 N/CA/C coordinates of the first model of a PDB file"""
+    import numpy as np
+    
+    residues = {}
+    with open(pdb_path) as handle:
+        for line in handle:
+            if line.startswith("ENDMDL"):
+                break
+            if line.startswith("ATOM") and line[12:16].strip() in BACKBONE_ATOMS:
+                atoms = residues.setdefault((line[21], line[22:27]), {})
+                atoms.setdefault(line[12:16].strip(), (float(line[30:38]), float(line[38:46]), float(line[46:54])))
+    return np.array([[atoms[name] for name in BACKBONE_ATOMS] for atoms in residues.values()
+                     if len(atoms) == len(BACKBONE_ATOMS)], dtype=np.float32).reshape(-1, 3, 3)
+
+def design_input_hash(*inputs):
+    """Short content hash of a design's inputs, used to name its run folder"""
+    return hashlib.sha256(json.dumps(inputs, default=str).encode()).hexdigest()[:10]
+
+def design_input_key(inp):
+    """design_input_hash of a run_rfdiffusion_test input tuple, as computed by the worker"""
+    # Everything but batch_name and the execution-only options (memory_saving, ...)
+    return design_input_hash(inp[0], *inp[2:14])
 
 # This function runs locally to read the PDB file and pass its contents to Modal
 def run_rfdiffusion_with_local_pdb(
@@ -30,8 +91,47 @@ def run_rfdiffusion_with_local_pdb(
     chains=None,
     add_potential=True,
     num_designs=1,
+    fast_symmetry=False,
+    results_path=None,
+    warm_pool=0,
+    precision="fp32",
+    device="gpu",
+    memory_saving=False,
+    gpu=None,
+    return_backbone=False,
 ):
-    """Run RFdiffusion with a local PDB file"""
+    """Run RFdiffusion with a local PDB file
+    
+    With results_path, outputs are streamed to a ResultsSink keyed by the design
+    input hash instead of being collected in memory. Inputs already recorded
+    there with a successful result are skipped, failed ones are run again, and
+    the sink (iterable in input order) is returned in place of the results list.
+    
+    With warm_pool > 0, designs run on DesignWorker/MPNNWorker containers and
+    that many containers of each are kept warm while the batch runs.
+    
+    precision ("fp32", "bf16" or "fp16") selects the precision of the SE(3)
+    layers, see precision_policy.
+    
+    device="cpu" runs the designs on CPUDesignWorker containers, several at a
+    time per container (see cpu_backend); MPNN still runs on GPU. With
+    device="gpu", gpu (e.g. "T4") runs the designs on DesignWorker containers
+    with that GPU type instead of the default A100.
+    
+    memory_saving chunks the pair attention to fit the free VRAM and
+    checkpoints the model blocks, for very long contigs (see memory_policy).
+    
+    return_backbone adds the N/CA/C coordinates of each successful design to
+    its result, as a float32 (L, 3, 3) numpy array under "backbone", so they
+    can be used without fetching output_0.pdb from the outputs volume.
+    
+    Run folders are named by a hash of the design inputs and RFdiffusion runs
+    with inference.cautious=True, so rerunning the same inputs under an existing
+    batch_name reuses the designs already in that batch instead of generating
+    new ones. Use a new batch_name to get fresh designs.
+    """
+    if device not in ("gpu", "cpu"):
+        raise ValueError(f"device must be 'gpu' or 'cpu', got {device!r}")
     # Generate batch name if not provided
     if batch_name is None:
         batch_name = f"batch_{time.strftime('%Y%m%d_%H%M%S')}"
@@ -47,6 +147,13 @@ def run_rfdiffusion_with_local_pdb(
         with open(pdb_path, "r") as f:
             pdb_content = f.read()
     
+    # Resolve automatic symmetry here so no GPU job starts with the wrong setting
+    if symmetry == "auto" and pdb_content is not None:
+        try:
+            symmetry, order = detect_symmetry(pdb_content)
+        except ImportError:
+            print("numpy not available locally, leaving symmetry detection to the worker")
+    
     # Create inputs for parallel execution over contigs AND designs
     inputs = []
     print(f"Running {len(contigs_list)} contigs with {num_designs} designs each...")
@@ -65,18 +172,67 @@ def run_rfdiffusion_with_local_pdb(
                 add_potential,
                 1,
                 design_num,
+                fast_symmetry,
+                precision,
+                memory_saving,
+                return_backbone,
             ))
     
+    # Upload the PDB once; the dispatched inputs reference it instead of carrying
+    # the text. Input keys are still computed from the text, as the workers do.
+    pdb_ref = put_pdb(models_volume, pdb_content) if pdb_content is not None else None
+    
+    def with_pdb_ref(inps):
+        return [inp[:3] + (pdb_ref,) + inp[4:] for inp in inps]
+    
+    # Dispatch to the warm-poolable worker classes when a warm pool is requested
+    design_fn = run_rfdiffusion_test
+    scheduler = nullcontext()
+    if device == "cpu":
+        design_fn = CPUDesignWorker().run
+        if warm_pool:
+            scheduler = WarmPoolScheduler({CPUDesignWorker(): warm_pool, MPNNWorker(): warm_pool})
+    elif warm_pool or gpu is not None:
+        worker = DesignWorker() if gpu is None else DesignWorker.with_options(gpu=gpu)()
+        design_fn = worker.run
+        if warm_pool:
+            scheduler = WarmPoolScheduler({worker: warm_pool, MPNNWorker(): warm_pool})
+    
+    if results_path is not None:
+        # Stream outputs to disk as they complete; order is restored when iterating the sink
+        key_to_index = {design_input_key(inp): i for i, inp in enumerate(inputs)}
+        with ResultsSink(results_path) as sink, scheduler:
+            pending = [inp for inp in inputs
+                       if sink.get(design_input_key(inp), {}).get("result") != "success"]
+            print(f"Running {len(pending)} designs in parallel ({len(inputs) - len(pending)} already in {results_path})...")
+            outputs = design_fn.starmap(with_pdb_ref(pending), order_outputs=False)
+            sink.consume(outputs, key_to_index, key=lambda result: result["input_key"])
+        print(f"All runs completed in batch: {batch_name}")
+        print(f"Wrote {len(sink)} results to {results_path}")
+        if warm_pool:
+            report_container_starts(sink)
+        return batch_name, sink
+    
     # Run in parallel using starmap and collect all results
     print(f"Running {len(inputs)} total designs in parallel...")
-    results = list(run_rfdiffusion_test.starmap(inputs))
+    with scheduler:
+        results = list(design_fn.starmap(with_pdb_ref(inputs)))
     print(f"All runs completed in batch: {batch_name}")
     print(f"Generated {len(results)} output folders:")
     for result in results:
         print(f"  {result['folder_name']}")
         print(f"  MPNN args: {result['mpnn_args']}")
+    if warm_pool:
+        report_container_starts(results)
     return batch_name, results  # Return both batch name and results
 
+def report_container_starts(results):
+    """Print cold vs warm container starts of a batch run on the worker classes"""
+    design_cold, design_warm = count_starts(results)
+    mpnn_cold, mpnn_warm = count_starts(result.get("mpnn_result") for result in results)
+    print(f"Container starts - design: {design_cold} cold / {design_warm} warm, "
+          f"MPNN: {mpnn_cold} cold / {mpnn_warm} warm")
+
 @app.function(
     image=image,
     volumes={
@@ -85,6 +241,7 @@ def run_rfdiffusion_with_local_pdb(
     },
     gpu="A100",
     timeout=14400,
+    retries=2,
 )
 def run_rfdiffusion_test(
     name="test",
@@ -99,6 +256,11 @@ def run_rfdiffusion_test(
     add_potential=True,
     num_designs=1,
     design_num=0,
+    fast_symmetry=False,
+    precision="fp32",
+    memory_saving=False,
+    return_backbone=False,
+    use_warm_pool=False,
 ):
     """Run RFdiffusion with the specified parameters"""
     import os
@@ -106,15 +268,22 @@ def run_rfdiffusion_test(
     import time
     from pathlib import Path
     
+    # The client passes the PDB as a reference to its copy on the models volume
+    pdb_content = resolve_pdb(pdb_content, reload=models_volume.reload)
+    
     # Create batch directory
     batch_path = f"/data/outputs/{batch_name}"
     os.makedirs(batch_path, exist_ok=True)
     
-    # Generate unique folder name within batch
-    timestamp = time.strftime('%Y%m%d_%H%M%S')
-    run_id = ''.join(random.choices(string.ascii_lowercase + string.digits, k=5))
-    folder_name = f"{name}_contig{contigs.replace('/', '-')}_design{design_num}_{timestamp}_{run_id}"
+    # Folder name is derived from the inputs, so a retry of this input reuses
+    # (and resumes) the same run instead of leaving a partial one behind
+    input_hash = design_input_hash(name, contigs, pdb_content, iterations, symmetry, order, hotspot,
+                                   chains, add_potential, num_designs, design_num, fast_symmetry, precision)
+    folder_name = f"{name}_contig{contigs.replace('/', '-')}_design{design_num}_{input_hash}"
     run_path = f"{batch_path}/{folder_name}"
+    if os.path.exists(f"{run_path}/output_0.pdb"):
+        # inference.cautious skips designs whose output already exists
+        print(f"Reusing the existing design in {run_path}; use a new batch_name for a fresh one")
     
     # Create run directory and subdirectories
     os.makedirs(run_path, exist_ok=True)
@@ -144,7 +313,9 @@ def run_rfdiffusion_test(
     # Determine symmetry type
     if symmetry in ["auto", "cyclic", "dihedral"]:
         if symmetry == "auto":
-            print("Auto symmetry detection not supported in this test version")
+            symmetry, order = detect_symmetry(pdb_content) if pdb_content else ("none", 1)
+        if symmetry == "none":
+            symmetry = None
             sym, copies = None, 1
         else:
             sym, copies = {"cyclic":(f"c{order}", order),
@@ -153,27 +324,12 @@ def run_rfdiffusion_test(
         symmetry = None
         sym, copies = None, 1
     
+    # Identifies this input in unordered result streams (see ResultsSink)
+    input_key = input_hash
+    
     # Parse contigs - don't split on colons here
     contigs = contigs.replace(",", " ").split()
-    is_fixed, is_free = False, False
-    fixed_chains = []
-    
-    for contig in contigs:
-        for x in contig.split("/"):
-            a = x.split("-")[0]
-            if a[0].isalpha():
-                is_fixed = True
-                if a[0] not in fixed_chains:
-                    fixed_chains.append(a[0])
-            if a.isnumeric():
-                is_free = True
-                
-    if len(contigs) == 0 or not is_free:
-        mode = "partial"
-    elif is_fixed:
-        mode = "fixed"
-    else:
-        mode = "free"
+    mode, fixed_chains = detect_mode(contigs)
     
     # Process PDB if provided
     pdb_str = None
@@ -212,15 +368,29 @@ def run_rfdiffusion_test(
     # Setup symmetry
     if sym is not None:
         sym_opts = ["--config-name symmetry", f"inference.symmetry={sym}"]
+        if fast_symmetry:
+            # Run the network on the asymmetric unit and its neighbours only;
+            # the remaining copies are rebuilt from the C_n/D_n operators
+            sym_opts.append("inference.model_only_neighbors=True")
         if add_potential:
             sym_opts += ["'potentials.guiding_potentials=[\"type:olig_contacts,weight_intra:1,weight_inter:0.1\"]'",
-                       "potentials.olig_intra_all=True", "potentials.olig_inter_all=True",
+                       "potentials.olig_intra_all=True",
+                       # Inter-chain contacts only against the modelled neighbours in the fast path
+                       f"potentials.olig_inter_all={not fast_symmetry}",
                        "potentials.guide_scale=2", "potentials.guide_decay=quadratic"]
         opts = sym_opts + opts
+        # The contig always describes the full oligomer, even when only the
+        # asymmetric unit and its neighbours go through the network
         contigs = sum([contigs] * copies, [])
     
     opts.append(f"'contigmap.contigs=[{' '.join(contigs)}]'")
     opts += ["inference.dump_pdb=True", "inference.dump_pdb_path='/tmp'"]
+    if precision != "fp32":
+        # Handled by fast_start/precision_policy, not by RFdiffusion's config
+        opts.append(f"inference.precision={precision}")
+    if memory_saving:
+        # Handled by fast_start/memory_policy; same outputs, so not part of the input hash
+        opts += ["inference.chunk_size=auto", "inference.checkpoint_blocks=True"]
     
     print("Mode:", mode)
     print("Output:", run_path)
@@ -230,9 +400,16 @@ def run_rfdiffusion_test(
     cmd = f"cd /data/models && python RFdiffusion/run_inference.py {opts_str}"
     print(f"Running command: {cmd}")
     
-    # Execute the command
+    # Checkpoint the sampler so a preempted or timed-out attempt resumes mid-trajectory
+    checkpointer = SamplerCheckpointer(
+        local_path=f"/tmp/rfd_checkpoints/{folder_name}.pt",
+        volume_path=f"{run_path}/checkpoint.pt",
+        on_sync=outputs_volume.commit,
+    )
+    
+    # Execute the command (in-process on a preloaded DesignWorker)
     start_time = time.time()
-    result = os.system(cmd)
+    result = run_inference(opts_str, checkpointer)
     end_time = time.time()
     
     # Fix PDFs if necessary
@@ -250,6 +427,8 @@ def run_rfdiffusion_test(
     # After processing, ensure all files are synced and committed to the volume
     os.system("sync")
     outputs_volume.commit()
+    # Persist e3nn TorchScript modules compiled for the first time in this run
+    models_volume.commit()
     
     # After RFdiffusion completes successfully, run MPNN
     if result == 0:
@@ -267,7 +446,9 @@ def run_rfdiffusion_test(
         
         print("\nRunning MPNN on output structure...")
         print(f"Using PDB file: {mpnn_args['pdb']}")
-        mpnn_result = run_mpnn.remote(
+        # Stay on the warm MPNN pool when called from DesignWorker
+        mpnn_call = MPNNWorker().run.remote if use_warm_pool else run_mpnn.remote
+        mpnn_result = mpnn_call(
             mpnn_args=mpnn_args,
             initial_guess=False,
             use_multimer=False
@@ -282,8 +463,10 @@ def run_rfdiffusion_test(
             "runtime_seconds": end_time - start_time,
             "contigs": contigs,
             "copies": copies,
+            "input_key": input_key,
             "mpnn_args": mpnn_args,
-            "mpnn_result": mpnn_result
+            "mpnn_result": mpnn_result,
+            "backbone": read_backbone(mpnn_args["pdb"]) if return_backbone else None,
         }
     
     return {
@@ -295,6 +478,7 @@ def run_rfdiffusion_test(
         "runtime_seconds": end_time - start_time,
         "contigs": contigs,
         "copies": copies,
+        "input_key": input_key,
         "mpnn_args": None
     }
 
@@ -354,6 +538,113 @@ def run_mpnn(
         "runtime_seconds": end_time - start_time
     }
 
+@app.cls(
+    image=image,
+    volumes={
+        "/data/models": models_volume,
+        "/data/outputs": outputs_volume,
+    },
+    gpu="A100",
+    timeout=14400,
+    min_containers=DEFAULT_MIN_CONTAINERS,
+    scaledown_window=DEFAULT_SCALEDOWN_WINDOW,
+    enable_memory_snapshot=True,
+    retries=2,
+)
+class DesignWorker:
+    """run_rfdiffusion_test on a container pool that can be kept warm
+    
+    Imports and checkpoints are loaded before the memory snapshot is taken, so
+    restored containers only create a CUDA context before the first design.
+    """
+    
+    @modal.enter(snap=True)
+    def preload(self):
+        preload_inference()
+    
+    @modal.enter(snap=False)
+    def start(self):
+        attach_gpu()
+        self.stats = ContainerStats()
+    
+    @modal.method()
+    def run(self, *args, **kwargs):
+        container = self.stats.record_input()
+        result = run_rfdiffusion_test.local(*args, use_warm_pool=True, **kwargs)
+        container["startup"] = startup_timings()
+        result["container"] = container
+        return result
+
+@app.cls(
+    image=image,
+    volumes={
+        "/data/models": models_volume,
+        "/data/outputs": outputs_volume,
+    },
+    cpu=CPU_CORES,
+    memory=CPU_MEMORY_MB,
+    timeout=14400,
+    min_containers=DEFAULT_MIN_CONTAINERS,
+    scaledown_window=DEFAULT_SCALEDOWN_WINDOW,
+    allow_concurrent_inputs=CPU_WORKERS,
+    retries=2,
+)
+class CPUDesignWorker:
+    """run_rfdiffusion_test on a GPU-less container, CPU_WORKERS designs at a time
+    
+    Each concurrent input hands its run_inference.py call to a process of a
+    CPUInferencePool forked after the preload, so the designs run in parallel
+    with CPU_CORES / CPU_WORKERS threads each.
+    """
+    
+    @modal.enter()
+    def start(self):
+        # Before torch does any work here, so forking the pool is safe (see cpu_backend)
+        configure_threads(threads_per_worker(CPU_CORES, CPU_WORKERS))
+        preload_inference()
+        self.pool = CPUInferencePool(CPU_WORKERS, CPU_CORES).start()
+        set_executor(self.pool.run)
+        self.stats = ContainerStats()
+    
+    @modal.exit()
+    def stop(self):
+        set_executor(None)
+        self.pool.shutdown()
+    
+    @modal.method()
+    def run(self, *args, **kwargs):
+        container = self.stats.record_input()
+        result = run_rfdiffusion_test.local(*args, use_warm_pool=True, **kwargs)
+        container["startup"] = startup_timings()
+        container["cpu_workers"] = self.pool.workers
+        result["container"] = container
+        return result
+
+@app.cls(
+    image=image,
+    volumes={
+        "/data/models": models_volume,
+        "/data/outputs": outputs_volume,
+    },
+    gpu="A100",
+    timeout=14400,
+    min_containers=DEFAULT_MIN_CONTAINERS,
+    scaledown_window=DEFAULT_SCALEDOWN_WINDOW,
+)
+class MPNNWorker:
+    """run_mpnn on a container pool that can be kept warm"""
+    
+    @modal.enter()
+    def start(self):
+        self.stats = ContainerStats()
+    
+    @modal.method()
+    def run(self, mpnn_args, initial_guess=False, use_multimer=False):
+        container = self.stats.record_input()
+        result = run_mpnn.local(mpnn_args, initial_guess=initial_guess, use_multimer=use_multimer)
+        result["container"] = container
+        return result
+
 @app.local_entrypoint()
 def main(
     name: str = "test",
@@ -367,6 +658,12 @@ def main(
     chains: str = None,
     num_designs: int = 1,
     add_potential: bool = True,
+    fast_symmetry: bool = False,
+    results_path: str = None,
+    warm_pool: int = 0,
+    precision: str = "fp32",
+    device: str = "gpu",
+    memory_saving: bool = False,
     gpu_type: str = "A100",
     timeout_hours: float = 4.0,
 ):
@@ -401,6 +698,12 @@ def main(
         chains=chains,
         add_potential=add_potential,
         num_designs=num_designs,
+        fast_symmetry=fast_symmetry,
+        results_path=results_path,
+        warm_pool=warm_pool,
+        precision=precision,
+        device=device,
+        memory_saving=memory_saving,
     )
     
     print(f"\nAll runs completed in batch: {batch_name}")
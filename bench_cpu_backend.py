@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Compare designs per dollar of the CPU design worker against a GPU (T4) run
+
+Runs the same small-scaffold batch on DesignWorker with the given GPU (through
+with_options) and on CPUDesignWorker, then prices each design from its measured RFdiffusion
+runtime: a GPU design holds its GPU for the whole runtime, a CPU design holds
+1/CPU_WORKERS of the container. MPNN (on GPU in both cases) is not counted.
+Prices come from cpu_backend and can be overridden from the environment.
+
+Example:
+    python bench_cpu_backend.py --contigs 60 80 --designs 8 --iterations 50 --gpu T4
+"""
+
+import argparse
+import statistics
+
+import modal
+
+from basic_test import run_rfdiffusion_with_local_pdb
+from cpu_backend import CPU_CORES, CPU_MEMORY_MB, CPU_WORKERS, GPU_PRICE_PER_HOUR, container_price_per_hour
+from initialize_modal import app
+
+def runtimes(results):
+    """RFdiffusion seconds of the successful designs"""
+    return [r["runtime_seconds"] for r in results if r["result"] == "success"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--contigs", nargs="+", default=["60", "80"])
+    parser.add_argument("--designs", type=int, default=8, help="Designs per contig")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--gpu", default="T4", choices=sorted(GPU_PRICE_PER_HOUR))
+    args = parser.parse_args()
+
+    cpu_price = container_price_per_hour() / CPU_WORKERS
+    prices = {f"gpu ({args.gpu})": GPU_PRICE_PER_HOUR[args.gpu],
+              f"cpu ({CPU_CORES} cores / {CPU_WORKERS} workers, {CPU_MEMORY_MB // 1024} GiB)": cpu_price}
+    print("$/hour per concurrent design: " + ", ".join(f"{k} {v:.3f}" for k, v in prices.items()))
+
+    with modal.enable_output(), app.run():
+        print(f"{'contig':<8} {'backend':<48} {'designs':>7} {'median s':>9} {'$/design':>9} {'designs/$':>10}")
+        for contig in args.contigs:
+            for (name, price), device in zip(prices.items(), ["gpu", "cpu"]):
+                _, results = run_rfdiffusion_with_local_pdb(
+                    name=f"bench_{device}", contigs_list=[contig], iterations=args.iterations,
+                    num_designs=args.designs, device=device, gpu=args.gpu if device == "gpu" else None,
+                )
+                seconds = runtimes(results)
+                if not seconds:
+                    print(f"{contig:<8} {name:<48} {'failed':>7}")
+                    continue
+                dollars = statistics.mean(seconds) / 3600 * price
+                print(f"{contig:<8} {name:<48} {len(seconds):>7} {statistics.median(seconds):>9.1f} "
+                      f"{dollars:>9.4f} {1 / dollars:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark e3nn basis construction with and without the wigner_3j/spherical harmonics caches
+
+Each case runs cold (caches evicted before every call, i.e. the old per-call
+rebuild) and warm (caches filled), reporting time and tensor allocations per call.
+
+Example:
+    python bench_e3nn_bases.py --device cuda --lmax 3 --repeats 20
+"""
+
+import argparse
+import time
+
+import torch
+from e3nn import o3
+
+def count_allocations(fn, device):
+    """Run fn once; return the number of tensor allocations it made"""
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+        before = torch.cuda.memory_stats(device).get("allocation.all.allocated", 0)
+        fn()
+        torch.cuda.synchronize(device)
+        return torch.cuda.memory_stats(device).get("allocation.all.allocated", 0) - before
+    with torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU], profile_memory=True) as prof:
+        fn()
+    return sum(1 for event in prof.events() if event.name == "[memory]" and event.cpu_memory_usage > 0)
+
+def measure(fn, device, repeats, cold):
+    """Return (seconds per call, allocations per call)"""
+    def call():
+        if cold:
+            o3.clear_wigner_3j_cache()
+            o3.clear_spherical_harmonics_cache()
+        fn()
+
+    call()  # warm-up, and fills the caches for the warm runs
+    allocations = count_allocations(call, device)
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        call()
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+    return (time.perf_counter() - start_time) / repeats, allocations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--lmax", type=int, default=3)
+    parser.add_argument("--edges", type=int, default=4096, help="Edge vectors per spherical harmonics call")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    if device.type == "cuda" and device.index is None:
+        device = torch.device("cuda", torch.cuda.current_device())
+    lmax = args.lmax
+    triples = [
+        (l1, l2, l3)
+        for l1 in range(lmax + 1) for l2 in range(lmax + 1)
+        for l3 in range(abs(l1 - l2), min(l1 + l2, lmax) + 1)
+    ]
+    irreps = o3.Irreps([(8, (l, (-1) ** l)) for l in range(lmax + 1)])
+    sh_irreps = o3.Irreps.spherical_harmonics(lmax)
+    vectors = torch.randn(args.edges, 3, device=device)
+
+    cases = {
+        f"wigner_3j x{len(triples)}": lambda: [o3.wigner_3j(*ls, device=device) for ls in triples],
+        "FullyConnectedTensorProduct init": lambda: o3.FullyConnectedTensorProduct(irreps, sh_irreps, irreps).to(device),
+        f"spherical_harmonics lmax={lmax}": lambda: o3.spherical_harmonics(sh_irreps, vectors, True),
+    }
+    print(f"{'case':<36} {'cold ms':>9} {'warm ms':>9} {'cold allocs':>12} {'warm allocs':>12}")
+    for name, fn in cases.items():
+        cold_seconds, cold_allocations = measure(fn, device, args.repeats, cold=True)
+        warm_seconds, warm_allocations = measure(fn, device, args.repeats, cold=False)
+        print(f"{name:<36} {cold_seconds * 1e3:>9.2f} {warm_seconds * 1e3:>9.2f} "
+              f"{cold_allocations:>12} {warm_allocations:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark fused edge featurization (e3nn.o3.EdgeFeatures) against separate SH + radial basis
+
+Edges are the k-nearest-neighbour graph of the CA atoms in a PDB file (4krl
+chain A by default, k as in SE3_param_topk), optionally tiled to emulate
+several designs in one batch. Reports time and peak memory per call. The fused
+module, eager and TorchScript-compiled, is checked against the separate path
+before timing.
+
+Example:
+    python bench_edge_features.py --pdb 4krl_chain_a.pdb --k 64 --copies 1 8 --device cuda
+"""
+
+import argparse
+import time
+
+import torch
+from e3nn import o3
+from e3nn.math import soft_one_hot_linspace
+
+from symmetry import parse_ca_chains
+
+def knn_edge_vectors(coords, k):
+    """Edge vectors x[dst] - x[src] of the k-nearest-neighbour graph, shape (N * k, 3)"""
+    k = min(k, coords.shape[0] - 1)
+    d = torch.cdist(coords, coords)
+    d.fill_diagonal_(float("inf"))
+    src = d.topk(k, dim=1, largest=False).indices
+    return (coords[:, None, :] - coords[src]).reshape(-1, 3)
+
+def separate(edge_vec, lmax, args):
+    sh = o3.spherical_harmonics(list(range(lmax + 1)), edge_vec, True)
+    radial = soft_one_hot_linspace(edge_vec.norm(dim=-1), 0.0, args.cutoff, args.number, "gaussian", False)
+    return torch.cat([sh, radial], dim=-1)
+
+def measure(fn, device, repeats):
+    """Return (seconds per call, peak bytes above the starting allocation)"""
+    fn()
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+        torch.cuda.reset_peak_memory_stats(device)
+        base = torch.cuda.memory_allocated(device)
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+    seconds = (time.perf_counter() - start_time) / repeats
+    peak = torch.cuda.max_memory_allocated(device) - base if device.type == "cuda" else float("nan")
+    return seconds, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pdb", default="4krl_chain_a.pdb")
+    parser.add_argument("--k", type=int, default=64)
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 8], help="Designs per batch")
+    parser.add_argument("--lmax", type=int, default=2)
+    parser.add_argument("--number", type=int, default=32, help="Radial basis functions")
+    parser.add_argument("--cutoff", type=float, default=20.0)
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--script", action="store_true", help="Also time the TorchScript-compiled module")
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    with open(args.pdb) as handle:
+        chains = parse_ca_chains(handle.read())
+    coords = torch.tensor([xyz for _, chain_coords in chains.values() for xyz in chain_coords], device=device)
+    edge_vec_one = knn_edge_vectors(coords, args.k)
+    print(f"{args.pdb}: {coords.shape[0]} residues, {edge_vec_one.shape[0]} edges per design")
+
+    from e3nn.util.jit import compile
+
+    fused = o3.EdgeFeatures(args.lmax, 0.0, args.cutoff, args.number, "gaussian").to(device)
+    scripted = compile(o3.EdgeFeatures(args.lmax, 0.0, args.cutoff, args.number, "gaussian").to(device))
+    variants = {"fused": fused}
+    if args.script:
+        variants["fused (script)"] = scripted
+
+    print(f"{'designs':>7} {'edges':>9} {'variant':<16} {'ms':>8} {'peak MiB':>9}")
+    with torch.no_grad():
+        for copies in args.copies:
+            edge_vec = edge_vec_one.repeat(copies, 1)
+            out = torch.empty(edge_vec.shape[0], fused.dim, device=device)
+            expected = separate(edge_vec, args.lmax, args)
+            eager = fused(edge_vec).clone()
+            assert torch.allclose(eager, expected, atol=1e-5), "fused differs from separate"
+            assert torch.allclose(scripted(edge_vec), eager, atol=1e-6), "fused (script) differs from fused"
+            runs = {"separate": lambda: separate(edge_vec, args.lmax, args)}
+            for name, module in variants.items():
+                assert torch.allclose(module(edge_vec, out), expected, atol=1e-5), f"{name} differs from separate"
+                runs[name] = lambda module=module: module(edge_vec, out)
+            for name, fn in runs.items():
+                seconds, peak = measure(fn, device, args.repeats)
+                print(f"{copies:>7} {edge_vec.shape[0]:>9} {name:<16} {seconds * 1e3:>8.3f} {peak / 2**20:>9.2f}")
+
+if __name__ == "__main__":
+    main()
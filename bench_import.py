@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark import time of the entrypoint modules with python -X importtime
+
+Example:
+    python bench_import.py initialize_modal basic_test interactive_test --repeats 5 --top 15
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+def import_profile(module):
+    """Import a module in a fresh interpreter; return (wall seconds, {module: (self us, cumulative us)})"""
+    start_time = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    wall = time.time() - start_time
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return wall, times
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=["initialize_modal", "basic_test"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list by self time")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        runs = [import_profile(module) for _ in range(args.repeats)]
+        wall, times = min(runs, key=lambda run: run[0])
+        total = times[module][1] if module in times else 0
+        # Time spent in the module body itself, beyond its imports, is mostly
+        # Modal definitions (decorators, image chain)
+        print(f"{module}: best wall {wall:.2f}s, import {total / 1e6:.2f}s, "
+              f"own body {times.get(module, (0, 0))[0] / 1e6:.2f}s")
+        for name, (self_us, _) in sorted(times.items(), key=lambda item: -item[1][0])[:args.top]:
+            print(f"  {self_us / 1e3:>8.1f} ms  {name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Check and benchmark incremental KNN graph updates (dgl.IncrementalKNNGraph)
+
+The points are the CA atoms of a PDB file (4krl chain A by default), moved by a
+random walk: every step adds Gaussian noise of the given scale to every point,
+as successive denoising steps do. Each step the graph is built from scratch
+with dgl.knn_graph (bruteforce-blas) and updated incrementally, and the
+neighbor sets are compared. Rows that differ only by swapping points whose
+distances agree to float32 precision count as ties, not mismatches. Reports
+how often the Verlet skin bound forced exact row recomputation or full
+rebuilds, and the time per step of both.
+
+Example:
+    python bench_incremental_knn.py --pdb 4krl_chain_a.pdb --k 32 --skin 8 --steps 50 --step-size 0.05 0.2 1.0
+"""
+
+import argparse
+import time
+
+import dgl
+import torch
+
+from symmetry import parse_ca_chains
+
+def neighbor_sets(g):
+    """Sorted in-neighbors of every node"""
+    src, dst = g.edges()
+    order = torch.argsort(dst * g.num_nodes() + src)
+    return src[order].reshape(g.num_nodes(), -1)
+
+def count_mismatches(x, expected, got, rtol=1e-5):
+    """(rows whose neighbor distances differ, rows that differ only by near-ties)"""
+    differ = (expected != got).any(1).nonzero().squeeze(1)
+    if len(differ) == 0:
+        return 0, 0
+    x = x.double()
+    rows = x[differ, None, :]
+    d_expected = (rows - x[expected[differ]]).norm(dim=2).sort(dim=1).values
+    d_got = (rows - x[got[differ]]).norm(dim=2).sort(dim=1).values
+    ties = torch.isclose(d_expected, d_got, rtol=rtol).all(1)
+    return int((~ties).sum()), int(ties.sum())
+
+def synchronize(device):
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pdb", default="4krl_chain_a.pdb")
+    parser.add_argument("--k", type=int, default=32)
+    parser.add_argument("--skin", type=int, default=8)
+    parser.add_argument("--rebuild-fraction", type=float, default=0.25)
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--step-size", type=float, nargs="+", default=[0.05, 0.2, 1.0],
+                        help="Per-step noise scale in Angstrom")
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    with open(args.pdb) as handle:
+        chains = parse_ca_chains(handle.read())
+    start = torch.tensor([xyz for _, chain_coords in chains.values() for xyz in chain_coords],
+                         dtype=torch.float32, device=device)
+    print(f"{args.pdb}: {len(start)} residues, k={args.k}, skin={args.skin}, {args.steps} steps")
+
+    print(f"{'step A':>7} {'mismatch':>9} {'ties':>5} {'rebuilds':>9} {'rows recomputed':>16} "
+          f"{'full ms':>8} {'incr ms':>8}")
+    for step_size in args.step_size:
+        generator = torch.Generator().manual_seed(0)
+        knn = dgl.IncrementalKNNGraph(args.k, skin=args.skin, exclude_self=True,
+                                      rebuild_fraction=args.rebuild_fraction)
+        x = start.clone()
+        mismatched = ties = 0
+        full_seconds = incremental_seconds = 0.0
+        with torch.no_grad():
+            for _ in range(args.steps):
+                x = x + step_size * torch.randn(x.shape, generator=generator).to(device)
+
+                synchronize(device)
+                start_time = time.perf_counter()
+                expected = dgl.knn_graph(x, args.k, algorithm="bruteforce-blas", exclude_self=True)
+                synchronize(device)
+                full_seconds += time.perf_counter() - start_time
+
+                start_time = time.perf_counter()
+                got = knn(x)
+                synchronize(device)
+                incremental_seconds += time.perf_counter() - start_time
+
+                step_mismatched, step_ties = count_mismatches(x, neighbor_sets(expected), neighbor_sets(got))
+                mismatched += step_mismatched
+                ties += step_ties
+        print(f"{step_size:>7.2f} {mismatched:>9} {ties:>5} {knn.num_full_rebuilds:>9} "
+              f"{knn.num_rows_recomputed:>16} {full_seconds / args.steps * 1e3:>8.2f} {incremental_seconds / args.steps * 1e3:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark KNN graph construction with a frozen target block (dgl.TargetBinderKNNGraph)
+
+The target is the CA trace of a PDB file (4krl chain A by default); each design
+adds a binder of random CA positions near the target surface. Every step
+rebuilds the graphs of all designs in the batch, either from scratch with
+dgl.segmented_knn_batched_graph on the full complexes or with the target block
+frozen. Also checks that both give the same neighbor sets. Both builders live
+only in the local DGL copy (not in the worker image), so this measures the
+library, not the design workers.
+
+Example:
+    python bench_target_graph.py --pdb 4krl_chain_a.pdb --binder 80 --designs 1 8 --device cuda
+"""
+
+import argparse
+import time
+
+import dgl
+import torch
+from e3nn import o3
+
+from symmetry import parse_ca_chains
+
+def random_binders(target, designs, length, generator):
+    """(designs, length, 3) CA positions of random chains starting next to the target"""
+    start = target[torch.randint(len(target), (designs,), generator=generator)]
+    start = start + 10.0 * torch.nn.functional.normalize(start - target.mean(0), dim=1)
+    steps = 3.8 * torch.nn.functional.normalize(torch.randn(designs, length, 3, generator=generator), dim=2)
+    return start[:, None, :] + steps.cumsum(1)
+
+def neighbor_sets(g):
+    """Sorted in-neighbors of every node"""
+    src, dst = g.edges()
+    order = torch.argsort(dst * g.num_nodes() + src)
+    return src[order].reshape(g.num_nodes(), -1)
+
+def measure(fn, device, repeats):
+    """Seconds per call"""
+    fn()
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+    return (time.perf_counter() - start_time) / repeats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pdb", default="4krl_chain_a.pdb")
+    parser.add_argument("--chain", default=None, help="Target chain (default: the first)")
+    parser.add_argument("--binder", type=int, default=80, help="Binder length")
+    parser.add_argument("--designs", type=int, nargs="+", default=[1, 8], help="Designs per batch")
+    parser.add_argument("--k", type=int, default=64)
+    parser.add_argument("--lmax", type=int, default=2, help="Edge features: spherical harmonics degree")
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    with open(args.pdb) as f:
+        chains = parse_ca_chains(f.read())
+    chain = args.chain or next(iter(chains))
+    target = torch.tensor(chains[chain][1], dtype=torch.float32, device=device)
+    generator = torch.Generator().manual_seed(0)
+    edge_fn = o3.EdgeFeatures(args.lmax, 0.0, 20.0, 32).to(device)
+    print(f"target {args.pdb} chain {chain}: {len(target)} residues, binder {args.binder}, k={args.k}")
+
+    print(f"{'designs':>7} {'full ms':>9} {'frozen ms':>10} {'speedup':>8} {'same edges':>11}")
+    for designs in args.designs:
+        binders = random_binders(target.cpu(), designs, args.binder, generator).to(device)
+        n = len(target) + args.binder
+        x = torch.cat([target.expand(designs, -1, -1), binders], dim=1).reshape(-1, 3)
+        knn = dgl.TargetBinderKNNGraph(args.k, exclude_self=True, edge_fn=edge_fn)
+        knn.set_target(target)
+
+        def full():
+            g = dgl.segmented_knn_batched_graph(x, args.k, [n] * designs, exclude_self=True, rel_pos="rel_pos")
+            g.edata["feat"] = edge_fn(g.edata["rel_pos"])
+            return g
+
+        def frozen():
+            return knn(binders, rel_pos="rel_pos", edge_feat="feat")
+
+        with torch.no_grad():
+            same = bool((neighbor_sets(full()) == neighbor_sets(frozen())).all())
+            full_seconds = measure(full, device, args.repeats)
+            frozen_seconds = measure(frozen, device, args.repeats)
+        print(f"{designs:>7} {full_seconds * 1e3:>9.2f} {frozen_seconds * 1e3:>10.2f} "
+              f"{full_seconds / frozen_seconds:>7.2f}x {str(same):>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Benchmark parallel ranged volume reads against the sequential path
+
+Example:
+    python bench_volume_io.py rfdiffusion-models RFdiffusion/models/Base_ckpt.pt --concurrency 1 4 8 16
+"""
+
+import argparse
+import tempfile
+import time
+
+import modal
+
+def time_read(volume, path, chunk_size, concurrency):
+    """Read a volume file into a temporary file and return (bytes, seconds)"""
+    with tempfile.TemporaryFile() as handle:
+        start_time = time.time()
+        n = volume.read_file_into_fileobj(path, handle, chunk_size=chunk_size, concurrency=concurrency)
+        return n, time.time() - start_time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("volume_name")
+    parser.add_argument("path")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16],
+                        help="Values to compare; 1 is the sequential path")
+    parser.add_argument("--chunk-mib", type=int, nargs="+", default=[8])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    volume = modal.Volume.from_name(args.volume_name)
+    print(f"{'chunk':>8} {'conc':>5} {'best s':>8} {'MiB/s':>8}")
+    for chunk_mib in args.chunk_mib:
+        for concurrency in args.concurrency:
+            runs = [time_read(volume, args.path, chunk_mib * 1024 * 1024, concurrency) for _ in range(args.repeats)]
+            size = runs[0][0]
+            best = min(seconds for _, seconds in runs)
+            print(f"{chunk_mib:>6}Mi {concurrency:>5} {best:>8.2f} {size / best / 2**20:>8.1f}")
+
+if __name__ == "__main__":
+    main()
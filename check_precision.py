@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Check the equivariance error of e3nn layers in bf16/fp16 against fp32 on CPU
+
+The irreps follow SE3_param_topk in configs/base.yaml (num_degrees=2,
+num_channels=32). Reports, per layer and precision, the largest equivariance
+error and the largest deviation from the fp32 output.
+
+With an RFdiffusion checkout (and its SE3Transformer) importable, also runs a
+randomly initialized SE3TransformerWrapper with the SE3_param_topk settings on
+a random KNN graph, through the same PrecisionPolicy as the workers, and
+reports the deviation of its outputs from the fp32 forward. This runs on the
+GPU when there is one.
+
+Example:
+    python check_precision.py --precisions bf16 fp16 --trials 5
+    python check_precision.py --rfdiffusion /opt/RFdiffusion --nodes 256
+"""
+
+import argparse
+import importlib
+import sys
+
+import torch
+from e3nn import o3
+from e3nn.util.precision import precision_error
+
+from precision_policy import SE3_CLASS, SE3_MODULES, PrecisionPolicy
+
+# SE3_param_topk in configs/base.yaml
+SE3_PARAMS = dict(num_layers=1, num_channels=32, num_degrees=2, n_heads=4, div=4,
+                  l0_in_features=64, l0_out_features=64, l1_in_features=3, l1_out_features=2,
+                  num_edge_features=64)
+
+def layers(channels, lmax, edges):
+    """(name, module, fp32 inputs) for the layer types run by the precision policy"""
+    irreps = o3.Irreps([(channels, (l, (-1) ** l)) for l in range(lmax + 1)])
+    sh_irreps = o3.Irreps.spherical_harmonics(lmax)
+    return [
+        ("SphericalHarmonics", o3.SphericalHarmonics(sh_irreps, normalize=True),
+         [torch.randn(edges, 3)]),
+        ("Linear", o3.Linear(irreps, irreps),
+         [irreps.randn(edges, -1)]),
+        ("FullyConnectedTensorProduct", o3.FullyConnectedTensorProduct(irreps, sh_irreps, irreps),
+         [irreps.randn(edges, -1), sh_irreps.randn(edges, -1)]),
+    ]
+
+def se3_wrapper_errors(precisions, nodes, k, trials, device):
+    """{precision: (max |diff|, max |diff| / max |fp32 output|)} of the wrapped SE3TransformerWrapper forward"""
+    import dgl
+
+    cls = None
+    for name in SE3_MODULES:
+        try:
+            cls = getattr(importlib.import_module(name), SE3_CLASS, None)
+        except ImportError:
+            continue
+        if cls is not None:
+            break
+    if cls is None:
+        return None
+    module = cls(**SE3_PARAMS).to(device).eval()
+
+    # fp32 references first: the policy may switch submodules to the compute dtype for good
+    cases = []
+    with torch.no_grad():
+        for _ in range(trials):
+            x = torch.randn(nodes, 3, device=device) * 10
+            graph = dgl.knn_graph(x, k, exclude_self=True)
+            src, dst = graph.edges()
+            graph.edata["rel_pos"] = x[dst] - x[src]
+            inputs = (
+                graph,
+                torch.randn(nodes, SE3_PARAMS["l0_in_features"], 1, device=device),
+                torch.randn(nodes, SE3_PARAMS["l1_in_features"], 3, device=device),
+                torch.randn(graph.num_edges(), SE3_PARAMS["num_edge_features"], 1, device=device),
+            )
+            cases.append((inputs, module(*inputs)))
+
+    errors = {}
+    for precision in precisions:
+        uninstall = PrecisionPolicy(precision).install()
+        try:
+            diff = scale = 0.0
+            with torch.no_grad():
+                for inputs, expected in cases:
+                    out = module(*inputs)
+                    for key, value in expected.items():
+                        diff = max(diff, float((out[key].float() - value).abs().max()))
+                        scale = max(scale, float(value.abs().max()))
+            errors[precision] = (diff, diff / max(scale, 1e-12))
+        except RuntimeError as exc:
+            errors[precision] = exc
+        finally:
+            uninstall()
+    return errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--precisions", nargs="+", default=["bf16", "fp16"])
+    parser.add_argument("--channels", type=int, default=32)
+    parser.add_argument("--lmax", type=int, default=1)
+    parser.add_argument("--edges", type=int, default=1024)
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("--rfdiffusion", default="/data/models/RFdiffusion",
+                        help="RFdiffusion checkout providing SE3_network")
+    parser.add_argument("--nodes", type=int, default=128)
+    parser.add_argument("--k", type=int, default=32)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    print(f"{'layer':<30} {'precision':>9} {'equiv fp32':>11} {'equiv':>11} {'max |diff|':>11}")
+    for name, module, inputs in layers(args.channels, args.lmax, args.edges):
+        for precision in args.precisions:
+            try:
+                errors = precision_error(module, inputs, precision, ntrials=args.trials)
+            except RuntimeError as exc:
+                # e.g. fp16 kernels missing on this CPU build
+                print(f"{name:<30} {precision:>9} unsupported: {exc}")
+                continue
+            print(f"{name:<30} {precision:>9} {errors['equivariance_fp32']:>11.2e} "
+                  f"{errors['equivariance']:>11.2e} {errors['max_abs_diff']:>11.2e}")
+
+    sys.path.append(args.rfdiffusion)
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    torch.manual_seed(0)
+    try:
+        wrapper_errors = se3_wrapper_errors(args.precisions, args.nodes, args.k, args.trials, device)
+    except ImportError as exc:
+        print(f"\n{SE3_CLASS}: skipped, {exc}")
+        return
+    if wrapper_errors is None:
+        print(f"\n{SE3_CLASS}: not found, pass --rfdiffusion to check the wrapped forward")
+        return
+    print(f"\n{'module (' + device + ')':<30} {'precision':>9} {'max |diff|':>11} {'relative':>11}")
+    for precision, errors in wrapper_errors.items():
+        if isinstance(errors, RuntimeError):
+            print(f"{SE3_CLASS:<30} {precision:>9} unsupported: {errors}")
+            continue
+        print(f"{SE3_CLASS:<30} {precision:>9} {errors[0]:>11.2e} {errors[1]:>11.2e}")
+
+if __name__ == "__main__":
+    main()
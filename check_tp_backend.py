@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Check the block_sparse tensor product backend against the codegen backend on CPU
+
+Builds random TensorProducts over every connection mode (plus the fully
+connected and elementwise ones), copies the weights into a block_sparse twin
+and compares forward, right() and the input/weight gradients in float64.
+
+Example:
+    python check_tp_backend.py --cases 20 --seed 0
+"""
+
+import argparse
+import random
+
+import torch
+from e3nn import o3
+
+MODES = ["uvw", "uvu", "uvv", "uuw", "uuu", "uvuv"]
+
+def random_irreps(rng, lmax, max_mul, mul=None):
+    return o3.Irreps([
+        (mul if mul is not None else rng.randint(1, max_mul), (l, rng.choice([1, -1])))
+        for l in range(lmax + 1) if rng.random() < 0.8
+    ] or [(mul or 1, (0, 1))])
+
+def random_tensor_product(rng, lmax, max_mul):
+    """A TensorProduct with one random connection mode, or None if no path exists"""
+    mode = rng.choice(MODES)
+    weighted = mode == "uvw" or rng.random() < 0.7
+    mul = rng.randint(1, max_mul)
+    irreps_in1 = random_irreps(rng, lmax, max_mul, mul if mode[:2] == "uu" else None)
+    irreps_in2 = random_irreps(rng, lmax, max_mul, mul if mode[:2] == "uu" else None)
+    out, instructions = [], []
+    for i_1, (mul_1, ir_1) in enumerate(irreps_in1):
+        for i_2, (mul_2, ir_2) in enumerate(irreps_in2):
+            for ir_out in ir_1 * ir_2:
+                if ir_out.l > lmax or rng.random() < 0.3:
+                    continue
+                mul_out = {
+                    "uvw": rng.randint(1, max_mul), "uvu": mul_1, "uvv": mul_2,
+                    "uuw": rng.randint(1, max_mul) if weighted else 1, "uuu": mul_1, "uvuv": mul_1 * mul_2,
+                }[mode]
+                instructions.append((i_1, i_2, len(out), mode, weighted, rng.choice([1.0, 0.5])))
+                out.append((mul_out, ir_out))
+    if not instructions:
+        return None
+    return (irreps_in1, irreps_in2, o3.Irreps(out), instructions), mode
+
+def compare(name, make):
+    """Compare make(_backend='codegen') with make(_backend='block_sparse') on the same weights"""
+    codegen = make(_backend="codegen")
+    block_sparse = make(_backend="block_sparse")
+    block_sparse.load_state_dict(codegen.state_dict())
+
+    x1 = codegen.irreps_in1.randn(7, -1, requires_grad=True)
+    x2 = codegen.irreps_in2.randn(7, -1, requires_grad=True)
+    errors = {}
+    outputs = []
+    for module in (codegen, block_sparse):
+        out = module(x1, x2)
+        grads = torch.autograd.grad(out.pow(2).sum(), [x1, x2] + list(module.parameters()), allow_unused=True)
+        outputs.append([out, module.right(x2)] + [g for g in grads if g is not None])
+    for key, a, b in zip(["forward", "right", "grad x1", "grad x2", "grad w"], *outputs):
+        errors[key] = float((a - b).abs().max()) if a.numel() else 0.0
+    worst = max(errors.values())
+    print(f"{name:<60} {worst:>10.2e} {'ok' if worst < 1e-9 else 'MISMATCH ' + str(errors)}")
+    return worst < 1e-9
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=int, default=20, help="Random TensorProducts to check")
+    parser.add_argument("--lmax", type=int, default=2)
+    parser.add_argument("--max-mul", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    torch.set_default_dtype(torch.float64)
+    torch.manual_seed(args.seed)
+    rng = random.Random(args.seed)
+    ok = True
+
+    irreps = o3.Irreps("8x0e + 4x1o + 2x2e")
+    sh_irreps = o3.Irreps.spherical_harmonics(2)
+    for name, cls, cls_args in [
+        ("FullyConnectedTensorProduct", o3.FullyConnectedTensorProduct, (irreps, sh_irreps, irreps)),
+        ("ElementwiseTensorProduct", o3.ElementwiseTensorProduct, (irreps, irreps)),
+        ("FullTensorProduct", o3.FullTensorProduct, ("2x0e + 2x1o", "1x1o + 1x2e")),
+    ]:
+        for normalization in ["component", "norm"]:
+            make = lambda **kwargs: cls(*cls_args, normalization=normalization, **kwargs)
+            ok &= compare(f"{name} {normalization}", make)
+
+    checked = 0
+    while checked < args.cases:
+        case = random_tensor_product(rng, args.lmax, args.max_mul)
+        if case is None:
+            continue
+        tp_args, mode = case
+        normalization = rng.choice(["component", "norm"])
+        make = lambda **kwargs: o3.TensorProduct(*tp_args, normalization=normalization, **kwargs)
+        ok &= compare(f"{mode} {tp_args[0]} x {tp_args[1]} {normalization}", make)
+        checked += 1
+
+    print("all backends agree" if ok else "MISMATCH between backends")
+    raise SystemExit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
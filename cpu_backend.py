@@ -0,0 +1,128 @@
+"""
+CPU execution of the RFdiffusion design worker
+
+Small scaffolds (50-80 residues) keep a GPU mostly idle, so a many-core CPU
+container can be cheaper per design. CPUInferencePool runs run_inference.py
+for several designs at once in forked worker processes. Each process gets an
+equal share of the cores: torch intra-op threads, one inter-op thread, and the
+same count for DGL's CPU kernels and OpenMP/MKL. The pool is forked after
+preload_inference(), so the workers share the imported modules and preloaded
+checkpoints copy-on-write instead of loading them once each.
+
+Forking is only safe while the parent has not run any OpenMP/MKL parallel
+work: the OpenMP thread pool does not survive fork, and a child using it
+can hang. preload_inference() only imports modules and loads checkpoints onto
+the CPU, and CPUDesignWorker calls configure_threads() before it, so the
+parent never starts a full-size pool. Keep it that way: no model code may run
+in the parent before CPUInferencePool.start().
+
+Use python bench_cpu_backend.py to compare designs/$ against the T4 path.
+"""
+
+import multiprocessing
+import os
+import shlex
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+# Container shape of the CPU design worker, overridable from the environment at deploy time
+CPU_CORES = int(os.environ.get("RFDIFFUSION_CPU_CORES", "32"))
+CPU_WORKERS = int(os.environ.get("RFDIFFUSION_CPU_WORKERS", "4"))
+CPU_MEMORY_MB = int(os.environ.get("RFDIFFUSION_CPU_MEMORY_MB", "65536"))
+
+# Hourly prices used for designs/$ (Modal list prices at the time of writing; override to match your plan)
+PRICE_PER_CORE_HOUR = float(os.environ.get("RFDIFFUSION_PRICE_PER_CORE_HOUR", "0.047"))
+PRICE_PER_GIB_HOUR = float(os.environ.get("RFDIFFUSION_PRICE_PER_GIB_HOUR", "0.008"))
+GPU_PRICE_PER_HOUR = {"T4": 0.59, "L4": 0.80, "A10G": 1.10, "A100": 2.10, "H100": 3.95}
+
+# How often a waiting design checks whether its worker synced a sampler checkpoint
+SYNC_POLL_SECONDS = 30
+
+def threads_per_worker(cores=CPU_CORES, workers=CPU_WORKERS):
+    """Intra-op threads for each of `workers` processes sharing `cores` cores"""
+    return max(1, cores // max(1, workers))
+
+def configure_threads(threads, interop_threads=1):
+    """Set the thread counts of torch, DGL and OpenMP/MKL in this process
+
+    Call before torch is first used in the process, so OpenMP reads the counts
+    from the environment when it starts.
+    """
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(interop_threads)
+    except RuntimeError:
+        # Only settable before the first inter-op parallel work in the process
+        pass
+    try:
+        from dgl.utils import set_num_threads
+        set_num_threads(threads)
+    except ImportError:
+        pass
+
+def container_price_per_hour(cores=CPU_CORES, memory_mb=CPU_MEMORY_MB):
+    """Hourly price of a CPU container of the given shape"""
+    return cores * PRICE_PER_CORE_HOUR + memory_mb / 1024 * PRICE_PER_GIB_HOUR
+
+def _run_in_worker(opts_str, local_path, volume_path):
+    """Pool task: run_inference.py in the worker process, as fast_start's subprocess entry does"""
+    from design_checkpoint import SamplerCheckpointer
+    from fast_start import _run_script
+
+    checkpointer = SamplerCheckpointer(local_path, volume_path) if local_path else None
+    return _run_script(shlex.split(opts_str), checkpointer)
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+class CPUInferencePool:
+    """Run designs concurrently in forked processes with a share of the cores each"""
+
+    def __init__(self, workers=CPU_WORKERS, cores=CPU_CORES):
+        self.workers = workers
+        self.threads = threads_per_worker(cores, workers)
+        self._executor = None
+
+    def start(self):
+        """Fork the worker processes; call after preload_inference() and before any model code runs here"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=configure_threads,
+                initargs=(self.threads,),
+            )
+        print(f"CPU inference pool: {self.workers} workers x {self.threads} threads")
+        return self
+
+    def run(self, opts_str, checkpointer=None):
+        """Run one design in the pool; same contract as fast_start.run_inference"""
+        if self._executor is None:
+            self.start()
+        paths = (None, None) if checkpointer is None else (checkpointer.local_path, checkpointer.volume_path)
+        future = self._executor.submit(_run_in_worker, opts_str, *paths)
+        on_sync = checkpointer.on_sync if checkpointer is not None and checkpointer.volume_path else None
+        if on_sync is None:
+            return future.result()
+        # The worker copies checkpoints to the volume; commit them from here, since a
+        # forked process cannot use the parent's Modal client
+        synced = _mtime(checkpointer.volume_path)
+        while True:
+            try:
+                return future.result(timeout=SYNC_POLL_SECONDS)
+            except TimeoutError:
+                mtime = _mtime(checkpointer.volume_path)
+                if mtime != synced:
+                    synced = mtime
+                    on_sync()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
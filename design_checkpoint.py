@@ -0,0 +1,196 @@
+"""
+Step-level checkpointing of the RFdiffusion sampler
+
+A preempted or timed-out design normally restarts from step T. Here every
+sample_step output is recorded, and every `every` steps the recorded outputs,
+the RNG states and the self-conditioning state are saved to local disk. Every
+`sync_every` checkpoints the file is also copied next to the run's outputs on
+the volume. A retry with the same deterministic run folder replays the saved
+steps without calling the model, restores the RNG state and carries on from
+the first step that was not saved, so the remaining trajectory is unchanged.
+
+sample_init draws the lengths of ranged contigs ("50-70") and the initial
+noise, so the RNG state it started from is saved too and restored before it
+runs again on a retry; otherwise the replayed steps would belong to a design
+of a different length.
+"""
+
+import os
+import random
+import shutil
+
+# Defaults: checkpoint every 5 steps, copy to the volume every 4th checkpoint
+CHECKPOINT_EVERY = 5
+SYNC_EVERY = 4
+
+def _detach(value):
+    """Move tensors in a sample_step output to CPU, remembering their device"""
+    import torch
+
+    if isinstance(value, torch.Tensor):
+        return {"tensor": value.detach().cpu(), "device": str(value.device)}
+    if isinstance(value, (tuple, list)):
+        return type(value)(_detach(v) for v in value)
+    return value
+
+def _attach(value):
+    """Inverse of _detach"""
+    if isinstance(value, dict) and "tensor" in value:
+        return value["tensor"].to(value["device"])
+    if isinstance(value, (tuple, list)):
+        return type(value)(_attach(v) for v in value)
+    return value
+
+def _rng_state():
+    import numpy as np
+    import torch
+
+    state = {"torch": torch.get_rng_state(), "numpy": np.random.get_state(), "random": random.getstate()}
+    if torch.cuda.is_available() and torch.cuda.is_initialized():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+def _set_rng_state(state):
+    import numpy as np
+    import torch
+
+    torch.set_rng_state(state["torch"])
+    np.random.set_state(state["numpy"])
+    random.setstate(state["random"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+class SamplerCheckpointer:
+    """Record, save and replay the sample_step outputs of one run_inference.py run"""
+
+    def __init__(self, local_path, volume_path=None, every=CHECKPOINT_EVERY, sync_every=SYNC_EVERY, on_sync=None):
+        self.local_path = local_path
+        self.volume_path = volume_path
+        self.every = every
+        self.sync_every = sync_every
+        self.on_sync = on_sync
+        self.steps = []       # detached outputs of every sample_step so far
+        self.saved = None     # checkpoint being replayed, if resuming
+        self.init_rng = None  # RNG state sample_init started from
+        self.calls = 0
+        self.checkpoints = 0
+        self._in_step = False  # subclasses may call a patched parent sample_step
+
+    def load(self):
+        """Pick up the most advanced checkpoint on local disk or the volume"""
+        import torch
+
+        best = None
+        for path in (self.local_path, self.volume_path):
+            if path and os.path.exists(path):
+                try:
+                    state = torch.load(path, map_location="cpu", weights_only=False)
+                except Exception as exc:
+                    print(f"Ignoring unreadable checkpoint {path}: {exc}")
+                    continue
+                if best is None or len(state["steps"]) > len(best["steps"]):
+                    best = state
+        if best is not None:
+            self.saved = best
+            self.steps = list(best["steps"])
+            print(f"Resuming from checkpoint after {len(self.steps)} steps")
+        return best is not None
+
+    def save(self, sampler):
+        import torch
+
+        state = {
+            "steps": self.steps,
+            "init_rng": self.init_rng,
+            "rng": _rng_state(),
+            "prev_pred": _detach(getattr(sampler, "prev_pred", None)),
+        }
+        os.makedirs(os.path.dirname(self.local_path) or ".", exist_ok=True)
+        tmp_path = f"{self.local_path}.tmp"
+        torch.save(state, tmp_path)
+        os.replace(tmp_path, self.local_path)
+        self.checkpoints += 1
+        if self.volume_path and self.checkpoints % self.sync_every == 0:
+            self.sync()
+
+    def sync(self):
+        """Copy the local checkpoint next to the run outputs on the volume"""
+        if not (self.volume_path and os.path.exists(self.local_path)):
+            return
+        os.makedirs(os.path.dirname(self.volume_path), exist_ok=True)
+        tmp_path = f"{self.volume_path}.tmp"
+        shutil.copyfile(self.local_path, tmp_path)
+        os.replace(tmp_path, self.volume_path)
+        if self.on_sync is not None:
+            self.on_sync()
+
+    def clear(self):
+        """Remove the checkpoints once the run has finished"""
+        for path in (self.local_path, self.volume_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    def wrap_init(self, sample_init):
+        """Wrap a Sampler.sample_init so it starts from the same RNG state on a retry"""
+        checkpointer = self
+
+        def checkpointed_sample_init(sampler, *args, **kwargs):
+            # Only the first call is pinned; this also passes through a patched parent sample_init
+            if checkpointer.init_rng is None:
+                saved = checkpointer.saved
+                if saved is not None and saved.get("init_rng") is not None:
+                    checkpointer.init_rng = saved["init_rng"]
+                    _set_rng_state(checkpointer.init_rng)
+                else:
+                    checkpointer.init_rng = _rng_state()
+            return sample_init(sampler, *args, **kwargs)
+
+        return checkpointed_sample_init
+
+    def wrap(self, sample_step):
+        """Wrap a Sampler.sample_step so calls are replayed or recorded"""
+        checkpointer = self
+
+        def checkpointed_sample_step(sampler, **kwargs):
+            if checkpointer._in_step:
+                return sample_step(sampler, **kwargs)
+            index = checkpointer.calls
+            checkpointer.calls += 1
+            saved = checkpointer.saved
+            if saved is not None and index < len(saved["steps"]):
+                out = _attach(saved["steps"][index])
+                if index == len(saved["steps"]) - 1:
+                    # Last replayed step: continue exactly where the saved run left off
+                    _set_rng_state(saved["rng"])
+                    if saved["prev_pred"] is not None:
+                        sampler.prev_pred = _attach(saved["prev_pred"])
+                return out
+            checkpointer._in_step = True
+            try:
+                out = sample_step(sampler, **kwargs)
+            finally:
+                checkpointer._in_step = False
+            checkpointer.steps.append(_detach(out))
+            if len(checkpointer.steps) % checkpointer.every == 0:
+                checkpointer.save(sampler)
+            return out
+
+        return checkpointed_sample_step
+
+    def install(self):
+        """Patch every sampler class in inference.model_runners; returns an undo callable"""
+        from inference import model_runners
+
+        patched = []
+        for cls in vars(model_runners).values():
+            if not isinstance(cls, type):
+                continue
+            for name, wrap in (("sample_init", self.wrap_init), ("sample_step", self.wrap)):
+                if name in cls.__dict__:
+                    patched.append((cls, name, cls.__dict__[name]))
+                    setattr(cls, name, wrap(cls.__dict__[name]))
+
+        def uninstall():
+            for cls, name, method in patched:
+                setattr(cls, name, method)
+        return uninstall
@@ -0,0 +1,210 @@
+"""
+Snapshot-friendly startup for the RFdiffusion design worker
+
+run_inference.py normally starts as a fresh subprocess per design, paying for
+the torch/dgl/e3nn/colabdesign imports and the checkpoint load every time. With
+a memory snapshot the worker instead:
+
+1. preload_inference() (snapshot phase, CPU only): imports the heavy modules
+   and loads the checkpoints into CPU memory.
+2. attach_gpu() (after restore): creates the CUDA context.
+3. run_inference(): runs run_inference.py in-process, serving torch.load of
+   the preloaded checkpoints from memory.
+
+Each phase is timed, together with the time from input start to the first
+diffusion step, so the gain can be checked per container.
+
+Given a SamplerCheckpointer, run_inference() also checkpoints and resumes the
+sampler, and an inference.precision=bf16|fp16 override runs the SE(3) layers
+in reduced precision (see precision_policy); without a preload such runs go
+through this file as a subprocess. The same holds for the memory-saving
+overrides inference.chunk_size= and inference.checkpoint_blocks= (see
+memory_policy). set_executor() routes runs elsewhere, e.g.
+to the process pool of the CPU design worker (see cpu_backend).
+"""
+
+import logging
+import os
+import runpy
+import shlex
+import sys
+import time
+import traceback
+
+from memory_policy import MEMORY_OVERRIDES, MemoryPolicy, pop_memory_options
+from precision_policy import PRECISION_OVERRIDE, PrecisionPolicy, pop_precision
+
+MODELS_DIR = "/data/models"
+OUTPUTS_VOLUME = "rfdiffusion-outputs"  # outputs_volume in initialize_modal
+RFDIFFUSION_DIR = "/data/models/RFdiffusion"
+INFERENCE_SCRIPT = "/data/models/RFdiffusion/run_inference.py"
+CHECKPOINTS = [
+    "/data/models/RFdiffusion/models/Base_ckpt.pt",
+    "/data/models/RFdiffusion/models/Complex_base_ckpt.pt",
+]
+
+# Imported in the snapshot phase; failures are recorded rather than fatal
+HEAVY_MODULES = [
+    "numpy", "torch", "dgl", "e3nn", "hydra", "omegaconf",
+    "colabdesign.rf.utils", "inference.utils", "inference.model_runners",
+]
+
+_state = {"preloaded": False, "checkpoints": {}, "timings": {}, "executor": None}
+
+def startup_timings():
+    """Timings of the startup phases of this container so far (seconds)"""
+    return dict(_state["timings"])
+
+def preload_inference():
+    """Snapshot phase: heavy imports and CPU-side checkpoint loading, no GPU access"""
+    import importlib
+
+    timings = _state["timings"]
+    if RFDIFFUSION_DIR not in sys.path:
+        sys.path.append(RFDIFFUSION_DIR)
+
+    start = time.time()
+    for module in HEAVY_MODULES:
+        try:
+            importlib.import_module(module)
+        except Exception as exc:
+            print(f"Preload: could not import {module}: {exc}")
+    timings["imports_seconds"] = time.time() - start
+
+    import torch
+
+    start = time.time()
+    for path in CHECKPOINTS:
+        if os.path.exists(path):
+            _state["checkpoints"][os.path.realpath(path)] = torch.load(path, map_location="cpu")
+    timings["checkpoint_load_seconds"] = time.time() - start
+    _state["preloaded"] = True
+    print(f"Preloaded {len(_state['checkpoints'])} checkpoints in "
+          f"{timings['imports_seconds'] + timings['checkpoint_load_seconds']:.1f}s")
+
+def set_executor(executor):
+    """Send run_inference calls to executor(opts_str, checkpointer) instead; None restores the default"""
+    _state["executor"] = executor
+
+def attach_gpu():
+    """Post-restore phase: create the CUDA context the in-process runs will use"""
+    timings = _state["timings"]
+    timings["restored_at"] = time.time()
+    if not _state["preloaded"]:
+        return
+    import torch
+
+    start = time.time()
+    if torch.cuda.is_available():
+        torch.zeros(1, device="cuda")
+    timings["cuda_init_seconds"] = time.time() - start
+
+def _cached_load(load):
+    """Wrap torch.load so preloaded checkpoints come from memory"""
+    def cached_load(f, *args, **kwargs):
+        if isinstance(f, (str, os.PathLike)):
+            path = os.path.realpath(os.path.join(MODELS_DIR, f))
+            if path in _state["checkpoints"]:
+                # CPU tensors; load_state_dict copies them onto the model's device
+                return _state["checkpoints"][path]
+        return load(f, *args, **kwargs)
+    return cached_load
+
+class _FirstStepHandler(logging.Handler):
+    """Notes when run_inference.py logs its first diffusion timestep"""
+
+    def __init__(self):
+        super().__init__()
+        self.first_step_at = None
+
+    def emit(self, record):
+        if self.first_step_at is None and "Timestep" in record.getMessage():
+            self.first_step_at = time.time()
+
+def _run_script(args, checkpointer=None):
+    """Run run_inference.py in this process with the given override args; returns the exit code"""
+    import torch
+    from hydra.core.global_hydra import GlobalHydra
+
+    if RFDIFFUSION_DIR not in sys.path:
+        sys.path.insert(0, RFDIFFUSION_DIR)
+    precision, args = pop_precision(args)
+    chunk_size, checkpoint_blocks, args = pop_memory_options(args)
+    argv, cwd, load = sys.argv, os.getcwd(), torch.load
+    handler = _FirstStepHandler()
+    logger = logging.getLogger("__main__")
+    logger.addHandler(handler)
+    uninstall = None
+    uninstall_precision = PrecisionPolicy(precision).install()
+    uninstall_memory = MemoryPolicy(chunk_size, checkpoint_blocks).install()
+    start = time.time()
+    try:
+        os.chdir(MODELS_DIR)
+        sys.argv = [INFERENCE_SCRIPT] + args
+        torch.load = _cached_load(load)
+        if checkpointer is not None:
+            checkpointer.load()
+            uninstall = checkpointer.install()
+        GlobalHydra.instance().clear()
+        runpy.run_path(INFERENCE_SCRIPT, run_name="__main__")
+        code = 0
+    except SystemExit as exc:
+        code = exc.code if isinstance(exc.code, int) else int(exc.code is not None)
+    except Exception:
+        traceback.print_exc()
+        code = 1
+    finally:
+        sys.argv, torch.load = argv, load
+        os.chdir(cwd)
+        logger.removeHandler(handler)
+        if uninstall is not None:
+            uninstall()
+        uninstall_precision()
+        uninstall_memory()
+
+    if code == 0 and checkpointer is not None:
+        checkpointer.clear()
+    _record_first_step(handler, start)
+    return code
+
+def run_inference(opts_str, checkpointer=None):
+    """Run RFdiffusion's run_inference.py with the given overrides
+
+    Through the executor set with set_executor() if any, otherwise in-process
+    when preload_inference() has run and as a subprocess if not. Returns 0 on
+    success.
+    """
+    if _state["executor"] is not None:
+        return _state["executor"](opts_str, checkpointer)
+    if _state["preloaded"]:
+        return _run_script(shlex.split(opts_str), checkpointer)
+    if checkpointer is None and not any(o in opts_str for o in (PRECISION_OVERRIDE,) + MEMORY_OVERRIDES):
+        return os.system(f"cd {MODELS_DIR} && python RFdiffusion/run_inference.py {opts_str}")
+    # Same script, run through this module so the sampler steps can be
+    # checkpointed and the precision and memory policies applied
+    if checkpointer is None:
+        paths = "'' ''"
+    else:
+        paths = f"{shlex.quote(checkpointer.local_path)} {shlex.quote(checkpointer.volume_path or '')}"
+    return os.system(f"cd {MODELS_DIR} && python {os.path.abspath(__file__)} {paths} {opts_str}")
+
+def _record_first_step(handler, start):
+    timings = _state["timings"]
+    if handler.first_step_at is not None:
+        timings["time_to_first_step_seconds"] = handler.first_step_at - start
+        if "restored_at" in timings and "first_step_after_restore_seconds" not in timings:
+            timings["first_step_after_restore_seconds"] = handler.first_step_at - timings["restored_at"]
+
+if __name__ == "__main__":
+    # Subprocess entry: fast_start.py <local checkpoint or ""> <volume checkpoint or ""> <overrides...>
+    from design_checkpoint import SamplerCheckpointer
+
+    local_path, volume_path, *overrides = sys.argv[1:]
+    checkpointer = None
+    if local_path:
+        # The parent is blocked on this process, so commit each volume copy from here
+        import modal
+
+        on_sync = modal.Volume.from_name(OUTPUTS_VOLUME).commit if volume_path else None
+        checkpointer = SamplerCheckpointer(local_path, volume_path or None, on_sync=on_sync)
+    sys.exit(_run_script(overrides, checkpointer))
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Client-side tools for pulling RFdiffusion/MPNN results off the outputs volume
+"""
+
+import argparse
+import csv
+import fnmatch
+import hashlib
+import heapq
+import io
+import json
+import os
+import sys
+import tarfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+from modal.volume import FileEntryType
+
+# Import from your Modal initialization file
+from initialize_modal import outputs_volume
+
+# Score file written by colabdesign's designability_test into each run folder
+SCORES_FILE = "mpnn_results.csv"
+
+# Default composite score: higher is better, so error metrics get negative weights
+DEFAULT_SCORE = "plddt=1,rmsd=-0.1"
+
+def parse_score_weights(spec):
+    """Parse a composite score spec like "plddt=1,rmsd=-0.1" into {column: weight}"""
+    weights = {}
+    for term in spec.split(","):
+        term = term.strip()
+        if not term:
+            continue
+        column, _, weight = term.partition("=")
+        weights[column.strip()] = float(weight) if weight else 1.0
+    if not weights:
+        raise ValueError(f"Empty score spec: {spec!r}")
+    return weights
+
+def composite_score(row, weights):
+    """Weighted sum of the score columns of one mpnn_results.csv row"""
+    return sum(weight * float(row[column]) for column, weight in weights.items())
+
+def list_run_folders(batch_name):
+    """List the run folders of a batch on the outputs volume"""
+    return [
+        entry.path
+        for entry in outputs_volume.iterdir(batch_name, recursive=False)
+        if entry.type == FileEntryType.DIRECTORY
+    ]
+
+def read_scores(run_folder):
+    """Stream one run's score file through Volume.read_file and parse its rows"""
+    try:
+        data = b"".join(outputs_volume.read_file(f"{run_folder}/{SCORES_FILE}"))
+    except FileNotFoundError:
+        return []
+    return list(csv.DictReader(io.StringIO(data.decode())))
+
+def top_k_designs(batch_name, k=20, score=DEFAULT_SCORE, max_workers=16):
+    """Return the k best designs of a batch as (score, run_folder, row), best first
+
+    Score files are read in parallel and folded into a bounded min-heap, so only
+    k rows are ever kept regardless of the batch size.
+    """
+    weights = parse_score_weights(score)
+    run_folders = list_run_folders(batch_name)
+    print(f"Scanning {len(run_folders)} run folders in batch: {batch_name}")
+
+    heap = []
+    counter = 0  # Tie-breaker so rows (dicts) are never compared
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for run_folder, rows in zip(run_folders, pool.map(read_scores, run_folders)):
+            for row in rows:
+                try:
+                    value = composite_score(row, weights)
+                except (KeyError, ValueError):
+                    print(f"  Skipping row without {', '.join(weights)} in {run_folder}")
+                    continue
+                item = (value, counter, run_folder, row)
+                counter += 1
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+
+    return [(value, run_folder, row) for value, _, run_folder, row in sorted(heap, reverse=True)]
+
+def design_pdb_path(run_folder, row):
+    """Volume path of the AF2-predicted structure for one mpnn_results.csv row"""
+    return f"{run_folder}/all_pdb/design{row['design']}_n{row['n']}.pdb"
+
+def download_file(remote_path, local_path):
+    """Download a single file from the outputs volume"""
+    os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+    with open(local_path, "wb") as handle:
+        return outputs_volume.read_file_into_fileobj(remote_path, handle)
+
+def download_files(pairs, max_workers=16):
+    """Download (remote_path, local_path) pairs in parallel"""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(download_file, remote, local) for remote, local in pairs]
+        return [future.result() for future in futures]
+
+def matches_filters(rel_path, include=None, exclude=None):
+    """Apply include/exclude globs to a batch-relative path
+
+    A pattern matches the full relative path, any of its directory prefixes or
+    any single path component, so "traj" and "*/traj" both skip everything
+    under a run's traj/ folder.
+    """
+    parts = rel_path.split("/")
+    prefixes = ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+    def hit(patterns):
+        return any(fnmatch.fnmatch(p, pattern) for pattern in patterns for p in prefixes + parts)
+
+    if include and not hit(include):
+        return False
+    return not (exclude and hit(exclude))
+
+def list_export_files(batch_name, include=None, exclude=None):
+    """List the files of a batch that pass the include/exclude filters"""
+    entries = []
+    for entry in outputs_volume.iterdir(batch_name, recursive=True):
+        if entry.type != FileEntryType.FILE:
+            continue
+        rel_path = os.path.relpath(entry.path, batch_name)
+        if matches_filters(rel_path, include, exclude):
+            entries.append((rel_path, entry))
+    return entries
+
+def sha256_file(path):
+    """Hash a local file in 1 MiB chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def download_file_with_hash(remote_path, local_path):
+    """Download a file and return its sha256, for the export manifest"""
+    download_file(remote_path, local_path)
+    return sha256_file(local_path)
+
+def export_to_directory(batch_name, out_dir, entries, check="size", max_workers=16):
+    """Download entries into out_dir, skipping files that are already present
+
+    With check="size" a local file whose size matches the volume entry is kept.
+    With check="hash" the local file must also match the sha256 recorded in the
+    manifest when it was downloaded, and the volume entry must be unchanged.
+    
+    Every completed download is recorded in the manifest, even when others
+    fail; the failures are reported and raised once all downloads finished.
+    """
+    manifest_path = os.path.join(out_dir, ".export_manifest.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as handle:
+            manifest = json.load(handle)
+
+    pending = []
+    for rel_path, entry in entries:
+        local_path = os.path.join(out_dir, rel_path)
+        if os.path.exists(local_path) and os.path.getsize(local_path) == entry.size:
+            if check == "size":
+                continue
+            recorded = manifest.get(rel_path)
+            if (recorded and recorded["size"] == entry.size and recorded["mtime"] == entry.mtime
+                    and recorded["sha256"] == sha256_file(local_path)):
+                continue
+        pending.append((rel_path, entry, local_path))
+
+    print(f"Exporting {len(pending)} files ({len(entries) - len(pending)} already present) to {out_dir}")
+    os.makedirs(out_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(download_file_with_hash, entry.path, local_path): (rel_path, entry)
+            for rel_path, entry, local_path in pending
+        }
+        failed = {}
+        try:
+            for future in as_completed(futures):
+                rel_path, entry = futures[future]
+                try:
+                    manifest[rel_path] = {"size": entry.size, "mtime": entry.mtime, "sha256": future.result()}
+                except Exception as exc:
+                    failed[rel_path] = exc
+        finally:
+            # Record progress even on failure so a rerun resumes where this one stopped
+            with open(manifest_path, "w") as handle:
+                json.dump(manifest, handle, indent=1, sort_keys=True)
+    if failed:
+        for rel_path, exc in sorted(failed.items()):
+            print(f"Failed to export {rel_path}: {exc}", file=sys.stderr)
+        raise RuntimeError(f"{len(failed)} of {len(pending)} files failed to export; rerun to retry them")
+    return len(pending)
+
+def read_into_memory(remote_path):
+    """Read a volume file into an in-memory buffer"""
+    buffer = io.BytesIO()
+    outputs_volume.read_file_into_fileobj(remote_path, buffer)
+    buffer.seek(0)
+    return buffer
+
+def export_to_tar(batch_name, tar_path, entries, max_workers=16):
+    """Stream entries into a tar archive ("-" for stdout)
+
+    Downloads run concurrently while the archive is written sequentially; at most
+    2 * max_workers files are held in memory. An existing uncompressed archive is
+    appended to, skipping members that are already present with the same size.
+    """
+    if tar_path == "-":
+        tar = tarfile.open(fileobj=sys.stdout.buffer, mode="w|")
+        present = {}
+    elif os.path.exists(tar_path):
+        tar = tarfile.open(tar_path, mode="a")
+        present = {member.name: member.size for member in tar.getmembers()}
+    else:
+        tar = tarfile.open(tar_path, mode="w")
+        present = {}
+
+    pending = [(rel_path, entry) for rel_path, entry in entries if present.get(rel_path) != entry.size]
+    print(f"Exporting {len(pending)} files ({len(entries) - len(pending)} already present) to {tar_path}",
+          file=sys.stderr)
+
+    with tar, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        queue = iter(pending)
+        in_flight = {}
+
+        def submit_next():
+            for rel_path, entry in queue:
+                in_flight[pool.submit(read_into_memory, entry.path)] = (rel_path, entry)
+                return
+
+        for _ in range(2 * max_workers):
+            submit_next()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                rel_path, entry = in_flight.pop(future)
+                info = tarfile.TarInfo(f"{batch_name}/{rel_path}")
+                info.size = entry.size
+                info.mtime = entry.mtime
+                tar.addfile(info, future.result())
+                submit_next()
+    return len(pending)
+
+def export_batch(batch_name, out, include=None, exclude=None, check="size", max_workers=16):
+    """Export a batch from the outputs volume to a local directory or tar file"""
+    entries = list_export_files(batch_name, include, exclude)
+    if out == "-" or out.endswith(".tar"):
+        return export_to_tar(batch_name, out, entries, max_workers=max_workers)
+    return export_to_directory(batch_name, out, entries, check=check, max_workers=max_workers)
+
+def fetch_top_designs(batch_name, out_dir, k=20, score=DEFAULT_SCORE, max_workers=16):
+    """Rank a batch by composite score and download only the winning PDBs"""
+    ranked = top_k_designs(batch_name, k=k, score=score, max_workers=max_workers)
+
+    pairs = []
+    print(f"Top {len(ranked)} designs by {score}:")
+    for rank, (value, run_folder, row) in enumerate(ranked):
+        remote = design_pdb_path(run_folder, row)
+        local = os.path.join(out_dir, f"rank{rank:03d}_{os.path.basename(run_folder)}_{os.path.basename(remote)}")
+        print(f"{rank+1}. {value:.4f}  {remote}")
+        pairs.append((remote, local))
+
+    download_files(pairs, max_workers=max_workers)
+    print(f"Downloaded {len(pairs)} PDBs to {out_dir}")
+    return ranked
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rank = subparsers.add_parser("rank", help="Download only the top-k designs of a batch")
+    rank.add_argument("batch_name")
+    rank.add_argument("--out-dir", default="top_designs")
+    rank.add_argument("-k", type=int, default=20)
+    rank.add_argument("--score", default=DEFAULT_SCORE,
+                      help="Comma-separated column=weight terms, higher total is better")
+    rank.add_argument("--max-workers", type=int, default=16)
+
+    export = subparsers.add_parser("export", help="Download a batch to a directory or tar stream")
+    export.add_argument("batch_name")
+    export.add_argument("--out", default=None,
+                        help="Output directory, a .tar file, or - for a tar stream on stdout "
+                             "(default: ./<batch_name>)")
+    export.add_argument("--include", action="append", default=[],
+                        help="Glob of files/folders to export (repeatable)")
+    export.add_argument("--exclude", action="append", default=[],
+                        help="Glob of files/folders to skip, e.g. traj (repeatable)")
+    export.add_argument("--check", choices=["size", "hash"], default="size",
+                        help="How to decide an already-present file can be skipped")
+    export.add_argument("--max-workers", type=int, default=16)
+
+    args = parser.parse_args()
+    if args.command == "rank":
+        fetch_top_designs(args.batch_name, args.out_dir, k=args.k, score=args.score,
+                          max_workers=args.max_workers)
+    elif args.command == "export":
+        export_batch(args.batch_name, args.out or args.batch_name, include=args.include,
+                     exclude=args.exclude, check=args.check, max_workers=args.max_workers)
+
+if __name__ == "__main__":
+    main()
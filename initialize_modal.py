@@ -5,24 +5,34 @@
 #3. Create a volume to store the outputs
 #4. Create a function that will be used to run the code
 
-import os, time, signal
-import sys, random, string, re
+# Image and volume handles below are lazy: nothing is resolved or built until
+# the app runs. What made importing this module (and everything that imports
+# it) slow was Modal's automounting, which scans every module in sys.modules
+# once per decorated function. Local modules are therefore listed explicitly.
+
+import os
 import modal
 from datetime import datetime
 
-print("Importing modal...")
+# Local modules the workers import; mounted into containers at startup
+LOCAL_MODULES = [
+    "initialize_modal", "symmetry", "input_store", "results_sink", "warm_pool", "fast_start",
+    "design_checkpoint", "precision_policy", "cpu_backend", "memory_policy",
+]
 
-# Create a Modal app
-app = modal.App("rfdiffusion")
+# e3nn 0.3.3 as patched in this repository (codegen cache and the other local
+# changes); only its .py sources are tracked here
+E3NN_PATCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "modal_diffusion_env", "lib", "python3.11", "site-packages", "e3nn")
 
-print("Creating volumes...")
+# Create a Modal app. include_source=True mounts only each function's own
+# module instead of scanning sys.modules for first-party code.
+app = modal.App("rfdiffusion", include_source=True)
 
 # Create volumes for storing models and outputs
 models_volume = modal.Volume.from_name("rfdiffusion-models", create_if_missing=True)
 outputs_volume = modal.Volume.from_name("rfdiffusion-outputs", create_if_missing=True)
 
-print("Volumes created successfully!")
-
 # Create image with all dependencies
 image = (
     modal.Image.from_registry("python:3.11")
@@ -48,11 +58,22 @@ image = (
         "pip install --no-dependencies dgl==2.0.0 -f https://data.dgl.ai/wheels/cu121/repo.html",
         "pip install --no-dependencies e3nn==0.3.3 opt_einsum_fx"
     )
-    .env({"DGLBACKEND": "pytorch", "PYTHONPATH": "/opt/RFdiffusion"})
+    # Overlay the patched e3nn sources onto the pip install at build time, so
+    # data files shipped only in the wheel (o3/constants.pt) stay in place
+    .add_local_dir(E3NN_PATCH_DIR, "/tmp/e3nn_patch", copy=True, ignore=["**/__pycache__"])
+    .run_commands(
+        "cp -r /tmp/e3nn_patch/. \"$(python -c 'import site; print(site.getsitepackages()[0])')/e3nn/\"",
+        "rm -rf /tmp/e3nn_patch",
+    )
+    .env({
+        "DGLBACKEND": "pytorch",
+        "PYTHONPATH": "/opt/RFdiffusion",
+        # Compiled e3nn TorchScript modules, shared by all containers via the models volume
+        "E3NN_CODEGEN_CACHE": "/data/models/e3nn_codegen_cache",
+    })
+    .add_local_python_source(*LOCAL_MODULES)
 )
 
-print("Image created successfully!")
-
 @app.function(
     image=image,
     volumes={"/data/models": models_volume},
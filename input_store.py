@@ -0,0 +1,58 @@
+"""
+Content-addressed storage of design inputs on the models volume
+
+Every design of a campaign used to carry the full target PDB text in its
+starmap input, so the same text was serialized and uploaded once per design.
+The client now uploads each distinct PDB once, named by its sha256, and the
+inputs carry a small PDBRef instead. A container reads the file from the
+volume the first time it sees a reference and keeps the text in memory for
+the later inputs it runs.
+"""
+
+import hashlib
+import io
+import os
+from typing import NamedTuple
+
+# Directory on the models volume, and where the workers mount that volume
+INPUT_STORE_DIR = "input_store"
+MODELS_MOUNT = "/data/models"
+
+class PDBRef(NamedTuple):
+    """Reference to a PDB file uploaded with put_pdb"""
+    sha256: str
+
+    @property
+    def path(self):
+        return f"{INPUT_STORE_DIR}/{self.sha256}.pdb"
+
+# PDB text of the references this container has resolved
+_resolved = {}
+
+def put_pdb(volume, pdb_content):
+    """Upload the PDB text to the volume (once per content) and return its PDBRef"""
+    data = pdb_content.encode()
+    ref = PDBRef(hashlib.sha256(data).hexdigest())
+    with volume.batch_upload(force=True) as batch:
+        batch.put_file(io.BytesIO(data), f"/{ref.path}")
+    return ref
+
+def resolve_pdb(pdb_content, reload=None, mount_path=MODELS_MOUNT):
+    """PDB text of a PDBRef; anything else (PDB text or None) is returned as is
+
+    reload, e.g. models_volume.reload, is called when the file is not on the
+    mounted volume yet, as in containers started before the upload.
+    """
+    if not isinstance(pdb_content, PDBRef):
+        return pdb_content
+    if pdb_content.sha256 in _resolved:
+        return _resolved[pdb_content.sha256]
+    path = os.path.join(mount_path, pdb_content.path)
+    if not os.path.exists(path) and reload is not None:
+        reload()
+    with open(path, "rb") as handle:
+        data = handle.read()
+    if hashlib.sha256(data).hexdigest() != pdb_content.sha256:
+        raise ValueError(f"{path} does not match its sha256")
+    _resolved[pdb_content.sha256] = data.decode()
+    return _resolved[pdb_content.sha256]
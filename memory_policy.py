@@ -0,0 +1,238 @@
+"""
+Memory-saving execution of the RFdiffusion pair track for long contigs
+
+Pair features are L x L x d_pair (d_pair=128) in each of the n_main_block=32
+blocks. The axial attention over them makes several more pair-sized tensors
+(queries, keys, values, gates, outputs), and that is what overflows an A100 for
+800+ residue assemblies. inference.chunk_size=auto|N and
+inference.checkpoint_blocks=True are not RFdiffusion options: fast_start takes
+them out of the overrides and installs a MemoryPolicy instead.
+
+* Chunked attention: BiasedAxialAttention accumulates its tied attention
+  logits over chunks of rows and produces its output a chunk of columns at a
+  time, and the pair FeedForwardLayer runs row chunk by row chunk. Peak memory
+  per layer drops from several L x L x d_pair tensors to about one plus
+  O(chunk x L x d_pair). With "auto" the chunk is sized from the free VRAM
+  (read with pynvml, plus memory cached by torch) for each call, and layers
+  whose full tensors fit run unchunked.
+* Block checkpointing: RoseTTAFoldModule runs its blocks with use_checkpoint,
+  recomputing block activations in the backward pass. This only matters when
+  gradients flow through the model; the sampler runs it under no_grad, where
+  chunking is what saves memory.
+
+The chunked attention is checked once per process against the original forward
+on a small random input and is not used if they disagree.
+"""
+
+import importlib
+import inspect
+import math
+import os
+
+CHUNK_SIZE_OVERRIDE = "inference.chunk_size="
+CHECKPOINT_OVERRIDE = "inference.checkpoint_blocks="
+MEMORY_OVERRIDES = (CHUNK_SIZE_OVERRIDE, CHECKPOINT_OVERRIDE)
+
+# Where RFdiffusion defines the patched classes, depending on the checkout
+ATTENTION_MODULES = ["Attention_module", "rfdiffusion.Attention_module"]
+MODEL_MODULES = ["RoseTTAFoldModel", "rfdiffusion.RoseTTAFoldModel"]
+ATTENTION_CLASS = "BiasedAxialAttention"
+FEED_FORWARD_CLASS = "FeedForwardLayer"
+MODEL_CLASS = "RoseTTAFoldModule"
+
+# Fraction of the free VRAM a chunk may use, and pair-sized features live per chunk row
+FREE_MEMORY_FRACTION = 0.5
+FEATURES_PER_PAIR_CHANNEL = 8
+
+def pop_memory_options(args):
+    """Remove the memory-saving overrides from hydra overrides; returns (chunk_size, checkpoint_blocks, remaining args)
+
+    chunk_size is "auto", or an int with 0 meaning no chunking.
+    """
+    chunk_size, checkpoint_blocks, remaining = 0, False, []
+    for arg in args:
+        if arg.startswith(CHUNK_SIZE_OVERRIDE):
+            chunk_size = arg[len(CHUNK_SIZE_OVERRIDE):].strip("'\"")
+        elif arg.startswith(CHECKPOINT_OVERRIDE):
+            checkpoint_blocks = arg[len(CHECKPOINT_OVERRIDE):].strip("'\"").lower() in ("true", "1", "yes")
+        else:
+            remaining.append(arg)
+    if chunk_size != "auto":
+        try:
+            chunk_size = int(chunk_size)
+        except ValueError:
+            raise ValueError(f"inference.chunk_size must be 'auto' or an integer, got {chunk_size!r}") from None
+    return chunk_size, checkpoint_blocks, remaining
+
+def free_vram_bytes(device):
+    """Memory available to torch on a CUDA device: free per NVML plus torch's cached, unused blocks"""
+    import torch
+
+    index = device.index if device.index is not None else torch.cuda.current_device()
+    try:
+        import pynvml
+
+        pynvml.nvmlInit()
+        # NVML numbers all GPUs; CUDA only the visible ones
+        visible = os.environ.get("CUDA_VISIBLE_DEVICES", "")
+        visible = [v for v in visible.split(",") if v.strip().isdigit()]
+        nvml_index = int(visible[index]) if index < len(visible) else index
+        free = pynvml.nvmlDeviceGetMemoryInfo(pynvml.nvmlDeviceGetHandleByIndex(nvml_index)).free
+    except Exception:
+        free = torch.cuda.mem_get_info(device)[0]
+    return free + torch.cuda.memory_reserved(device) - torch.cuda.memory_allocated(device)
+
+def auto_chunk_size(pair, free_bytes, fraction=FREE_MEMORY_FRACTION):
+    """Rows per chunk for a (B, L, L, d) pair tensor, or None when the whole tensor fits"""
+    B, L, _, d = pair.shape
+    bytes_per_row = B * L * d * FEATURES_PER_PAIR_CHANNEL * pair.element_size()
+    chunk = int(fraction * free_bytes // bytes_per_row)
+    return None if chunk >= L else max(1, chunk)
+
+def chunked_biased_axial_attention(module, pair, bias, chunk):
+    """BiasedAxialAttention.forward computed chunk rows/columns at a time"""
+    import torch
+
+    B, L = pair.shape[:2]
+    if module.is_row:
+        pair = pair.permute(0, 2, 1, 3)
+        bias = bias.permute(0, 2, 1, 3)
+    h, dim = module.h, module.dim
+
+    # Tied attention logits, summed over chunks of n
+    attn = None
+    for start in range(0, L, chunk):
+        normed = module.norm_pair(pair[:, start:start + chunk])
+        query = module.to_q(normed).reshape(B, -1, L, h, dim) * module.scaling
+        key = module.to_k(normed).reshape(B, -1, L, h, dim) / math.sqrt(L)
+        part = torch.einsum('bnihk,bnjhk->bijh', query, key)
+        attn = part if attn is None else attn + part
+    attn = attn + module.to_b(module.norm_bias(bias))
+    attn = torch.softmax(attn, dim=-2)
+
+    # Outputs a chunk of k at a time: values from rows k, gates from columns k
+    out = None
+    for start in range(0, L, chunk):
+        value = module.to_v(module.norm_pair(pair[:, start:start + chunk])).reshape(B, -1, L, h, dim)
+        chunk_out = torch.einsum('bijh,bkjhd->bikhd', attn, value).reshape(B, L, -1, h * dim)
+        gate = torch.sigmoid(module.to_g(module.norm_pair(pair[:, :, start:start + chunk])))
+        chunk_out = module.to_out(gate * chunk_out)
+        if out is None:
+            out = chunk_out.new_empty(B, L, L, chunk_out.shape[-1])
+        out[:, :, start:start + chunk] = chunk_out
+    if module.is_row:
+        out = out.permute(0, 2, 1, 3)
+    return out
+
+def chunked_rows(forward, module, x, chunk):
+    """A position-wise forward over (B, L, L, d) applied chunk rows at a time"""
+    import torch
+
+    return torch.cat([forward(module, x[:, start:start + chunk]) for start in range(0, x.shape[1], chunk)], dim=1)
+
+def _import_class(module_names, class_name):
+    for name in module_names:
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            continue
+        cls = getattr(module, class_name, None)
+        if cls is not None and "forward" in cls.__dict__:
+            return cls
+    return None
+
+class MemoryPolicy:
+    """Chunked pair attention and block checkpointing for long contigs"""
+
+    def __init__(self, chunk_size=0, checkpoint_blocks=False):
+        self.chunk_size = chunk_size
+        self.checkpoint_blocks = checkpoint_blocks
+        self._verified = {}
+
+    def chunk_for(self, pair):
+        """Rows per chunk for this pair tensor, or None to run unchunked"""
+        if self.chunk_size == "auto":
+            if not pair.is_cuda:
+                return None
+            return auto_chunk_size(pair, free_vram_bytes(pair.device))
+        return self.chunk_size if 0 < self.chunk_size < pair.shape[1] else None
+
+    def _verify(self, module, forward):
+        """Compare chunked and original attention once per class on a small random input"""
+        import torch
+
+        cls = type(module)
+        if cls not in self._verified:
+            d_pair = module.norm_pair.normalized_shape[0]
+            d_bias = module.norm_bias.normalized_shape[0]
+            param = next(module.parameters())
+            generator = torch.Generator(device=param.device).manual_seed(0)
+            pair = torch.randn(1, 12, 12, d_pair, generator=generator, device=param.device, dtype=param.dtype)
+            bias = torch.randn(1, 12, 12, d_bias, generator=generator, device=param.device, dtype=param.dtype)
+            with torch.no_grad(), torch.autocast(param.device.type, enabled=False):
+                expected = forward(module, pair, bias)
+                got = chunked_biased_axial_attention(module, pair, bias, 5)
+            ok = torch.allclose(expected, got, rtol=1e-3, atol=1e-4 * float(expected.abs().max()) + 1e-6)
+            if not ok:
+                print(f"Memory policy: chunked {cls.__name__} does not match this RFdiffusion version, not chunking")
+            self._verified[cls] = ok
+        return self._verified[cls]
+
+    def wrap_attention(self, forward):
+        policy = self
+
+        def chunked_forward(module, pair, bias, *args, **kwargs):
+            chunk = policy.chunk_for(pair)
+            if chunk is None or args or kwargs or not policy._verify(module, forward):
+                return forward(module, pair, bias, *args, **kwargs)
+            return chunked_biased_axial_attention(module, pair, bias, chunk)
+
+        return chunked_forward
+
+    def wrap_feed_forward(self, forward):
+        policy = self
+
+        def chunked_forward(module, src, *args, **kwargs):
+            chunk = policy.chunk_for(src) if src.dim() == 4 else None
+            if chunk is None or args or kwargs:
+                return forward(module, src, *args, **kwargs)
+            return chunked_rows(forward, module, src, chunk)
+
+        return chunked_forward
+
+    def wrap_model(self, forward):
+        import torch
+
+        def checkpointed_forward(module, *args, **kwargs):
+            if torch.is_grad_enabled():
+                kwargs["use_checkpoint"] = True
+            return forward(module, *args, **kwargs)
+
+        return checkpointed_forward
+
+    def install(self):
+        """Patch the RFdiffusion classes; returns an undo callable"""
+        patched = []
+
+        def patch(cls, wrap):
+            patched.append((cls, cls.__dict__["forward"]))
+            cls.forward = wrap(cls.__dict__["forward"])
+
+        if self.chunk_size:
+            for class_name, wrap in [(ATTENTION_CLASS, self.wrap_attention), (FEED_FORWARD_CLASS, self.wrap_feed_forward)]:
+                cls = _import_class(ATTENTION_MODULES, class_name)
+                if cls is None:
+                    print(f"Memory policy: no {class_name} found, not chunking it")
+                else:
+                    patch(cls, wrap)
+        if self.checkpoint_blocks:
+            cls = _import_class(MODEL_MODULES, MODEL_CLASS)
+            if cls is None or "use_checkpoint" not in inspect.signature(cls.__dict__["forward"]).parameters:
+                print(f"Memory policy: no {MODEL_CLASS} with use_checkpoint found, not checkpointing")
+            else:
+                patch(cls, self.wrap_model)
+
+        def uninstall():
+            for cls, forward in reversed(patched):
+                cls.forward = forward
+        return uninstall
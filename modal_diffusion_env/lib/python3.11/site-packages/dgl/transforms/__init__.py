@@ -1,4 +1,6 @@
 """Transform for structures and features"""
+from .frozen_block_knn import *
 from .functional import *
+from .incremental_knn import *
 from .module import *
 from .to_block import *
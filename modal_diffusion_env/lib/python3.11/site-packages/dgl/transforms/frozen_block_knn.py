@@ -0,0 +1,250 @@
+##
+#   Copyright 2019-2021 Contributors
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+"""k-nearest-neighbor graphs of a fixed target plus moving binders"""
+# pylint: disable= no-member, invalid-name
+
+from .. import convert
+from ..base import DGLError
+from .functional import pairwise_squared_distance
+
+try:
+    import torch
+except ImportError:
+    pass
+
+__all__ = ["TargetBinderKNNGraph"]
+
+
+def _squared_distance(x, y):
+    """Squared distances (..., N, M) between the points of x (..., N, D) and y (..., M, D)"""
+    return (x * x).sum(-1)[..., :, None] + (y * y).sum(-1)[..., None, :] - 2 * x @ y.transpose(-1, -2)
+
+
+class TargetBinderKNNGraph(object):
+    r"""KNN graphs of complexes made of one frozen target and per-design binders.
+
+    Each design is the point set ``cat([target_x, binder_x[i]])``: the target
+    nodes come first and do not move, the binder nodes follow. Calling the
+    object returns the batched KNN graph of all designs, with the same edges as
+    :func:`dgl.segmented_knn_batched_graph` on the concatenated coordinates (up
+    to ties between equidistant points), and the same CSC layout.
+
+    The graph construction is split into two blocks:
+
+    * The frozen target block, built once per target by :meth:`set_target`:
+      the k nearest target points of every target node, with their distances
+      and, if ``edge_fn`` is given, edge features. It is shared
+      read-only (expanded, never copied) by all designs and all calls.
+    * The dynamic binder block, recomputed on every call: the target-binder and
+      binder-binder distances only. A target node's k nearest neighbors are
+      always among its frozen target neighbors and the binder nodes, so target
+      rows rank ``k + B`` candidates instead of ``T + B``.
+
+    Per call the cost is :math:`O(G (T + B) B + G T (k + B))` for G designs of
+    B binder nodes, instead of :math:`O(G (T + B)^2)`, which matters when the
+    target is much larger than the binder. Only the PyTorch backend and the
+    Euclidean distance are supported.
+
+    This class exists only in this repository's copy of DGL. The design worker
+    image installs the stock DGL 2.0.0 wheel and RFdiffusion builds its own
+    graphs, so it is not used on the workers.
+
+    Parameters
+    ----------
+    k : int
+        The number of nearest neighbors per node.
+    exclude_self : bool, optional
+        If True, a node is not counted as one of its own k neighbors and the
+        graph has no self loops. (default: False)
+    edge_fn : callable, optional
+        Maps edge displacements ``x[dst] - x[src]`` of shape (E, 3) to edge
+        features of shape (E, F), e.g. :class:`e3nn.o3.EdgeFeatures`. The
+        features of target-target edges are computed once by
+        :meth:`set_target`; on every call only the edges touching a binder
+        node go through ``edge_fn``. (default: None)
+
+    Examples
+    --------
+
+    >>> import dgl
+    >>> import torch
+    >>> knn = dgl.TargetBinderKNNGraph(16, exclude_self=True)
+    >>> knn.set_target(torch.randn(300, 3) * 10)
+    >>> binders = torch.randn(8, 60, 3) * 10      # 8 designs of 60 residues
+    >>> g = knn(binders, rel_pos="rel_pos", distance="d")
+    >>> g.batch_size, g.num_nodes(), g.edata["rel_pos"].shape
+    (8, 2880, torch.Size([46080, 3]))
+    """
+
+    def __init__(self, k, exclude_self=False, edge_fn=None):
+        if k <= 0:
+            raise DGLError("Invalid k value. expect k > 0, got k = {}".format(k))
+        self.k = k
+        self.exclude_self = exclude_self
+        self.edge_fn = edge_fn
+        self.num_target_builds = 0
+        self._target_x = None
+        self._target_nbr = None
+        self._target_d = None
+        self._target_feat = None
+
+    @property
+    def num_target_nodes(self):
+        """The number of target nodes, or 0 before :meth:`set_target`."""
+        return 0 if self._target_x is None else self._target_x.shape[0]
+
+    def set_target(self, target_x):
+        """Build the frozen target block for the target coordinates ``target_x`` (T, D)."""
+        if target_x.dim() != 2:
+            raise DGLError("Expect 2D target coordinates, got {}D".format(target_x.dim()))
+        target_x = target_x.detach()
+        n = target_x.shape[0]
+        kt = min(self.k, n - 1 if self.exclude_self else n)
+        if kt <= 0:
+            raise DGLError("Need at least {} target points, got {}".format(2 if self.exclude_self else 1, n))
+
+        d = pairwise_squared_distance(target_x[None])[0]
+        if self.exclude_self:
+            d.fill_diagonal_(float("inf"))
+        nbr_d, nbr = torch.topk(d, kt, dim=1, largest=False)
+
+        self._target_x = target_x.clone()
+        self._target_nbr = nbr
+        self._target_d = nbr_d
+        if self.edge_fn is not None:
+            rel = (target_x[:, None, :] - target_x[nbr]).reshape(n * kt, -1)
+            self._target_feat = self.edge_fn(rel).reshape(n, kt, -1)
+        self.num_target_builds += 1
+
+    def _neighbors(self, binder_x):
+        """(G, T + B, k) neighbor indices local to each design, and for the target
+        rows the (G, T, k) positions of the selected candidates (< kt: frozen)"""
+        target_x = self._target_x
+        num_designs, num_binder = binder_x.shape[0], binder_x.shape[1]
+        n_target, kt = self._target_nbr.shape
+        n = n_target + num_binder
+
+        d_tb = _squared_distance(target_x, binder_x)  # (G, T, B)
+
+        # target rows: frozen target neighbors plus every binder node
+        cand_d = torch.cat([self._target_d.expand(num_designs, -1, -1), d_tb], dim=2)
+        cand_pos = torch.topk(cand_d, self.k, dim=2, largest=False).indices
+        binder_ids = torch.arange(n_target, n, device=binder_x.device)
+        cand = torch.cat([self._target_nbr, binder_ids.expand(n_target, -1)], dim=1)
+        target_src = torch.gather(cand.expand(num_designs, -1, -1), 2, cand_pos)
+
+        # binder rows: against all points of the design
+        d_bb = _squared_distance(binder_x, binder_x)
+        if self.exclude_self:
+            d_bb.diagonal(dim1=1, dim2=2).fill_(float("inf"))
+        d_b = torch.cat([d_tb.transpose(1, 2), d_bb], dim=2)
+        binder_src = torch.topk(d_b, self.k, dim=2, largest=False).indices
+
+        return torch.cat([target_src, binder_src], dim=1), cand_pos
+
+    def __call__(self, binder_x, target_x=None, ndata=None, rel_pos=None, distance=None, edge_feat=None):
+        r"""Return the batched KNN graph of the complexes of the target with each binder.
+
+        Parameters
+        ----------
+        binder_x : Tensor
+            Binder coordinates, (B, D) for one design or (G, B, D) for G designs.
+        target_x : Tensor, optional
+            Target coordinates (T, D). The frozen block is rebuilt only when
+            they differ from the current target. (default: None, keep it)
+        ndata : dict[str, Tensor], optional
+            Node features to attach, each with one row per node of the
+            batched graph. (default: None)
+        rel_pos, distance : str, optional
+            As in :func:`dgl.segmented_knn_batched_graph`. (default: None)
+        edge_feat : str, optional
+            If given, store the ``edge_fn`` features of every edge in
+            ``edata[edge_feat]``. (default: None)
+
+        Returns
+        -------
+        DGLGraph
+            The batched graph of the G designs, each with the T target nodes
+            followed by the B binder nodes.
+        """
+        if target_x is not None and (
+            self._target_x is None
+            or target_x.shape != self._target_x.shape
+            or target_x.device != self._target_x.device
+            or not torch.equal(target_x.detach(), self._target_x)
+        ):
+            self.set_target(target_x)
+        if self._target_x is None:
+            raise DGLError("No target: call set_target or pass target_x")
+        if edge_feat is not None and self.edge_fn is None:
+            raise DGLError("edge_feat needs an edge_fn")
+        if binder_x.dim() == 2:
+            binder_x = binder_x[None]
+        if binder_x.dim() != 3:
+            raise DGLError("Expect 2D or 3D binder coordinates, got {}D".format(binder_x.dim()))
+        binder_x = binder_x.to(self._target_x.dtype)
+
+        num_designs, num_binder = binder_x.shape[0], binder_x.shape[1]
+        n_target, kt = self._target_nbr.shape
+        n = n_target + num_binder
+        k = self.k
+        if k > n - (1 if self.exclude_self else 0):
+            raise DGLError(
+                "'k' should be less than the number of points in a design, "
+                "got k = {} for {} points".format(k, n)
+            )
+
+        src, cand_pos = self._neighbors(binder_x.detach())
+        device = binder_x.device
+        num_points = num_designs * n
+        offsets = torch.arange(0, num_points, n, device=device)
+        indptr = torch.arange(0, num_points * k + 1, k, device=device)
+        g = convert.graph(
+            ("csc", (indptr, (src + offsets[:, None, None]).reshape(-1), indptr.new_empty(0))),
+            num_nodes=num_points,
+        )
+        g.set_batch_num_nodes(torch.full((num_designs,), n, dtype=torch.int64, device=device))
+        g.set_batch_num_edges(torch.full((num_designs,), n * k, dtype=torch.int64, device=device))
+
+        if ndata is not None:
+            for name, feat in ndata.items():
+                g.ndata[name] = feat
+        if rel_pos is None and distance is None and edge_feat is None:
+            return g
+
+        x = torch.cat([self._target_x.expand(num_designs, -1, -1), binder_x], dim=1)
+        neighbors = torch.gather(x, 1, src.reshape(num_designs, n * k, 1).expand(-1, -1, x.shape[2]))
+        displacement = (x[:, :, None, :] - neighbors.reshape(num_designs, n, k, -1)).reshape(num_points * k, -1)
+        if rel_pos is not None:
+            g.edata[rel_pos] = displacement
+        if distance is not None:
+            g.edata[distance] = displacement.norm(dim=1, keepdim=True)
+        if edge_feat is not None:
+            # target-target edges come from the frozen block, only the others go through edge_fn
+            frozen = cand_pos < kt  # (G, T, k)
+            frozen_pos = cand_pos.clamp(max=kt - 1)
+            frozen_feat = torch.gather(
+                self._target_feat.expand(num_designs, -1, -1, -1), 2,
+                frozen_pos[..., None].expand(-1, -1, -1, self._target_feat.shape[2]),
+            )
+            new = torch.ones(num_designs, n, k, dtype=torch.bool, device=device)
+            new[:, :n_target] = ~frozen
+            new = new.reshape(-1)
+            feat = displacement.new_empty(num_points * k, self._target_feat.shape[2])
+            feat.view(num_designs, n, k, -1)[:, :n_target] = frozen_feat
+            feat[new] = self.edge_fn(displacement[new])
+            g.edata[edge_feat] = feat
+        return g
@@ -64,6 +64,7 @@ __all__ = [
     "laplacian_lambda_max",
     "knn_graph",
     "segmented_knn_graph",
+    "segmented_knn_batched_graph",
     "add_edges",
     "add_nodes",
     "remove_edges",
@@ -539,6 +540,208 @@ def _segmented_knn_graph_blas(x, k, segs, dist="euclidean"):
     return convert.graph((F.reshape(src, (-1,)), F.reshape(dst, (-1,))))
 
 
+def segmented_knn_batched_graph(
+    x,
+    k,
+    segs,
+    algorithm="bruteforce-blas",
+    dist="euclidean",
+    exclude_self=False,
+    ndata=None,
+    rel_pos=None,
+    distance=None,
+):
+    r"""Construct the KNN graphs of multiple point sets directly as one batched
+    graph, together with its node and edge features.
+
+    The result has the same edges as :func:`dgl.segmented_knn_graph` (up to ties
+    between equidistant points), but is built for feeding many point sets of
+    different sizes through one forward pass:
+
+    * Every node has exactly k in-edges, so the graph is created straight from
+      its CSC representation: one (N * k) index buffer written by the neighbor
+      search, no COO-to-CSC conversion, no per-set intermediate graphs and no
+      :func:`dgl.batch` afterwards.
+    * With 'bruteforce-blas' all point sets are searched in a single batched
+      distance computation over the sets padded to the largest one, instead of
+      one distance matrix and top-k call per set.
+    * Node features in :attr:`ndata` are attached without copies, and the
+      requested edge features are each computed once for all edges.
+
+    The batch information (:meth:`DGLGraph.batch_num_nodes` and
+    :meth:`DGLGraph.batch_num_edges`) is set, so :func:`dgl.unbatch` and the
+    readout functions work as on a graph from :func:`dgl.batch`. Only the
+    PyTorch backend is supported.
+
+    This function exists only in this repository's copy of DGL. The design
+    worker image installs the stock DGL 2.0.0 wheel and RFdiffusion builds its
+    own graphs, so it is not used on the workers.
+
+    Parameters
+    ----------
+    x : Tensor
+        Coordinates/features of points. Must be 2D. It can be either on CPU or GPU.
+    k : int
+        The number of nearest neighbors per node. It is reduced, with a warning,
+        when a point set is too small.
+    segs : list[int] or Tensor
+        Number of points in each point set. The numbers in :attr:`segs`
+        must sum up to the number of rows in :attr:`x`.
+    algorithm : str, optional
+        Algorithm used to compute the k-nearest neighbors.
+
+        * 'bruteforce-blas' computes the distances of all point sets in one
+          batched matrix multiplication and selects the neighbors with a single
+          topk. Memory is :math:`O(B L^2)` for :math:`B` point sets of at most
+          :math:`L` points, so it suits many sets of similar size.
+
+        * 'nn-descent' is the approximate method of :func:`dgl.segmented_knn_graph`.
+
+        (default: 'bruteforce-blas')
+    dist : str, optional
+        The distance metric used to select neighbors, 'euclidean' or 'cosine'.
+        (default: 'euclidean')
+    exclude_self : bool, optional
+        If True, a node is not counted as one of its own k neighbors and the
+        graph has no self loops. (default: False)
+    ndata : dict[str, Tensor], optional
+        Node features to attach, each with one row per point. (default: None)
+    rel_pos : str, optional
+        If given, store the displacement ``x[dst] - x[src]`` of every edge in
+        ``edata[rel_pos]``. (default: None)
+    distance : str, optional
+        If given, store the Euclidean length of every edge, of shape (E, 1), in
+        ``edata[distance]``. (default: None)
+
+    Returns
+    -------
+    DGLGraph
+        The batched graph. The node IDs are in the same order as :attr:`x`, and
+        the in-edges of each node are consecutive edge IDs.
+
+    Examples
+    --------
+
+    The following examples use PyTorch backend.
+
+    >>> import dgl
+    >>> import torch
+    >>> x1 = torch.tensor([[0.0, 0.5, 0.2],
+    ...                    [0.1, 0.3, 0.2],
+    ...                    [0.4, 0.2, 0.2]])
+    >>> x2 = torch.tensor([[0.3, 0.2, 0.1],
+    ...                    [0.5, 0.2, 0.3],
+    ...                    [0.1, 0.1, 0.2],
+    ...                    [0.6, 0.3, 0.3]])
+    >>> x = torch.cat([x1, x2], dim=0)
+    >>> g = dgl.segmented_knn_batched_graph(
+    ...     x, 2, [3, 4], ndata={"pos": x}, rel_pos="rel_pos", distance="d")
+    >>> g.batch_num_edges()
+    tensor([6, 8])
+    >>> g.edata["rel_pos"].shape, g.edata["d"].shape
+    (torch.Size([14, 3]), torch.Size([14, 1]))
+    """
+    if algorithm not in ("bruteforce-blas", "nn-descent"):
+        raise DGLError(
+            "Unsupported algorithm {}, expect 'bruteforce-blas' or "
+            "'nn-descent'".format(algorithm)
+        )
+    if k <= 0:
+        raise DGLError("Invalid k value. expect k > 0, got k = {}".format(k))
+    num_points = F.shape(x)[0]
+    if num_points == 0:
+        raise DGLError("Find empty point set")
+
+    device = x.device
+    segs = th.as_tensor(segs, dtype=th.int64, device=device)
+    if int(segs.sum()) != num_points:
+        raise DGLError(
+            "The numbers in segs must sum up to the number of points, "
+            "got {} and {}".format(int(segs.sum()), num_points)
+        )
+    # if any segment is too small for k, reduce k for all segments
+    max_k = int(segs.min()) - (1 if exclude_self else 0)
+    if max_k <= 0:
+        raise DGLError("Find a point set with too few points for any neighbor")
+    if k > max_k:
+        dgl_warning(
+            "'k' should be less than or equal to the number of points in 'x'"
+            "expect k <= {0}, got k = {1}, use k = {0}".format(max_k, k)
+        )
+        k = max_k
+
+    # if use cosine distance, normalize input points first
+    # thus we can use euclidean distance to find knn equivalently.
+    points = x
+    if dist == "cosine":
+        points = x / (x.norm(dim=1, keepdim=True) + 1e-5)
+
+    if algorithm == "bruteforce-blas":
+        src = _padded_segmented_knn_blas(points, k, segs, exclude_self)
+    else:
+        src = _nndescent_knn_src(points, k, segs, exclude_self)
+
+    # in-edges of node i are edges i * k ... i * k + k - 1
+    indptr = th.arange(0, num_points * k + 1, k, device=device)
+    g = convert.graph(
+        ("csc", (indptr, src.reshape(-1), indptr.new_empty(0))),
+        num_nodes=num_points,
+    )
+    g.set_batch_num_nodes(segs)
+    g.set_batch_num_edges(segs * k)
+
+    if ndata is not None:
+        for name, feat in ndata.items():
+            g.ndata[name] = feat
+    if rel_pos is not None or distance is not None:
+        displacement = (x[:, None, :] - x[src]).reshape(num_points * k, -1)
+        if rel_pos is not None:
+            g.edata[rel_pos] = displacement
+        if distance is not None:
+            g.edata[distance] = displacement.norm(dim=1, keepdim=True)
+    return g
+
+
+def _padded_segmented_knn_blas(x, k, segs, exclude_self):
+    r"""Return the (N, k) neighbor indices of every point within its segment,
+    using one distance computation over all segments padded to equal length."""
+    num_points = x.shape[0]
+    device = x.device
+    max_len = int(segs.max())
+    offset = th.cumsum(segs, 0) - segs
+    seg_id = th.repeat_interleave(th.arange(segs.shape[0], device=device), segs)
+    local = th.arange(num_points, device=device) - offset[seg_id]
+
+    padded = x.new_zeros((segs.shape[0], max_len, x.shape[1]))
+    padded[seg_id, local] = x
+    d = pairwise_squared_distance(padded)
+    padding = th.arange(max_len, device=device)[None] >= segs[:, None]
+    d.masked_fill_(padding[:, None, :], float("inf"))
+    # keep the rows of real points only; (N, max_len)
+    d = d[seg_id, local]
+    if exclude_self:
+        d[th.arange(num_points, device=device), local] = float("inf")
+    nearest = th.topk(d, k, dim=1, largest=False).indices
+    return nearest + offset[seg_id][:, None]
+
+
+def _nndescent_knn_src(x, k, segs, exclude_self):
+    r"""Return the (N, k) neighbor indices of every point within its segment,
+    found with NN-descent."""
+    num_points = x.shape[0]
+    kk = k + 1 if exclude_self else k
+    out = _nndescent_knn_graph(x, kk, segs)
+    order = th.argsort(out[0], stable=True)
+    src = out[1][order].reshape(num_points, kk)
+    if exclude_self:
+        keep = src != th.arange(num_points, device=src.device)[:, None]
+        # with more than k + 1 coincident points a node may have no self edge;
+        # its surplus edge has length zero, so drop an arbitrary one
+        keep[keep.all(1), -1] = False
+        src = src[keep].reshape(num_points, k)
+    return src
+
+
 def _nndescent_knn_graph(
     x,
     k,
@@ -28,7 +28,7 @@ from ._rotation import (
     angles_to_xyz,
     xyz_to_angles,
 )
-from ._wigner import wigner_D, wigner_3j
+from ._wigner import wigner_D, wigner_3j, precompute_wigner_3j, clear_wigner_3j_cache
 from ._irreps import Irrep, Irreps
 from ._tensor_product import (
     Instruction,
@@ -37,7 +37,8 @@ from ._tensor_product import (
     ElementwiseTensorProduct,
     FullTensorProduct,
 )
-from ._spherical_harmonics import SphericalHarmonics, spherical_harmonics
+from ._spherical_harmonics import SphericalHarmonics, spherical_harmonics, clear_spherical_harmonics_cache
+from ._edge_features import EdgeFeatures
 from ._angular_spherical_harmonics import (
     SphericalHarmonicsAlphaBeta,
     spherical_harmonics_alpha_beta,
@@ -88,6 +89,8 @@ __all__ = [
     "xyz_to_angles",
     "wigner_D",
     "wigner_3j",
+    "precompute_wigner_3j",
+    "clear_wigner_3j_cache",
     "Irrep",
     "Irreps",
     "Instruction",
@@ -97,6 +100,8 @@ __all__ = [
     "FullTensorProduct",
     "SphericalHarmonics",
     "spherical_harmonics",
+    "clear_spherical_harmonics_cache",
+    "EdgeFeatures",
     "SphericalHarmonicsAlphaBeta",
     "spherical_harmonics_alpha_beta",
     "spherical_harmonics_alpha",
@@ -0,0 +1,219 @@
+r"""Spherical harmonics and radial basis of edge vectors in one pass
+"""
+from typing import Optional
+
+import math
+
+import torch
+
+from e3nn import o3
+from e3nn.util.jit import compile_mode
+from ._spherical_harmonics import _spherical_harmonics
+
+
+@compile_mode('script')
+class EdgeFeatures(torch.nn.Module):
+    r"""Edge featurization: spherical harmonics of the edge directions and a radial basis of the edge lengths
+
+    Equivalent to
+
+    .. code-block:: python
+
+        torch.cat([
+            o3.spherical_harmonics(range(lmax + 1), edge_vec, True, normalization),
+            soft_one_hot_linspace(edge_vec.norm(dim=-1), start, end, number, basis, cutoff),
+        ], dim=-1)
+
+    but the edge vectors are read once (one norm serves both parts) and both
+    parts are written directly into a single ``(num_edges, dim)`` output, which
+    can be preallocated and reused across calls. For ``lmax <= 3`` the
+    harmonics are written column by column, so the only temporaries are of
+    shape ``(num_edges,)``, and when no gradient is needed the radial basis is
+    computed in place in its slice of the output.
+
+    Parameters
+    ----------
+    lmax : int
+        the harmonics of degree ``0`` to ``lmax`` are computed
+
+    start, end, number, basis, cutoff
+        as in `e3nn.math.soft_one_hot_linspace`, ``basis`` being one of
+        ``'gaussian'``, ``'cosine'``, ``'fourier'`` or ``'bessel'``
+
+    normalization : {'integral', 'component', 'norm'}
+        normalization of the spherical harmonics, see `spherical_harmonics`
+
+    Examples
+    --------
+
+    >>> featurize = EdgeFeatures(2, 0.0, 20.0, 16, 'gaussian', cutoff=False)
+    >>> edge_vec = torch.randn(100, 3)
+    >>> out = torch.empty(100, featurize.dim)
+    >>> featurize(edge_vec, out).shape
+    torch.Size([100, 25])
+    """
+    lmax: int
+    sh_dim: int
+    number: int
+    dim: int
+    start: float
+    end: float
+    step: float
+    basis: str
+    cutoff: bool
+    normalization: str
+
+    def __init__(
+        self,
+        lmax: int,
+        start: float,
+        end: float,
+        number: int,
+        basis: str = 'gaussian',
+        cutoff: bool = False,
+        normalization: str = 'integral',
+    ):
+        super().__init__()
+        assert normalization in ['integral', 'component', 'norm']
+        if basis not in ['gaussian', 'cosine', 'fourier', 'bessel']:
+            raise ValueError(f"basis=\"{basis}\" is not supported by EdgeFeatures")
+        if lmax > 11:
+            raise NotImplementedError('spherical_harmonics maximum l implemented is 11, send us an email to ask for more')
+
+        self.lmax = lmax
+        self.sh_dim = (lmax + 1) ** 2
+        self.number = number
+        self.dim = self.sh_dim + number
+        self.start = float(start)
+        self.end = float(end)
+        self.basis = basis
+        self.cutoff = cutoff
+        self.normalization = normalization
+        self.irreps_in = o3.Irreps("1x1o")
+        self.irreps_out = o3.Irreps.spherical_harmonics(lmax) + o3.Irreps(f"{number}x0e")
+
+        # same grid as soft_one_hot_linspace
+        if cutoff:
+            values = torch.linspace(start, end, number + 2, dtype=torch.float64)
+            self.step = float(values[1] - values[0])
+            values = values[1:-1]
+        else:
+            values = torch.linspace(start, end, number, dtype=torch.float64)
+            self.step = float(values[1] - values[0]) if number > 1 else 1.0
+        if basis == 'fourier':
+            values = torch.arange(1, number + 1) if cutoff else torch.arange(0, number)
+            values = math.pi * values.to(torch.float64)
+        if basis == 'bessel':
+            values = math.pi * torch.arange(1, number + 1, dtype=torch.float64)
+        self.register_buffer('_values', values.to(torch.get_default_dtype()), persistent=False)
+
+        if normalization == 'integral':
+            norm = [math.sqrt(2 * l + 1) / math.sqrt(4 * math.pi) for l in range(lmax + 1) for _ in range(2 * l + 1)]
+        elif normalization == 'component':
+            norm = [math.sqrt(2 * l + 1) for l in range(lmax + 1) for _ in range(2 * l + 1)]
+        else:
+            norm = []
+        self.register_buffer('_norm', torch.tensor(norm, dtype=torch.get_default_dtype()), persistent=False)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(lmax={self.lmax}, {self.number}x {self.basis} on [{self.start}, {self.end}])"
+
+    def _write_sh(self, x: torch.Tensor, y: torch.Tensor, z: torch.Tensor, out: torch.Tensor):
+        lmax = self.lmax
+        if lmax > 3:
+            out[:, :self.sh_dim] = _spherical_harmonics(lmax, x, y, z)
+            return
+
+        # the polynomials of _spherical_harmonics, one column at a time
+        out[:, 0] = 1.0
+        if lmax == 0:
+            return
+        out[:, 1] = x
+        out[:, 2] = y
+        out[:, 3] = z
+        if lmax == 1:
+            return
+        sh_2_0 = math.sqrt(3.0) * x * z
+        sh_2_4 = math.sqrt(3.0) / 2.0 * (z.pow(2) - x.pow(2))
+        y2 = y.pow(2)
+        x2z2 = x.pow(2) + z.pow(2)
+        out[:, 4] = sh_2_0
+        out[:, 5] = math.sqrt(3.0) * x * y
+        out[:, 6] = y2 - 0.5 * x2z2
+        out[:, 7] = math.sqrt(3.0) * y * z
+        out[:, 8] = sh_2_4
+        if lmax == 2:
+            return
+        out[:, 9] = math.sqrt(5.0 / 6.0) * (sh_2_0 * z + sh_2_4 * x)
+        out[:, 10] = math.sqrt(5.0) * sh_2_0 * y
+        out[:, 11] = math.sqrt(3.0 / 8.0) * (4.0 * y2 - x2z2) * x
+        out[:, 12] = 0.5 * y * (2.0 * y2 - 3.0 * x2z2)
+        out[:, 13] = math.sqrt(3.0 / 8.0) * z * (4.0 * y2 - x2z2)
+        out[:, 14] = math.sqrt(5.0) * sh_2_4 * y
+        out[:, 15] = math.sqrt(5.0 / 6.0) * (sh_2_4 * z - sh_2_0 * x)
+
+    def _radial_inplace(self, r: torch.Tensor, rad: torch.Tensor):
+        """Radial basis written into ``rad`` with in-place ops only"""
+        values = self._values.to(dtype=rad.dtype, device=rad.device)
+        if self.basis == 'gaussian' or self.basis == 'cosine':
+            torch.sub(r.unsqueeze(-1), values, out=rad)
+            rad.div_(self.step)
+            if self.basis == 'gaussian':
+                rad.pow_(2).neg_().exp_().div_(1.12)
+            else:
+                inside = rad.abs() < 1
+                rad.mul_(math.pi / 2).cos_().mul_(inside)
+        elif self.basis == 'fourier':
+            x = (r - self.start) / (self.end - self.start)
+            torch.mul(x.unsqueeze(-1), values, out=rad)
+            if self.cutoff:
+                rad.sin_().mul_(((x > 0) & (x < 1)).unsqueeze(-1))
+            else:
+                rad.cos_()
+            rad.div_(math.sqrt(0.25 + self.number / 2))
+        else:
+            x = r - self.start
+            c = self.end - self.start
+            torch.mul(x.unsqueeze(-1), values / c, out=rad)
+            rad.sin_().div_(x.unsqueeze(-1)).mul_(math.sqrt(2 / c))
+            if self.cutoff:
+                rad.mul_(((x / c < 1) & (x > 0)).unsqueeze(-1))
+
+    def _radial(self, r: torch.Tensor) -> torch.Tensor:
+        """Out-of-place radial basis, same values as `_radial_inplace`"""
+        values = self._values.to(dtype=r.dtype, device=r.device)
+        if self.basis == 'gaussian' or self.basis == 'cosine':
+            diff = (r.unsqueeze(-1) - values) / self.step
+            if self.basis == 'gaussian':
+                return diff.pow(2).neg().exp().div(1.12)
+            return torch.cos(math.pi / 2 * diff) * (diff < 1) * (diff > -1)
+        if self.basis == 'fourier':
+            x = ((r - self.start) / (self.end - self.start)).unsqueeze(-1)
+            if self.cutoff:
+                return torch.sin(values * x) / math.sqrt(0.25 + self.number / 2) * (x > 0) * (x < 1)
+            return torch.cos(values * x) / math.sqrt(0.25 + self.number / 2)
+        x = (r - self.start).unsqueeze(-1)
+        c = self.end - self.start
+        out = math.sqrt(2 / c) * torch.sin(values * x / c) / x
+        if self.cutoff:
+            return out * (x / c < 1) * (x > 0)
+        return out
+
+    def forward(self, edge_vec: torch.Tensor, out: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """Featurize ``edge_vec`` of shape ``(num_edges, 3)`` into ``out`` of shape ``(num_edges, dim)``"""
+        with torch.autograd.profiler.record_function('edge_features'):
+            if out is None:
+                out = edge_vec.new_empty((edge_vec.shape[0], self.dim))
+            assert out.shape[0] == edge_vec.shape[0] and out.shape[1] == self.dim, "Incorrect output shape"
+
+            r = edge_vec.norm(p=2, dim=-1)  # TorchScript has no norm(dim=) overload without p
+            unit = edge_vec / r.clamp(min=1e-12).unsqueeze(-1)  # 0's instead of nan for zero-length edges
+            self._write_sh(unit[:, 0], unit[:, 1], unit[:, 2], out)
+            if self.normalization != 'norm':
+                out[:, :self.sh_dim].mul_(self._norm.to(dtype=out.dtype, device=out.device))
+
+            if edge_vec.requires_grad:
+                out[:, self.sh_dim:] = self._radial(r)
+            else:
+                self._radial_inplace(r, out[:, self.sh_dim:])
+            return out
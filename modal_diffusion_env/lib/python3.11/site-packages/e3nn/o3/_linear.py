@@ -94,6 +94,7 @@ class Linear(CodeGenMixin, torch.nn.Module):
     weight_numel: int
     internal_weights: bool
     shared_weights: bool
+    compute_dtype: Optional[torch.dtype]
 
     def __init__(
         self,
@@ -106,6 +107,8 @@ class Linear(CodeGenMixin, torch.nn.Module):
         _optimize_einsums: Optional[bool] = None
     ):
         super().__init__()
+        # dtype the kernel runs in, see `e3nn.util.precision`; None follows the inputs
+        self.compute_dtype = None
 
         # == Process arguments ==
         if shared_weights is False and internal_weights is None:
@@ -240,6 +243,10 @@ class Linear(CodeGenMixin, torch.nn.Module):
             if self.bias_numel > 0 and not self.internal_weights:
                 raise RuntimeError("Biases must be provided when internal_weights = False")
             bias = self.bias
+        compute_dtype = self.compute_dtype
+        if compute_dtype is not None:
+            out = self._compiled_main(features.to(compute_dtype), weight.to(compute_dtype), bias.to(compute_dtype))
+            return out.to(features.dtype)
         return self._compiled_main(features, weight, bias)
 
     def weight_view_for_instruction(
@@ -3,6 +3,7 @@ import torch
 from torch import fx
 from e3nn import o3
 from e3nn.math import group
+from e3nn.o3._wigner import _wigner_3j_cached
 from e3nn.util import explicit_default_types
 from e3nn.util.jit import compile_mode
 
@@ -39,11 +40,11 @@ def _wigner_nj(*irrepss, normalization='component', filter_ir_mid=None, dtype=No
                 if filter_ir_mid is not None and ir_out not in filter_ir_mid:
                     continue
 
-                C = o3.wigner_3j(ir_out.l, ir_left.l, ir.l, dtype=dtype, device=device)
+                C = _wigner_3j_cached(ir_out.l, ir_left.l, ir.l, dtype=dtype, device=device)
                 if normalization == 'component':
-                    C *= ir_out.dim**0.5
+                    C = C * ir_out.dim**0.5
                 if normalization == 'norm':
-                    C *= ir_left.dim**0.5 * ir.dim**0.5
+                    C = C * ir_left.dim**0.5 * ir.dim**0.5
 
                 C = torch.einsum('jk,ijl->ikl', C_left.flatten(1), C)
                 C = C.reshape(ir_out.dim, *(irreps.dim for irreps in irrepss_left), ir.dim)
@@ -1,6 +1,6 @@
 r"""Spherical Harmonics as polynomials of x, y, z
 """
-from typing import Union, List, Any
+from typing import Union, List, Any, Optional
 
 import math
 
@@ -24,6 +24,7 @@ class SphericalHarmonics(torch.nn.Module):
     _lmax: int
     _is_range_lmax: bool
     _prof_str: str
+    compute_dtype: Optional[torch.dtype]
 
     def __init__(
         self,
@@ -35,6 +36,8 @@ class SphericalHarmonics(torch.nn.Module):
         super().__init__()
         self.normalize = normalize
         self.normalization = normalization
+        # dtype the polynomials are evaluated in, see `e3nn.util.precision`; None follows the input
+        self.compute_dtype = None
         assert normalization in ['integral', 'component', 'norm']
 
         if isinstance(irreps_out, str):
@@ -74,11 +77,26 @@ class SphericalHarmonics(torch.nn.Module):
         if self._lmax > _lmax:
             raise NotImplementedError(f'spherical_harmonics maximum l implemented is {_lmax}, send us an email to ask for more')
 
+        # output normalization, built once and moved along with the module
+        if normalization == 'integral':
+            norm = [math.sqrt(2 * l + 1) / math.sqrt(4 * math.pi) for l in ls for _ in range(2 * l + 1)]
+        elif normalization == 'component':
+            norm = [math.sqrt(2 * l + 1) for l in ls for _ in range(2 * l + 1)]
+        else:
+            norm = []
+        self.register_buffer('_norm', torch.tensor(norm, dtype=torch.get_default_dtype()), persistent=False)
+
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         with torch.autograd.profiler.record_function(self._prof_str):
             if self.normalize:
                 x = torch.nn.functional.normalize(x, dim=-1)  # forward 0's instead of nan for zero-radius
 
+            # the norm above is taken in the input precision; only the polynomials run in compute_dtype
+            out_dtype = x.dtype
+            compute_dtype = self.compute_dtype
+            if compute_dtype is not None:
+                x = x.to(compute_dtype)
+
             sh = _spherical_harmonics(self._lmax, x[..., 0], x[..., 1], x[..., 2])
 
             if not self._is_range_lmax:
@@ -87,18 +105,14 @@ class SphericalHarmonics(torch.nn.Module):
                     for l in self._ls_list
                 ], dim=-1)
 
-            if self.normalization == 'integral':
-                sh.mul_(torch.cat([
-                    (math.sqrt(2 * l + 1) / math.sqrt(4 * math.pi)) * torch.ones(2 * l + 1, dtype=sh.dtype, device=sh.device)
-                    for l in self._ls_list
-                ]))
-            elif self.normalization == 'component':
-                sh.mul_(torch.cat([
-                    math.sqrt(2 * l + 1) * torch.ones(2 * l + 1, dtype=sh.dtype, device=sh.device)
-                    for l in self._ls_list
-                ]))
+            if self.normalization != 'norm':
+                sh.mul_(self._norm.to(dtype=sh.dtype, device=sh.device))
+
+            return sh.to(out_dtype)
 
-            return sh
+
+_SH_cache = {}
+# modules used by spherical_harmonics, (l, normalize, normalization, dtype, device) -> SphericalHarmonics
 
 
 def spherical_harmonics(
@@ -176,10 +190,43 @@ def spherical_harmonics(
     wigner_3j
 
     """
-    sh = SphericalHarmonics(l, normalize, normalization)
+    key = (tuple(l) if isinstance(l, list) else l, normalize, normalization, x.dtype, x.device)
+    sh = _SH_cache.get(key)
+    if sh is None:
+        # same reason as in wigner_3j: keep the buffers usable by autograd
+        with torch.inference_mode(False):
+            sh = SphericalHarmonics(l, normalize, normalization).to(dtype=x.dtype, device=x.device)
+        _SH_cache[key] = sh
     return sh(x)
 
 
+def clear_spherical_harmonics_cache(device=None):
+    r"""Evict the modules memoized by `spherical_harmonics`
+
+    Parameters
+    ----------
+    device : torch.device or None
+        only evict the modules on this device. If ``None`` evict all of them.
+
+    Returns
+    -------
+    int
+        the number of evicted modules
+    """
+    if device is None:
+        n = len(_SH_cache)
+        _SH_cache.clear()
+        return n
+    device = torch.device(device)
+    keys = [
+        key for key in _SH_cache
+        if key[4].type == device.type and device.index in (None, key[4].index)
+    ]
+    for key in keys:
+        del _SH_cache[key]
+    return len(keys)
+
+
 @torch.jit.script
 def _spherical_harmonics(lmax: int, x: torch.Tensor, y: torch.Tensor, z: torch.Tensor) -> torch.Tensor:
     sh_0_0 = torch.ones_like(x)
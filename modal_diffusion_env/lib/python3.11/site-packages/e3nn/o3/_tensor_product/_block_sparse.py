@@ -0,0 +1,137 @@
+from math import sqrt
+from typing import Dict, List
+
+import torch
+from e3nn import o3
+from e3nn.util import prod
+
+from .._wigner import _wigner_3j_cached
+from ._instruction import Instruction
+
+
+def _path_indices(mode: str, mul1: int, mul2: int, mul_out: int, has_weight: bool):
+    r"""Multiplicity indices ``(u, v, w, weight)`` of every path of one instruction
+
+    ``u``, ``v``, ``w`` index the multiplicities of ``in1``, ``in2`` and ``out``;
+    ``weight`` indexes the instruction's flattened weight (``None`` if unweighted).
+    """
+    if mode == 'uvw':
+        u, v, w = torch.meshgrid(torch.arange(mul1), torch.arange(mul2), torch.arange(mul_out), indexing='ij')
+        u, v, w = u.reshape(-1), v.reshape(-1), w.reshape(-1)
+        return u, v, w, (u * mul2 + v) * mul_out + w
+
+    if mode == 'uuw':
+        if has_weight:
+            u, w = torch.meshgrid(torch.arange(mul1), torch.arange(mul_out), indexing='ij')
+            u, w = u.reshape(-1), w.reshape(-1)
+            return u, u, w, u * mul_out + w
+        # summed over u into a single output multiplicity
+        u = torch.arange(mul1)
+        return u, u, torch.zeros_like(u), None
+
+    if mode == 'uuu':
+        u = torch.arange(mul1)
+        return u, u, u, u
+
+    u, v = torch.meshgrid(torch.arange(mul1), torch.arange(mul2), indexing='ij')
+    u, v = u.reshape(-1), v.reshape(-1)
+    weight = u * mul2 + v if has_weight else None
+    if mode == 'uvu':
+        return u, v, u, weight
+    if mode == 'uvv':
+        return u, v, v, weight
+    assert mode == 'uvuv'
+    return u, v, u * mul2 + v, weight
+
+
+def block_sparse_index_maps(
+    irreps_in1: o3.Irreps,
+    in1_var: List[float],
+    irreps_in2: o3.Irreps,
+    in2_var: List[float],
+    irreps_out: o3.Irreps,
+    out_var: List[float],
+    instructions: List[Instruction],
+    normalization: str = 'component',
+) -> Dict[str, torch.Tensor]:
+    r"""Index maps packing all instructions of a tensor product into one contraction
+
+    Every nonzero of the (normalized) Wigner symbols of every path becomes one
+    entry ``(row, col, value)`` of a sparse operator: ``row`` is
+    ``pair * irreps_out.dim + k`` where ``pair`` indexes the distinct input
+    component pairs ``(pair_a, pair_b)`` that take part in the product and ``k``
+    is the output component, ``col`` the position in the flat weight
+    (``weight_numel`` for unweighted paths, a constant ``1``) and ``value``
+    carries the Wigner symbol and the path normalization. With shared weights
+    the tensor product is then
+
+    .. code-block:: python
+
+        op = zeros(num_pairs * dim_out).index_add(0, rows, values * cat([weight, [1]])[cols])
+        out = (x1[:, pair_a] * x2[:, pair_b]) @ op.view(num_pairs, dim_out)
+
+    The normalization is the same as the one of ``codegen_tensor_product``.
+
+    Returns
+    -------
+    dict
+        ``pair_a``, ``pair_b``, ``rows``, ``cols`` (int64) and ``values`` (float64)
+    """
+    instructions = [ins for ins in instructions if 0 not in ins.path_shape]
+    weight_numel = sum(prod(ins.path_shape) for ins in instructions if ins.has_weight)
+    dim_in2 = irreps_in2.dim
+    dim_out = irreps_out.dim
+    slices1, slices2, slices_out = irreps_in1.slices(), irreps_in2.slices(), irreps_out.slices()
+
+    a_list, b_list, o_list, col_list, val_list = [], [], [], [], []
+    flat_weight_index = 0
+    for ins in instructions:
+        mul_ir_in1 = irreps_in1[ins.i_in1]
+        mul_ir_in2 = irreps_in2[ins.i_in2]
+        mul_ir_out = irreps_out[ins.i_out]
+
+        alpha = ins.path_weight * out_var[ins.i_out] / sum(in1_var[i.i_in1] * in2_var[i.i_in2] for i in instructions if i.i_out == ins.i_out)
+        alpha = sqrt(alpha / {
+            'uvw': (mul_ir_in1.mul * mul_ir_in2.mul),
+            'uvu': mul_ir_in2.mul,
+            'uvv': mul_ir_in1.mul,
+            'uuw': mul_ir_in1.mul,
+            'uuu': 1,
+            'uvuv': 1,
+        }[ins.connection_mode])
+
+        l1, l2, l_out = mul_ir_in1.ir.l, mul_ir_in2.ir.l, mul_ir_out.ir.l
+        wig = _wigner_3j_cached(l1, l2, l_out, dtype=torch.float64, device='cpu')
+        if normalization == 'component':
+            wig = wig * (2 * l_out + 1) ** 0.5
+        if normalization == 'norm':
+            wig = wig * (2 * l1 + 1) ** 0.5 * (2 * l2 + 1) ** 0.5
+        i, j, k = (wig.abs() > 1e-10).nonzero(as_tuple=True)
+        coef = alpha * wig[i, j, k]
+
+        u, v, w, weight = _path_indices(ins.connection_mode, mul_ir_in1.mul, mul_ir_in2.mul, mul_ir_out.mul, ins.has_weight)
+        d1, d2, d_out = mul_ir_in1.ir.dim, mul_ir_in2.ir.dim, mul_ir_out.ir.dim
+        a_list.append((slices1[ins.i_in1].start + u[:, None] * d1 + i[None]).reshape(-1))
+        b_list.append((slices2[ins.i_in2].start + v[:, None] * d2 + j[None]).reshape(-1))
+        o_list.append((slices_out[ins.i_out].start + w[:, None] * d_out + k[None]).reshape(-1))
+        val_list.append(coef[None].expand(len(u), -1).reshape(-1))
+        if ins.has_weight:
+            col = flat_weight_index + weight
+            flat_weight_index += prod(ins.path_shape)
+        else:
+            col = torch.full_like(u, weight_numel)
+        col_list.append(col[:, None].expand(-1, len(i)).reshape(-1))
+
+    if len(a_list) == 0:
+        empty = torch.zeros(0, dtype=torch.int64)
+        return dict(pair_a=empty, pair_b=empty, rows=empty, cols=empty, values=torch.zeros(0, dtype=torch.float64))
+
+    a, b, o = torch.cat(a_list), torch.cat(b_list), torch.cat(o_list)
+    pairs, pair_index = torch.unique(a * dim_in2 + b, return_inverse=True)
+    return dict(
+        pair_a=pairs // dim_in2,
+        pair_b=pairs % dim_in2,
+        rows=pair_index * dim_out + o,
+        cols=torch.cat(col_list),
+        values=torch.cat(val_list),
+    )
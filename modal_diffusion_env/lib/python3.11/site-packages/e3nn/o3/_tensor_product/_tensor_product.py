@@ -8,9 +8,11 @@ from e3nn import o3
 from e3nn.util.jit import compile_mode
 from e3nn.util.codegen import CodeGenMixin
 from e3nn.util import prod
+from .._wigner import _wigner_3j_cached
 
 from ._instruction import Instruction
 from ._codegen import codegen_tensor_product
+from ._block_sparse import block_sparse_index_maps
 
 
 @compile_mode('script')
@@ -65,6 +67,14 @@ class TensorProduct(CodeGenMixin, torch.nn.Module):
         where here :math:`i` denotes a *batch-like* index.
         ``shared_weights`` cannot be `False` if ``internal_weights`` is `True`.
 
+    _backend : {'codegen', 'block_sparse'}
+        How the product is evaluated. ``'codegen'`` (default) runs one einsum per
+        instruction. ``'block_sparse'`` packs all instructions into a single
+        contraction with index maps precomputed at construction: the weights are
+        scattered into a ``(num_pairs, irreps_out.dim)`` operator and applied to
+        the products of the input component pairs with one matrix product. It is
+        faster for many low-multiplicity irreps and requires ``shared_weights``.
+
     Examples
     --------
     Create a module that computes elementwise the cross-product of 16 vectors with 16 vectors :math:`z_u = x_u \wedge y_u`
@@ -162,6 +172,8 @@ class TensorProduct(CodeGenMixin, torch.nn.Module):
     """
     _specialized_code: bool
     _optimize_einsums: bool
+    _backend: str
+    _num_pairs: int
     _profiling_str: str
     normalization: str
     shared_weights: bool
@@ -172,6 +184,8 @@ class TensorProduct(CodeGenMixin, torch.nn.Module):
     out_var: List[float]
     _in1_dim: int
     _in2_dim: int
+    _out_dim: int
+    compute_dtype: Optional[torch.dtype]
 
     def __init__(
         self,
@@ -186,10 +200,13 @@ class TensorProduct(CodeGenMixin, torch.nn.Module):
         internal_weights: Optional[bool] = None,
         shared_weights: Optional[bool] = None,
         _specialized_code: Optional[bool] = None,
-        _optimize_einsums: Optional[bool] = None
+        _optimize_einsums: Optional[bool] = None,
+        _backend: Optional[str] = None
     ):
         # === Setup ===
         super().__init__()
+        # dtype the kernel runs in, see `e3nn.util.precision`; None follows the inputs
+        self.compute_dtype = None
 
         # Determine irreps
         self.irreps_in1 = o3.Irreps(irreps_in1)
@@ -198,6 +215,7 @@ class TensorProduct(CodeGenMixin, torch.nn.Module):
 
         self._in1_dim = self.irreps_in1.dim
         self._in2_dim = self.irreps_in2.dim
+        self._out_dim = self.irreps_out.dim
 
         if in1_var is None:
             self.in1_var = [1.0 for _ in range(len(self.irreps_in1))]
@@ -254,7 +272,12 @@ class TensorProduct(CodeGenMixin, torch.nn.Module):
         opt_defaults = e3nn.get_optimization_defaults()
         self._specialized_code = _specialized_code if _specialized_code is not None else opt_defaults['specialized_code']
         self._optimize_einsums = _optimize_einsums if _optimize_einsums is not None else opt_defaults['optimize_einsums']
+        self._backend = _backend if _backend is not None else 'codegen'
         del opt_defaults
+        if self._backend not in ['codegen', 'block_sparse']:
+            raise ValueError(f"_backend must be 'codegen' or 'block_sparse', got {self._backend!r}")
+        if self._backend == 'block_sparse' and not self.shared_weights:
+            raise ValueError("The block_sparse backend requires shared_weights")
 
         # Generate the actual tensor product code
         graph_out, graph_right, wigners = codegen_tensor_product(
@@ -290,12 +313,12 @@ class TensorProduct(CodeGenMixin, torch.nn.Module):
         # w3j
         wigner_mats = []
         for l_1, l_2, l_out in wigners:
-            wig = o3.wigner_3j(l_1, l_2, l_out)
+            wig = _wigner_3j_cached(l_1, l_2, l_out)
 
             if normalization == 'component':
-                wig *= (2 * l_out + 1) ** 0.5
+                wig = wig * (2 * l_out + 1) ** 0.5
             if normalization == 'norm':
-                wig *= (2 * l_1 + 1) ** 0.5 * (2 * l_2 + 1) ** 0.5
+                wig = wig * (2 * l_1 + 1) ** 0.5 * (2 * l_2 + 1) ** 0.5
 
             wigner_mats.append(wig)
 
@@ -319,6 +342,29 @@ class TensorProduct(CodeGenMixin, torch.nn.Module):
             output_mask = torch.ones(0)
         self.register_buffer('output_mask', output_mask)
 
+        # Index maps of the block sparse backend; empty for codegen so the call signatures don't change
+        if self._backend == 'block_sparse':
+            maps = block_sparse_index_maps(
+                self.irreps_in1,
+                self.in1_var,
+                self.irreps_in2,
+                self.in2_var,
+                self.irreps_out,
+                self.out_var,
+                self.instructions,
+                self.normalization,
+            )
+        else:
+            empty = torch.zeros(0, dtype=torch.int64)
+            maps = dict(pair_a=empty, pair_b=empty, rows=empty, cols=empty, values=torch.zeros(0))
+        self._num_pairs = len(maps['pair_a'])
+        self.register_buffer('_bs_pair_a', maps['pair_a'], persistent=False)
+        self.register_buffer('_bs_pair_b', maps['pair_b'], persistent=False)
+        self.register_buffer('_bs_pair_ab', maps['pair_a'] * self._in2_dim + maps['pair_b'], persistent=False)
+        self.register_buffer('_bs_rows', maps['rows'], persistent=False)
+        self.register_buffer('_bs_cols', maps['cols'], persistent=False)
+        self.register_buffer('_bs_values', maps['values'].to(torch.get_default_dtype()), persistent=False)
+
         # For TorchScript, this needs to be done in advance:
         self._profiling_str = str(self)
 
@@ -359,6 +405,41 @@ class TensorProduct(CodeGenMixin, torch.nn.Module):
                 assert weight.ndim > 1, "When shared weights is false, weights must have batch dimension"
             return weight
 
+    def _block_sparse_operator(self, weight: torch.Tensor, like: torch.Tensor) -> torch.Tensor:
+        # (num_pairs, irreps_out.dim) operator of the shared weights; the extra last weight is the
+        # constant 1 of the unweighted paths
+        weight = torch.cat([weight.reshape(-1).to(like.dtype), like.new_ones(1)])
+        values = self._bs_values.to(like.dtype) * weight[self._bs_cols]
+        op = like.new_zeros(self._num_pairs * self._out_dim).index_add(0, self._bs_rows, values)
+        return op.reshape(self._num_pairs, self._out_dim)
+
+    def _block_sparse_out(self, x, y, weight: torch.Tensor) -> torch.Tensor:
+        size = list(torch.broadcast_tensors(x[..., :0], y[..., :0])[0].shape[:-1])
+        x = x.expand(size + [self._in1_dim]).reshape(-1, self._in1_dim)
+        y = y.expand(size + [self._in2_dim]).reshape(-1, self._in2_dim)
+        op = self._block_sparse_operator(weight, x)
+        pairs = x.index_select(1, self._bs_pair_a) * y.index_select(1, self._bs_pair_b)
+        return (pairs @ op).reshape(size + [self._out_dim])
+
+    def _block_sparse_right(self, y, weight: torch.Tensor) -> torch.Tensor:
+        size = list(y.shape[:-1])
+        y = y.reshape(-1, self._in2_dim)
+        op = self._block_sparse_operator(weight, y)
+        dense = op.new_zeros(self._in1_dim * self._in2_dim, self._out_dim).index_copy(0, self._bs_pair_ab, op)
+        dense = dense.reshape(self._in1_dim, self._in2_dim, self._out_dim).transpose(0, 1)
+        out = y @ dense.reshape(self._in2_dim, self._in1_dim * self._out_dim)
+        return out.reshape(size + [self._in1_dim, self._out_dim])
+
+    def _main_out(self, x, y, weight: torch.Tensor, w3j: torch.Tensor) -> torch.Tensor:
+        if self._backend == 'block_sparse':
+            return self._block_sparse_out(x, y, weight)
+        return self._compiled_main_out(x, y, weight, w3j)
+
+    def _main_right(self, y, weight: torch.Tensor, w3j: torch.Tensor) -> torch.Tensor:
+        if self._backend == 'block_sparse':
+            return self._block_sparse_right(y, weight)
+        return self._compiled_main_right(y, weight, w3j)
+
     @torch.jit.export
     def right(self, y, weight: Optional[torch.Tensor] = None):
         r"""Partially evaluate :math:`w x \otimes y`.
@@ -405,7 +486,13 @@ class TensorProduct(CodeGenMixin, torch.nn.Module):
 
         with torch.autograd.profiler.record_function(self._profiling_str):
             real_weight = self._get_weights(weight)
-            return self._compiled_main_right(y, real_weight, self._wigner_buf)
+            compute_dtype = self.compute_dtype
+            if compute_dtype is not None:
+                out = self._main_right(
+                    y.to(compute_dtype), real_weight.to(compute_dtype), self._wigner_buf.to(compute_dtype)
+                )
+                return out.to(y.dtype)
+            return self._main_right(y, real_weight, self._wigner_buf)
 
     def forward(self, x, y, weight: Optional[torch.Tensor] = None):
         r"""Evaluate :math:`w x \otimes y`.
@@ -435,7 +522,13 @@ class TensorProduct(CodeGenMixin, torch.nn.Module):
 
         with torch.autograd.profiler.record_function(self._profiling_str):
             real_weight = self._get_weights(weight)
-            return self._compiled_main_out(x, y, real_weight, self._wigner_buf)
+            compute_dtype = self.compute_dtype
+            if compute_dtype is not None:
+                out = self._main_out(
+                    x.to(compute_dtype), y.to(compute_dtype), real_weight.to(compute_dtype), self._wigner_buf.to(compute_dtype)
+                )
+                return out.to(x.dtype)
+            return self._main_out(x, y, real_weight, self._wigner_buf)
 
     def weight_view_for_instruction(
         self,
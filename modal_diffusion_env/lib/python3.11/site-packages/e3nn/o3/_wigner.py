@@ -13,6 +13,10 @@ _Jd, _W3j_flat, _W3j_indices = torch.load(os.path.join(os.path.dirname(__file__)
 # _W3j_indices is a dict from (l1, l2, l3) -> slice(i, j) to index the flat tensor
 # only l1 <= l2 <= l3 are stored
 
+_W3j_cache = {}
+# memoized wigner_3j symbols, (l1, l2, l3, dtype, device) -> tensor
+# the cached tensors are shared by every caller and must not be modified in place
+
 
 def _z_rot_mat(angle, l):
     r"""
@@ -115,7 +119,94 @@ def wigner_3j(l1, l2, l3, flat_src=_W3j_flat, dtype=None, device=None):
     -------
     `torch.Tensor`
         tensor :math:`C` of shape :math:`(2l_1+1, 2l_2+1, 2l_3+1)`
+
+    Notes
+    -----
+    The symbols are memoized per ``(l1, l2, l3, dtype, device)``, so repeated
+    calls only copy the cached tensor. See `precompute_wigner_3j` and
+    `clear_wigner_3j_cache`.
+    """
+    if flat_src is _W3j_flat:
+        return _wigner_3j_cached(l1, l2, l3, dtype, device).clone()
+    return _wigner_3j(l1, l2, l3, flat_src, dtype, device)
+
+
+def _wigner_3j_cached(l1, l2, l3, dtype=None, device=None):
+    r"""`wigner_3j` from the cache, without copy
+
+    The returned tensor is shared: multiply out of place, never in place.
+    """
+    dtype, device = explicit_default_types(dtype, device)
+    key = (l1, l2, l3, dtype, torch.device(device))
+    out = _W3j_cache.get(key)
+    if out is None:
+        # a normal tensor even when first requested under inference mode,
+        # so it can later take part in autograd
+        with torch.inference_mode(False):
+            out = _wigner_3j(l1, l2, l3, _W3j_flat, dtype, device)
+        _W3j_cache[key] = out
+    return out
+
+
+def precompute_wigner_3j(lmax, dtype=None, device=None):
+    r"""Fill the `wigner_3j` cache with all the symbols up to ``lmax``
+
+    Doing this once, on the device and with the dtype the model runs in, moves
+    the indexing and the host to device copies out of model construction.
+
+    Parameters
+    ----------
+    lmax : int
+        largest :math:`l` of the precomputed symbols
+
+    dtype : torch.dtype or None
+        ``dtype`` of the cached symbols
+
+    device : torch.device or None
+        ``device`` of the cached symbols
+
+    Returns
+    -------
+    int
+        the number of cached symbols
+    """
+    n = 0
+    for l1 in range(lmax + 1):
+        for l2 in range(lmax + 1):
+            for l3 in range(abs(l1 - l2), min(l1 + l2, lmax) + 1):
+                _wigner_3j_cached(l1, l2, l3, dtype, device)
+                n += 1
+    return n
+
+
+def clear_wigner_3j_cache(device=None):
+    r"""Evict memoized `wigner_3j` symbols
+
+    Parameters
+    ----------
+    device : torch.device or None
+        only evict the symbols on this device. If ``None`` evict all of them.
+
+    Returns
+    -------
+    int
+        the number of evicted symbols
     """
+    if device is None:
+        n = len(_W3j_cache)
+        _W3j_cache.clear()
+        return n
+    device = torch.device(device)
+    keys = [
+        key for key in _W3j_cache
+        if key[4].type == device.type and device.index in (None, key[4].index)
+    ]
+    for key in keys:
+        del _W3j_cache[key]
+    return len(keys)
+
+
+def _wigner_3j(l1, l2, l3, flat_src, dtype, device):
     assert abs(l2 - l3) <= l1 <= l2 + l3
 
     try:
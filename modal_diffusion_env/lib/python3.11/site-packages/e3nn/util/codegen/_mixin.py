@@ -1,10 +1,63 @@
-from typing import Dict
+from typing import Dict, Optional
+import hashlib
 import io
+import os
 
 import torch
 from torch import fx
 
 
+# Directory of the persistent TorchScript cache; caching is off when unset
+CODEGEN_CACHE_ENV = "E3NN_CODEGEN_CACHE"
+
+
+def _codegen_cache_key(graphmod: fx.GraphModule, fname: str) -> str:
+    """Content hash of everything that goes into scripting ``graphmod``.
+
+    Covers the torch version, the generated code, and every tensor the scripted
+    module captures from its root (buffers, parameters and plain tensor attributes).
+    """
+    h = hashlib.sha256()
+    h.update(torch.__version__.encode())
+    h.update(fname.encode())
+    h.update(graphmod.code.encode())
+
+    tensors = dict(graphmod.state_dict(keep_vars=True))
+    for node in graphmod.graph.nodes:
+        if node.op == "get_attr" and node.target not in tensors:
+            value = graphmod
+            for atom in node.target.split("."):
+                value = getattr(value, atom)
+            if isinstance(value, torch.Tensor):
+                tensors[node.target] = value
+    for name, value in sorted(tensors.items()):
+        value = value.detach()
+        h.update(f"{name}:{value.dtype}:{tuple(value.shape)}:{value.device}".encode())
+        h.update(value.cpu().contiguous().view(-1).view(torch.uint8).numpy().tobytes())
+    return h.hexdigest()
+
+
+def _load_cached(path: str) -> Optional[torch.jit.ScriptModule]:
+    if not os.path.exists(path):
+        return None
+    try:
+        return torch.jit.load(path)
+    except (OSError, RuntimeError):
+        # Unreadable entry: script again and overwrite it
+        return None
+
+
+def _save_cached(scriptmod: torch.jit.ScriptModule, path: str) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        torch.jit.save(scriptmod, tmp_path)
+        os.replace(tmp_path, path)
+    except OSError:
+        # A read-only or full cache only costs the next process a re-script
+        pass
+
+
 class CodeGenMixin:
     """Mixin for classes that dynamically generate TorchScript code using FX.
 
@@ -22,6 +75,11 @@ class CodeGenMixin:
 
         ``fx.GraphModule``s will be built with the current module as their ``root``.
 
+        If the ``E3NN_CODEGEN_CACHE`` environment variable names a directory,
+        compiled modules are saved there as TorchScript IR, keyed by
+        ``_codegen_cache_key``, and later registrations of an identical graph
+        load the IR instead of calling ``torch.jit.script`` again.
+
         Parameters
         ----------
             funcs : Dict[str, fx.Graph]
@@ -32,13 +90,23 @@ class CodeGenMixin:
             self.__codegen__ = []
         self.__codegen__.extend(funcs.keys())
 
+        cache_dir = os.environ.get(CODEGEN_CACHE_ENV)
         for fname, graph in funcs.items():
             assert isinstance(graph, fx.Graph)
-            scriptmod = torch.jit.script(fx.GraphModule(
+            graphmod = fx.GraphModule(
                 root=self,
                 graph=graph,
                 class_name=fname
-            ))
+            )
+            scriptmod = None
+            if cache_dir:
+                key = _codegen_cache_key(graphmod, fname)
+                path = os.path.join(cache_dir, key[:2], f"{key}.pt")
+                scriptmod = _load_cached(path)
+            if scriptmod is None:
+                scriptmod = torch.jit.script(graphmod)
+                if cache_dir:
+                    _save_cached(scriptmod, path)
             assert isinstance(scriptmod, torch.jit.ScriptModule)
             # Add the ScriptModule as a submodule so it can be called
             setattr(self, fname, scriptmod)
@@ -0,0 +1,126 @@
+r"""Reduced precision (bf16/fp16) execution of e3nn modules
+
+`TensorProduct`, `Linear` and `SphericalHarmonics` have a ``compute_dtype``:
+when set, their kernel runs in that dtype (inputs, weights and Wigner symbols
+are cast on the way in) and the output is cast back to the dtype of the input.
+Matrix products in bf16/fp16 accumulate in fp32 on both CPU and CUDA, and the
+input normalization of `SphericalHarmonics` stays in the input precision.
+"""
+from typing import Optional, Union
+
+import torch
+
+from e3nn import o3
+
+
+PRECISIONS = {
+    'fp32': None,
+    'bf16': torch.bfloat16,
+    'fp16': torch.float16,
+}
+
+
+def precision_dtype(precision: Union[str, torch.dtype, None]) -> Optional[torch.dtype]:
+    r"""Resolve ``'fp32'``, ``'bf16'``, ``'fp16'`` or a dtype to a compute dtype
+
+    ``None`` means full precision, i.e. follow the inputs.
+    """
+    if precision is None or isinstance(precision, torch.dtype):
+        return None if precision == torch.float32 else precision
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of {list(PRECISIONS)}, got {precision!r}")
+    return PRECISIONS[precision]
+
+
+def set_precision(module: torch.nn.Module, precision: Union[str, torch.dtype, None]) -> int:
+    r"""Set the compute dtype of every e3nn module in ``module``
+
+    Parameters
+    ----------
+    module : `torch.nn.Module`
+        model to update in place, e.g. a whole network
+
+    precision : str or torch.dtype or None
+        ``'fp32'``, ``'bf16'``, ``'fp16'`` or a dtype
+
+    Returns
+    -------
+    int
+        the number of modules updated
+    """
+    dtype = precision_dtype(precision)
+    n = 0
+    for m in module.modules():
+        if isinstance(m, (o3.TensorProduct, o3.Linear, o3.SphericalHarmonics)):
+            m.compute_dtype = dtype
+            n += 1
+    return n
+
+
+def precision_error(
+    module: torch.nn.Module,
+    args_in,
+    precision: Union[str, torch.dtype],
+    irreps_in=None,
+    irreps_out=None,
+    ntrials: int = 1,
+):
+    r"""Compare ``module`` in reduced precision against itself in fp32
+
+    The module is evaluated in fp32 and in ``precision`` on the same fp32
+    inputs (use CPU tensors to check without a GPU). Its previous compute
+    dtypes are restored afterwards.
+
+    Parameters
+    ----------
+    module : `torch.nn.Module`
+        the module to check
+
+    args_in : list of `torch.Tensor`
+        fp32 inputs of ``module``
+
+    precision : str or torch.dtype
+        the reduced precision to check
+
+    irreps_in, irreps_out, ntrials
+        as in `e3nn.util.test.equivariance_error`
+
+    Returns
+    -------
+    dict
+        ``equivariance_fp32`` and ``equivariance``: the largest equivariance
+        error in fp32 and in ``precision``; ``max_abs_diff``: the largest
+        difference between the two outputs
+    """
+    from e3nn.util.test import equivariance_error
+
+    saved = [
+        (m, m.compute_dtype) for m in module.modules()
+        if isinstance(m, (o3.TensorProduct, o3.Linear, o3.SphericalHarmonics))
+    ]
+    try:
+        with torch.no_grad():
+            set_precision(module, 'fp32')
+            reference = module(*args_in)
+            errors_fp32 = equivariance_error(module, args_in, irreps_in, irreps_out, ntrials=ntrials)
+
+            set_precision(module, precision)
+            out = module(*args_in)
+            errors = equivariance_error(module, args_in, irreps_in, irreps_out, ntrials=ntrials)
+    finally:
+        for m, dtype in saved:
+            m.compute_dtype = dtype
+
+    return {
+        'equivariance_fp32': max(float(e) for e in errors_fp32.values()),
+        'equivariance': max(float(e) for e in errors.values()),
+        'max_abs_diff': float((out - reference).abs().max()),
+    }
+
+
+__all__ = [
+    "PRECISIONS",
+    "precision_dtype",
+    "set_precision",
+    "precision_error",
+]
@@ -30,6 +30,8 @@ def _logging_name(func) -> str:
 FLOAT_TOLERANCE = {
     t: torch.as_tensor(v, dtype=t)
     for t, v in {
+        torch.float16: 1e-2,
+        torch.bfloat16: 5e-2,
         torch.float32: 1e-3,
         torch.float64: 1e-10
     }.items()
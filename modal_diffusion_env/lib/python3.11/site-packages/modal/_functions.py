@@ -1272,7 +1272,11 @@ class _Function(typing.Generic[P, ReturnType, OriginalReturnType], _Object, type
 
     @live_method_gen
     async def _map(
-        self, input_queue: _SynchronizedQueue, order_outputs: bool, return_exceptions: bool
+        self,
+        input_queue: _SynchronizedQueue,
+        order_outputs: bool,
+        return_exceptions: bool,
+        input_concurrency: Optional[int] = None,
     ) -> AsyncGenerator[Any, None]:
         """mdmd:hidden
 
@@ -1301,6 +1305,7 @@ class _Function(typing.Generic[P, ReturnType, OriginalReturnType], _Object, type
                 order_outputs,
                 return_exceptions,
                 count_update_callback,
+                input_concurrency,
             )
         ) as stream:
             async for item in stream:
@@ -260,12 +260,16 @@ def run_coro_blocking(coro):
         return fut.result()
 
 
-async def queue_batch_iterator(q: asyncio.Queue, max_batch_size=100, debounce_time=0.015):
+async def queue_batch_iterator(
+    q: asyncio.Queue, max_batch_size: Union[int, Callable[[], int]] = 100, debounce_time=0.015
+):
     """
     Read from a queue but return lists of items when queue is large
 
-    Treats a None value as end of queue items
+    Treats a None value as end of queue items. `max_batch_size` may be a callable, which is
+    consulted before every batch so the batch size can change while iterating.
     """
+    get_max_batch_size = max_batch_size if callable(max_batch_size) else lambda: max_batch_size
     item_list: list[Any] = []
 
     while True:
@@ -276,7 +280,7 @@ async def queue_batch_iterator(q: asyncio.Queue, max_batch_size=100, debounce_ti
 
         res = await q.get()
 
-        if len(item_list) >= max_batch_size:
+        if len(item_list) >= get_max_batch_size():
             yield item_list
             item_list = []
 
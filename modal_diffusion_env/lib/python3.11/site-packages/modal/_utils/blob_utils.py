@@ -1,6 +1,7 @@
 # Copyright Modal Labs 2022
 import asyncio
 import dataclasses
+import functools
 import hashlib
 import io
 import os
@@ -18,7 +19,7 @@ from modal_proto.modal_api_grpc import ModalClientModal
 from ..exception import ExecutionError
 from .async_utils import TaskContext, retry
 from .grpc_utils import retry_transient_errors
-from .hash_utils import UploadHashes, get_upload_hashes
+from .hash_utils import UploadHashes, get_upload_hash_cache, get_upload_hashes
 from .http_utils import ClientSessionRegistry
 from .logger import logger
 
@@ -38,6 +39,13 @@ BLOB_MAX_PARALLELISM = 10
 # read ~16MiB chunks by default
 DEFAULT_SEGMENT_CHUNK_SIZE = 2**24
 
+# With `buffer=True`, blob files up to this size are read once into memory, then hashed and uploaded from that buffer
+# instead of being read from disk a second time. Larger files are streamed from disk for both passes, since the sha256
+# must be known before the upload starts; only the upload hash cache saves their hashing pass on later uploads.
+# Only callers that bound how many specs are alive at once (Volume.batch_upload) should buffer: mounts build all of
+# their specs up front, so buffering there would hold every file of the mount in memory.
+SINGLE_PASS_UPLOAD_LIMIT = 32 * 1024 * 1024  # 32 MiB
+
 # Files larger than this will be multipart uploaded. The server might request multipart upload for smaller files as
 # well, but the limit will never be raised.
 # TODO(dano): remove this once we stop requiring md5 for blobs
@@ -307,7 +315,14 @@ def _get_file_upload_spec(
     source_description: Any,
     mount_filename: PurePosixPath,
     mode: int,
+    stat: Optional[os.stat_result] = None,
+    buffer: bool = False,
 ) -> FileUploadSpec:
+    # Hashes of unchanged files on disk are reused from previous uploads
+    hash_cache = get_upload_hash_cache() if stat is not None else None
+    hashes = hash_cache.get(source_description, stat) if hash_cache else None
+    cached = hashes is not None
+
     with source() as fp:
         # Current position is ignored - we always upload from position 0
         fp.seek(0, os.SEEK_END)
@@ -319,11 +334,21 @@ def _get_file_upload_spec(
             md5_hex = "baadbaadbaadbaadbaadbaadbaadbaad" if size > MULTIPART_UPLOAD_THRESHOLD else None
             use_blob = True
             content = None
-            hashes = get_upload_hashes(fp, md5_hex=md5_hex)
+            if not cached and buffer and size <= SINGLE_PASS_UPLOAD_LIMIT:
+                # Single pass: hash the buffer now and upload the same buffer later
+                data = fp.read()
+                hashes = get_upload_hashes(data, md5_hex=md5_hex)
+                source = functools.partial(io.BytesIO, data)
+            elif not cached:
+                hashes = get_upload_hashes(fp, md5_hex=md5_hex)
         else:
             use_blob = False
             content = fp.read()
-            hashes = get_upload_hashes(content)
+            if not cached:
+                hashes = get_upload_hashes(content)
+
+    if hash_cache and not cached:
+        hash_cache.put(source_description, stat, hashes)
 
     return FileUploadSpec(
         source=source,
@@ -339,20 +364,25 @@ def _get_file_upload_spec(
 
 
 def get_file_upload_spec_from_path(
-    filename: Path, mount_filename: PurePosixPath, mode: Optional[int] = None
+    filename: Path, mount_filename: PurePosixPath, mode: Optional[int] = None, buffer: bool = False
 ) -> FileUploadSpec:
     # Python appears to give files 0o666 bits on Windows (equal for user, group, and global),
     # so we mask those out to 0o755 for compatibility with POSIX-based permissions.
-    mode = mode or os.stat(filename).st_mode & (0o7777 if platform.system() != "Windows" else 0o7755)
+    stat = os.stat(filename)
+    mode = mode or stat.st_mode & (0o7777 if platform.system() != "Windows" else 0o7755)
     return _get_file_upload_spec(
         lambda: open(filename, "rb"),
         filename,
         mount_filename,
         mode,
+        stat,
+        buffer,
     )
 
 
-def get_file_upload_spec_from_fileobj(fp: BinaryIO, mount_filename: PurePosixPath, mode: int) -> FileUploadSpec:
+def get_file_upload_spec_from_fileobj(
+    fp: BinaryIO, mount_filename: PurePosixPath, mode: int, buffer: bool = False
+) -> FileUploadSpec:
     @contextmanager
     def source():
         # We ignore position in stream and always upload from position 0
@@ -364,6 +394,7 @@ def get_file_upload_spec_from_fileobj(fp: BinaryIO, mount_filename: PurePosixPat
         str(fp),
         mount_filename,
         mode,
+        buffer=buffer,
     )
 
 
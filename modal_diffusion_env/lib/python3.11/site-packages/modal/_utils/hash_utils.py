@@ -1,13 +1,20 @@
 # Copyright Modal Labs 2022
+import atexit
 import base64
 import dataclasses
 import hashlib
+import json
+import os
+import threading
 import time
 from typing import BinaryIO, Callable, Optional, Sequence, Union
 
 from modal.config import logger
 
-HASH_CHUNK_SIZE = 65536
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Max number of entries kept in the persistent upload hash cache
+UPLOAD_HASH_CACHE_MAX_ENTRIES = 10_000
 
 
 def _update(hashers: Sequence[Callable[[bytes], None]], data: Union[bytes, BinaryIO]) -> None:
@@ -98,3 +105,78 @@ def get_upload_hashes(
 
     logger.debug("get_upload_hashes took %.3fs (%s)", time.monotonic() - t0, hashers.keys())
     return hashes
+
+
+class UploadHashCache:
+    """Persistent map from (path, size, mtime) to the upload hashes of a local file.
+
+    Entries are keyed by absolute path and only returned while the file's size and mtime are unchanged,
+    so re-uploading an unmodified file (e.g. a model checkpoint) skips the hashing pass entirely.
+    Safe to use from the thread pool that computes file upload specs.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+        self._entries: Optional[dict[str, list]] = None
+        self._dirty = False
+        atexit.register(self.flush)
+
+    def _load(self) -> dict[str, list]:
+        if self._entries is None:
+            try:
+                with open(self._path) as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, filename: str, stat: os.stat_result) -> Optional[UploadHashes]:
+        with self._lock:
+            entry = self._load().get(os.path.abspath(filename))
+        if entry is None:
+            return None
+        size, mtime_ns, md5_base64, sha256_base64 = entry
+        if size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+            return None
+        return UploadHashes(md5_base64=md5_base64, sha256_base64=sha256_base64)
+
+    def put(self, filename: str, stat: os.stat_result, hashes: UploadHashes) -> None:
+        with self._lock:
+            entries = self._load()
+            key = os.path.abspath(filename)
+            entries.pop(key, None)  # re-insert so the oldest entries are evicted first
+            entries[key] = [stat.st_size, stat.st_mtime_ns, hashes.md5_base64, hashes.sha256_base64]
+            while len(entries) > UPLOAD_HASH_CACHE_MAX_ENTRIES:
+                del entries[next(iter(entries))]
+            self._dirty = True
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                os.makedirs(os.path.dirname(self._path), exist_ok=True)
+                tmp_path = f"{self._path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(self._entries, f)
+                os.replace(tmp_path, self._path)
+            except OSError as exc:
+                logger.debug(f"Failed to write upload hash cache {self._path}: {exc}")
+            self._dirty = False
+
+
+_upload_hash_cache: Optional[UploadHashCache] = None
+
+
+def get_upload_hash_cache() -> Optional[UploadHashCache]:
+    """Process-wide upload hash cache, or None if disabled through the `upload_hash_cache_path` setting."""
+    global _upload_hash_cache
+    from modal.config import config
+
+    path = config.get("upload_hash_cache_path")
+    if not path:
+        return None
+    if _upload_hash_cache is None or _upload_hash_cache._path != path:
+        _upload_hash_cache = UploadHashCache(path)
+    return _upload_hash_cache
@@ -232,6 +232,9 @@ _SETTINGS = {
     "snapshot_debug": _Setting(False, transform=_to_boolean),
     "client_retries": _Setting(False, transform=_to_boolean),  # For internal testing.
     "cuda_checkpoint_path": _Setting("/__modal/.bin/cuda-checkpoint"),  # Used for snapshotting GPU memory.
+    # Digests of uploaded files keyed by (path, size, mtime), so unchanged files are never re-hashed.
+    # Set to an empty string to disable.
+    "upload_hash_cache_path": _Setting(os.path.expanduser("~/.cache/modal/upload-hashes.json")),
 }
 
 
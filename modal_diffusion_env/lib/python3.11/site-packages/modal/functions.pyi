@@ -166,10 +166,18 @@ class Function(
 
     class ___map_spec(typing_extensions.Protocol[SUPERSELF]):
         def __call__(
-            self, input_queue: modal.parallel_map.SynchronizedQueue, order_outputs: bool, return_exceptions: bool
+            self,
+            input_queue: modal.parallel_map.SynchronizedQueue,
+            order_outputs: bool,
+            return_exceptions: bool,
+            input_concurrency: typing.Optional[int] = None,
         ) -> typing.Generator[typing.Any, None, None]: ...
         def aio(
-            self, input_queue: modal.parallel_map.SynchronizedQueue, order_outputs: bool, return_exceptions: bool
+            self,
+            input_queue: modal.parallel_map.SynchronizedQueue,
+            order_outputs: bool,
+            return_exceptions: bool,
+            input_concurrency: typing.Optional[int] = None,
         ) -> collections.abc.AsyncGenerator[typing.Any, None]: ...
 
     _map: ___map_spec[typing_extensions.Self]
@@ -241,7 +249,12 @@ class Function(
 
     class __map_spec(typing_extensions.Protocol[SUPERSELF]):
         def __call__(
-            self, *input_iterators, kwargs={}, order_outputs: bool = True, return_exceptions: bool = False
+            self,
+            *input_iterators,
+            kwargs={},
+            order_outputs: bool = True,
+            return_exceptions: bool = False,
+            input_concurrency: typing.Optional[int] = None,
         ) -> modal._utils.async_utils.AsyncOrSyncIterable: ...
         def aio(
             self,
@@ -249,6 +262,7 @@ class Function(
             kwargs={},
             order_outputs: bool = True,
             return_exceptions: bool = False,
+            input_concurrency: typing.Optional[int] = None,
         ) -> typing.AsyncGenerator[typing.Any, None]: ...
 
     map: __map_spec[typing_extensions.Self]
@@ -260,6 +274,7 @@ class Function(
             kwargs={},
             order_outputs: bool = True,
             return_exceptions: bool = False,
+            input_concurrency: typing.Optional[int] = None,
         ) -> modal._utils.async_utils.AsyncOrSyncIterable: ...
         def aio(
             self,
@@ -269,6 +284,7 @@ class Function(
             kwargs={},
             order_outputs: bool = True,
             return_exceptions: bool = False,
+            input_concurrency: typing.Optional[int] = None,
         ) -> typing.AsyncIterable[typing.Any]: ...
 
     starmap: __starmap_spec[typing_extensions.Self]
@@ -64,6 +64,82 @@ class _OutputValue:
 
 MAP_INVOCATION_CHUNK_SIZE = 49
 
+# Upper bound for the adaptive number of inputs serialized and uploaded concurrently
+MAP_MAX_INPUT_CONCURRENCY = 64
+
+# FunctionPutInputs round trips slower than this make the adaptive batch size shrink
+MAP_PUT_INPUTS_TARGET_RTT = 1.0
+
+
+class _AdaptiveInputLimits:
+    """mdmd:hidden
+    Adapts input upload concurrency and FunctionPutInputs batch size during a map call.
+
+    Upload concurrency is hill-climbed on observed input creation throughput: it grows while
+    throughput keeps improving and backs off when it drops. Batch size grows while FunctionPutInputs
+    round trips stay under MAP_PUT_INPUTS_TARGET_RTT and shrinks when they don't. RESOURCE_EXHAUSTED
+    back-pressure halves both, since there is no point uploading faster than the server accepts.
+    Passing a fixed `concurrency` pins the upload concurrency; the batch size still adapts.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None):
+        self.adaptive = concurrency is None
+        self.concurrency = concurrency or BLOB_MAX_PARALLELISM
+        self.batch_size = MAP_INVOCATION_CHUNK_SIZE
+        self._active = 0
+        self._cond: Optional[asyncio.Condition] = None  # created lazily inside the running event loop
+        self._window_count = 0
+        self._window_start = time.monotonic()
+        self._last_throughput = 0.0
+
+    def _condition(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def acquire(self):
+        async with self._condition():
+            await self._condition().wait_for(lambda: self._active < self.concurrency)
+            self._active += 1
+
+    async def release(self):
+        async with self._condition():
+            self._active -= 1
+            self._window_count += 1
+            if self.adaptive and self._window_count >= self.concurrency:
+                self._end_window()
+            self._condition().notify_all()
+
+    def _end_window(self):
+        now = time.monotonic()
+        throughput = self._window_count / max(now - self._window_start, 1e-6)
+        if throughput >= self._last_throughput * 1.05:
+            self.concurrency = min(self.concurrency + 1, MAP_MAX_INPUT_CONCURRENCY)
+        elif throughput < self._last_throughput * 0.8:
+            self.concurrency = max(self.concurrency - 1, 1)
+        logger.debug(
+            f"Map input throughput {throughput:.1f}/s, upload concurrency is now {self.concurrency}"
+        )
+        self._last_throughput = throughput
+        self._window_count = 0
+        self._window_start = now
+
+    def on_put_inputs(self, rtt: float):
+        if rtt > MAP_PUT_INPUTS_TARGET_RTT:
+            self.batch_size = max(self.batch_size * 3 // 4, 1)
+        else:
+            self.batch_size = min(self.batch_size + 4, MAP_INVOCATION_CHUNK_SIZE)
+
+    def on_back_pressure(self):
+        self.batch_size = max(self.batch_size // 2, 1)
+        if self.adaptive:
+            self.concurrency = max(self.concurrency // 2, 1)
+            self._last_throughput = 0.0
+        logger.debug(
+            f"Map input back-pressure: batch size is now {self.batch_size}, upload concurrency {self.concurrency}"
+        )
+
+
 if typing.TYPE_CHECKING:
     import modal.functions
 
@@ -75,6 +151,7 @@ async def _map_invocation(
     order_outputs: bool,
     return_exceptions: bool,
     count_update_callback: Optional[Callable[[int, int], None]],
+    input_concurrency: Optional[int] = None,
 ):
     assert client.stub
     request = api_pb2.FunctionMapRequest(
@@ -99,13 +176,18 @@ async def _map_invocation(
     completed_outputs: set[str] = set()  # Set of input_ids whose outputs are complete (expecting no more values)
 
     input_queue: asyncio.Queue = asyncio.Queue()
+    limits = _AdaptiveInputLimits(input_concurrency)
 
     async def create_input(argskwargs):
         nonlocal num_inputs
         idx = num_inputs
         num_inputs += 1
         (args, kwargs) = argskwargs
-        return await _create_input(args, kwargs, client, idx=idx, method_name=function._use_method_name)
+        await limits.acquire()
+        try:
+            return await _create_input(args, kwargs, client, idx=idx, method_name=function._use_method_name)
+        finally:
+            await limits.release()
 
     async def input_iter():
         while 1:
@@ -115,10 +197,9 @@ async def _map_invocation(
             yield raw_input  # args, kwargs
 
     async def drain_input_generator():
-        # Parallelize uploading blobs
-        async with aclosing(
-            async_map_ordered(input_iter(), create_input, concurrency=BLOB_MAX_PARALLELISM)
-        ) as streamer:
+        # Parallelize uploading blobs, the effective concurrency is gated by `limits`
+        max_concurrency = MAP_MAX_INPUT_CONCURRENCY if limits.adaptive else limits.concurrency
+        async with aclosing(async_map_ordered(input_iter(), create_input, concurrency=max_concurrency)) as streamer:
             async for item in streamer:
                 await input_queue.put(item)
 
@@ -129,7 +210,7 @@ async def _map_invocation(
     async def pump_inputs():
         assert client.stub
         nonlocal have_all_inputs, num_inputs
-        async for items in queue_batch_iterator(input_queue, MAP_INVOCATION_CHUNK_SIZE):
+        async for items in queue_batch_iterator(input_queue, lambda: limits.batch_size):
             request = api_pb2.FunctionPutInputsRequest(
                 function_id=function.object_id, inputs=items, function_call_id=function_call_id
             )
@@ -137,6 +218,7 @@ async def _map_invocation(
                 f"Pushing {len(items)} inputs to server. Num queued inputs awaiting push is {input_queue.qsize()}."
             )
             while True:
+                t0 = time.monotonic()
                 try:
                     resp = await retry_transient_errors(
                         client.stub.FunctionPutInputs,
@@ -146,10 +228,12 @@ async def _map_invocation(
                         max_delay=15,
                         additional_status_codes=[Status.RESOURCE_EXHAUSTED],
                     )
+                    limits.on_put_inputs(time.monotonic() - t0)
                     break
                 except GRPCError as err:
                     if err.status != Status.RESOURCE_EXHAUSTED:
                         raise err
+                    limits.on_back_pressure()
                     logger.warning(
                         f"Warning: map progress for function {function._function_name} is limited."
                         " Common bottlenecks include slow iteration over results, or function backlogs."
@@ -261,6 +345,7 @@ def _map_sync(
     kwargs={},  # any extra keyword arguments for the function
     order_outputs: bool = True,  # return outputs in order
     return_exceptions: bool = False,  # propagate exceptions (False) or aggregate them in the results list (True)
+    input_concurrency: Optional[int] = None,  # pin the number of inputs uploaded concurrently (adaptive if None)
 ) -> AsyncOrSyncIterable:
     """Parallel map over a set of inputs.
 
@@ -282,6 +367,10 @@ def _map_sync(
     is guaranteed to be the same as the input order. Set `order_outputs=False` to return results
     in the order that they are completed instead.
 
+    Inputs are serialized and uploaded concurrently. By default the concurrency and the size of the
+    batches sent to the server adapt to the observed throughput, round trip times and server
+    back-pressure. Pass `input_concurrency` to pin the upload concurrency instead.
+
     `return_exceptions` can be used to treat exceptions as successful results:
 
     ```python
@@ -301,7 +390,12 @@ def _map_sync(
 
     return AsyncOrSyncIterable(
         _map_async(
-            self, *input_iterators, kwargs=kwargs, order_outputs=order_outputs, return_exceptions=return_exceptions
+            self,
+            *input_iterators,
+            kwargs=kwargs,
+            order_outputs=order_outputs,
+            return_exceptions=return_exceptions,
+            input_concurrency=input_concurrency,
         ),
         nested_async_message=(
             "You can't iter(Function.map()) or Function.for_each() from an async function. "
@@ -319,6 +413,7 @@ async def _map_async(
     kwargs={},  # any extra keyword arguments for the function
     order_outputs: bool = True,  # return outputs in order
     return_exceptions: bool = False,  # propagate exceptions (False) or aggregate them in the results list (True)
+    input_concurrency: Optional[int] = None,  # pin the number of inputs uploaded concurrently (adaptive if None)
 ) -> typing.AsyncGenerator[Any, None]:
     """mdmd:hidden
     This runs in an event loop on the main thread
@@ -347,7 +442,9 @@ async def _map_async(
         # they accept executable code in the form of
         # iterators that we don't want to run inside the synchronicity thread.
         # Instead, we delegate to `._map()` with a safer Queue as input
-        async with aclosing(self._map.aio(raw_input_queue, order_outputs, return_exceptions)) as map_output_stream:
+        async with aclosing(
+            self._map.aio(raw_input_queue, order_outputs, return_exceptions, input_concurrency)
+        ) as map_output_stream:
             async for output in map_output_stream:
                 yield output
     finally:
@@ -380,6 +477,7 @@ async def _starmap_async(
     kwargs={},
     order_outputs: bool = True,
     return_exceptions: bool = False,
+    input_concurrency: Optional[int] = None,
 ) -> typing.AsyncIterable[Any]:
     raw_input_queue: Any = SynchronizedQueue()  # type: ignore
     raw_input_queue.init()
@@ -393,7 +491,9 @@ async def _starmap_async(
 
     feed_input_task = asyncio.create_task(feed_queue())
     try:
-        async for output in self._map.aio(raw_input_queue, order_outputs, return_exceptions):  # type: ignore[reportFunctionMemberAccess]
+        async for output in self._map.aio(  # type: ignore[reportFunctionMemberAccess]
+            raw_input_queue, order_outputs, return_exceptions, input_concurrency
+        ):
             yield output
     finally:
         feed_input_task.cancel()  # should only be needed in case of exceptions
@@ -406,11 +506,16 @@ def _starmap_sync(
     kwargs={},
     order_outputs: bool = True,
     return_exceptions: bool = False,
+    input_concurrency: Optional[int] = None,
 ) -> AsyncOrSyncIterable:
     """Like `map`, but spreads arguments over multiple function arguments.
 
     Assumes every input is a sequence (e.g. a tuple).
 
+    As with `map`, input uploads adapt to throughput and server back-pressure unless
+    `input_concurrency` pins the number of inputs uploaded concurrently. This matters when
+    every input carries a large argument.
+
     Example:
     ```python
     @app.function()
@@ -425,7 +530,12 @@ def _starmap_sync(
     """
     return AsyncOrSyncIterable(
         _starmap_async(
-            self, input_iterator, kwargs=kwargs, order_outputs=order_outputs, return_exceptions=return_exceptions
+            self,
+            input_iterator,
+            kwargs=kwargs,
+            order_outputs=order_outputs,
+            return_exceptions=return_exceptions,
+            input_concurrency=input_concurrency,
         ),
         nested_async_message=(
             "You can't run Function.map() or Function.for_each() from an async function. "
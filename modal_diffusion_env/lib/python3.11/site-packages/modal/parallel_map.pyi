@@ -1,3 +1,4 @@
+import asyncio.locks
 import collections.abc
 import modal._functions
 import modal._utils.async_utils
@@ -40,6 +41,15 @@ class _OutputValue:
     def __repr__(self): ...
     def __eq__(self, other): ...
 
+class _AdaptiveInputLimits:
+    def __init__(self, concurrency: typing.Optional[int] = None): ...
+    def _condition(self) -> asyncio.locks.Condition: ...
+    async def acquire(self): ...
+    async def release(self): ...
+    def _end_window(self): ...
+    def on_put_inputs(self, rtt: float): ...
+    def on_back_pressure(self): ...
+
 def _map_invocation(
     function: modal._functions._Function,
     raw_input_queue: _SynchronizedQueue,
@@ -47,9 +57,15 @@ def _map_invocation(
     order_outputs: bool,
     return_exceptions: bool,
     count_update_callback: typing.Optional[collections.abc.Callable[[int, int], None]],
+    input_concurrency: typing.Optional[int] = None,
 ): ...
 def _map_sync(
-    self, *input_iterators, kwargs={}, order_outputs: bool = True, return_exceptions: bool = False
+    self,
+    *input_iterators,
+    kwargs={},
+    order_outputs: bool = True,
+    return_exceptions: bool = False,
+    input_concurrency: typing.Optional[int] = None,
 ) -> modal._utils.async_utils.AsyncOrSyncIterable: ...
 def _map_async(
     self,
@@ -57,6 +73,7 @@ def _map_async(
     kwargs={},
     order_outputs: bool = True,
     return_exceptions: bool = False,
+    input_concurrency: typing.Optional[int] = None,
 ) -> typing.AsyncGenerator[typing.Any, None]: ...
 def _for_each_sync(self, *input_iterators, kwargs={}, ignore_exceptions: bool = False): ...
 async def _for_each_async(self, *input_iterators, kwargs={}, ignore_exceptions: bool = False): ...
@@ -68,6 +85,7 @@ def _starmap_async(
     kwargs={},
     order_outputs: bool = True,
     return_exceptions: bool = False,
+    input_concurrency: typing.Optional[int] = None,
 ) -> typing.AsyncIterable[typing.Any]: ...
 def _starmap_sync(
     self,
@@ -75,4 +93,5 @@ def _starmap_sync(
     kwargs={},
     order_outputs: bool = True,
     return_exceptions: bool = False,
+    input_concurrency: typing.Optional[int] = None,
 ) -> modal._utils.async_utils.AsyncOrSyncIterable: ...
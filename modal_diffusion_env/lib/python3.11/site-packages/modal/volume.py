@@ -29,7 +29,16 @@ from modal_proto import api_pb2
 
 from ._object import EPHEMERAL_OBJECT_HEARTBEAT_SLEEP, _get_environment_name, _Object, live_method, live_method_gen
 from ._resolver import Resolver
-from ._utils.async_utils import TaskContext, aclosing, async_map, asyncnullcontext, synchronize_api
+from ._utils.async_utils import (
+    TaskContext,
+    aclosing,
+    async_map,
+    async_map_ordered,
+    asyncify,
+    asyncnullcontext,
+    sync_or_async_iter,
+    synchronize_api,
+)
 from ._utils.blob_utils import (
     FileUploadSpec,
     blob_iter,
@@ -39,6 +48,7 @@ from ._utils.blob_utils import (
 )
 from ._utils.deprecation import deprecation_error, deprecation_warning, renamed_parameter
 from ._utils.grpc_utils import retry_transient_errors
+from ._utils.hash_utils import get_upload_hash_cache
 from ._utils.name_utils import check_object_name
 from .client import _Client
 from .config import logger
@@ -47,6 +57,13 @@ from .config import logger
 # As a guide, files >40GiB will take >10 minutes to upload.
 VOLUME_PUT_FILE_CLIENT_TIMEOUT = 60 * 60
 
+# Max number of files uploaded concurrently by a batch upload
+VOLUME_UPLOAD_CONCURRENCY = 20
+
+# Size of each ranged request and max number of them in flight when reading volume files
+VOLUME_READ_CHUNK_SIZE = 8 * 1024 * 1024
+VOLUME_READ_CONCURRENCY = 8
+
 
 class FileEntryType(enum.IntEnum):
     """Type of a file entry listed from a Modal volume."""
@@ -398,51 +415,94 @@ class _Volume(_Object, type_prefix="vo"):
             async for data in blob_iter(response.data_blob_id, self._client.stub):
                 yield data
 
+    async def _read_file_range(self, path: str, start: int, length: int) -> api_pb2.VolumeGetFileResponse:
+        req = api_pb2.VolumeGetFileRequest(volume_id=self.object_id, path=path, start=start, len=length)
+        response = await retry_transient_errors(self._client.stub.VolumeGetFile, req)
+        if response.WhichOneof("data_oneof") != "data":
+            raise RuntimeError("expected to receive 'data' in response")
+        if len(response.data) > length:
+            raise RuntimeError(f"received more data than requested: {len(response.data)} > {length}")
+        elif (start + len(response.data)) > response.size:
+            raise RuntimeError(f"received data exceeds filesize of {response.size}")
+        return response
+
     @live_method
-    async def read_file_into_fileobj(self, path: str, fileobj: IO[bytes]) -> int:
+    async def read_file_into_fileobj(
+        self,
+        path: str,
+        fileobj: IO[bytes],
+        *,
+        chunk_size: int = VOLUME_READ_CHUNK_SIZE,
+        concurrency: int = VOLUME_READ_CONCURRENCY,
+    ) -> int:
         """mdmd:hidden
 
         Read volume file into file-like IO object.
         In the future, this will replace the current generator implementation of the `read_file` method.
-        """
 
-        chunk_size_bytes = 8 * 1024 * 1024
-        start = 0
-        req = api_pb2.VolumeGetFileRequest(volume_id=self.object_id, path=path, start=start, len=chunk_size_bytes)
+        The file is fetched with up to `concurrency` ranged requests of `chunk_size` bytes in flight. When
+        `fileobj` is backed by a real file, it is pre-sized and every range is written at its own offset as
+        soon as it arrives; otherwise ranges are written in order. `concurrency=1` reads strictly sequentially.
+        """
         try:
-            response = await retry_transient_errors(self._client.stub.VolumeGetFile, req)
+            response = await self._read_file_range(path, 0, chunk_size)
         except GRPCError as exc:
             raise FileNotFoundError(exc.message) if exc.status == Status.NOT_FOUND else exc
-        if response.WhichOneof("data_oneof") != "data":
-            raise RuntimeError("expected to receive 'data' in response")
+
+        file_size = response.size
+        if len(response.data) == file_size:
+            n = fileobj.write(response.data)
+            if n != len(response.data):
+                raise OSError(f"failed to write {len(response.data)} bytes to output. Wrote {n}.")
+            return file_size
+        # else: there's more data to read. continue reading with further ranged GET requests.
+        ranges = [(start, min(chunk_size, file_size - start)) for start in range(len(response.data), file_size, chunk_size)]
+
+        async def fetch(range_: tuple[int, int]) -> bytes:
+            # A short response is not an error: re-request whatever is left of the range
+            start, length = range_
+            data = b""
+            while len(data) < length:
+                chunk = await self._read_file_range(path, start + len(data), length - len(data))
+                if not chunk.data:
+                    raise RuntimeError(f"received no data at offset {start + len(data)} of {file_size}")
+                data += chunk.data
+            return data
+
+        fd = _positional_fd(fileobj) if concurrency > 1 else None
+        if fd is not None:
+            fileobj.flush()
+            base = fileobj.tell()
+            os.ftruncate(fd, base + file_size)
+            await asyncify(_pwrite_all)(fd, response.data, base)
+
+            async def fetch_and_write(range_: tuple[int, int]) -> int:
+                data = await fetch(range_)
+                await asyncify(_pwrite_all)(fd, data, base + range_[0])
+                return len(data)
+
+            written = len(response.data)
+            async with aclosing(async_map(sync_or_async_iter(ranges), fetch_and_write, concurrency)) as stream:
+                async for n in stream:
+                    written += n
+            fileobj.seek(base + file_size)
+            return written
 
         n = fileobj.write(response.data)
         if n != len(response.data):
             raise OSError(f"failed to write {len(response.data)} bytes to output. Wrote {n}.")
-        elif n == response.size:
-            return response.size
-        elif n > response.size:
-            raise RuntimeError(f"length of returned data exceeds reported filesize: {n} > {response.size}")
-        # else: there's more data to read. continue reading with further ranged GET requests.
-        file_size = response.size
         written = n
 
-        while True:
-            req = api_pb2.VolumeGetFileRequest(volume_id=self.object_id, path=path, start=written, len=chunk_size_bytes)
-            response = await retry_transient_errors(self._client.stub.VolumeGetFile, req)
-            if response.WhichOneof("data_oneof") != "data":
-                raise RuntimeError("expected to receive 'data' in response")
-            if len(response.data) > chunk_size_bytes:
-                raise RuntimeError(f"received more data than requested: {len(response.data)} > {chunk_size_bytes}")
-            elif (written + len(response.data)) > file_size:
-                raise RuntimeError(f"received data exceeds filesize of {chunk_size_bytes}")
-
-            n = fileobj.write(response.data)
-            if n != len(response.data):
-                raise OSError(f"failed to write {len(response.data)} bytes to output. Wrote {n}.")
-            written += n
-            if written == file_size:
-                break
+        # Out-of-order responses are buffered, so at most `concurrency` chunks are held in memory
+        chunks = async_map_ordered(sync_or_async_iter(ranges), fetch, max(concurrency, 1))
+        async with aclosing(chunks) as stream:
+            async for data in stream:
+                n = fileobj.write(data)
+                if n != len(data):
+                    raise OSError(f"failed to write {len(data)} bytes to output. Wrote {n}.")
+                written += n
+        if written != file_size:
+            raise RuntimeError(f"read {written} bytes but file size is {file_size}")
 
         return written
 
@@ -488,6 +548,12 @@ class _Volume(_Object, type_prefix="vo"):
         To allow overwriting existing files, set `force` to `True` (you cannot overwrite existing directories with
         uploaded files regardless).
 
+        Every file is hashed before its upload starts, since the server checks the sha256 before accepting any bytes.
+        Files up to 32 MiB are read from disk once and uploaded from the hashed buffer. Larger files, such as model
+        checkpoints, are read twice on their first upload: once to hash them and once to upload them. Their hashes are
+        then cached by path, size and mtime (see the `upload_hash_cache_path` setting), so re-uploading an unchanged
+        file reads it only once.
+
         **Example:**
 
         ```python notest
@@ -559,19 +625,31 @@ class _VolumeUploadContextManager:
             async def gen_file_upload_specs() -> AsyncGenerator[FileUploadSpec, None]:
                 loop = asyncio.get_event_loop()
                 with concurrent.futures.ThreadPoolExecutor() as exe:
-                    # TODO: avoid eagerly expanding
-                    futs = [loop.run_in_executor(exe, f) for f in gen_upload_providers()]
-                    logger.debug(f"Computing checksums for {len(futs)} files using {exe._max_workers} workers")
-                    for fut in asyncio.as_completed(futs):
+                    # Only hash a bounded number of files ahead of the uploads, so hashing and uploading overlap
+                    # and the buffers of single-pass uploads (see SINGLE_PASS_UPLOAD_LIMIT) don't pile up in memory.
+                    max_pending = exe._max_workers + VOLUME_UPLOAD_CONCURRENCY
+                    logger.debug(f"Computing checksums using {exe._max_workers} workers")
+                    pending: set[asyncio.Future[FileUploadSpec]] = set()
+                    for provider in gen_upload_providers():
+                        pending.add(loop.run_in_executor(exe, provider))
+                        if len(pending) >= max_pending:
+                            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                            for fut in done:
+                                yield fut.result()
+                    for fut in asyncio.as_completed(pending):
                         yield await fut
 
             # Compute checksums & Upload files
             files: list[api_pb2.MountFile] = []
-            async with aclosing(async_map(gen_file_upload_specs(), self._upload_file, concurrency=20)) as stream:
+            upload_stream = async_map(gen_file_upload_specs(), self._upload_file, concurrency=VOLUME_UPLOAD_CONCURRENCY)
+            async with aclosing(upload_stream) as stream:
                 async for item in stream:
                     files.append(item)
 
             self._progress_cb(complete=True)
+            hash_cache = get_upload_hash_cache()
+            if hash_cache:
+                hash_cache.flush()
 
             request = api_pb2.VolumePutFilesRequest(
                 volume_id=self._volume_id,
@@ -601,9 +679,11 @@ class _VolumeUploadContextManager:
 
         def gen():
             if isinstance(local_file, str) or isinstance(local_file, Path):
-                yield lambda: get_file_upload_spec_from_path(local_file, PurePosixPath(remote_path), mode)
+                yield lambda: get_file_upload_spec_from_path(local_file, PurePosixPath(remote_path), mode, buffer=True)
             else:
-                yield lambda: get_file_upload_spec_from_fileobj(local_file, PurePosixPath(remote_path), mode or 0o644)
+                yield lambda: get_file_upload_spec_from_fileobj(
+                    local_file, PurePosixPath(remote_path), mode or 0o644, buffer=True
+                )
 
         self._upload_generators.append(gen())
 
@@ -624,7 +704,7 @@ class _VolumeUploadContextManager:
 
         def create_file_spec_provider(subpath):
             relpath_str = subpath.relative_to(local_path)
-            return lambda: get_file_upload_spec_from_path(subpath, remote_path / relpath_str)
+            return lambda: get_file_upload_spec_from_path(subpath, remote_path / relpath_str, buffer=True)
 
         def gen():
             glob = local_path.rglob("*") if recursive else local_path.glob("*")
@@ -682,6 +762,29 @@ Volume = synchronize_api(_Volume)
 VolumeUploadContextManager = synchronize_api(_VolumeUploadContextManager)
 
 
+def _positional_fd(fileobj: IO[bytes]) -> Optional[int]:
+    """File descriptor of `fileobj` if it supports positional writes, otherwise None."""
+    if not hasattr(os, "pwrite") or "a" in getattr(fileobj, "mode", ""):
+        # Positional writes are ignored for files opened in append mode
+        return None
+    try:
+        fd = fileobj.fileno()
+        fileobj.tell()
+    except (AttributeError, OSError, ValueError):  # io.UnsupportedOperation is an OSError and ValueError
+        return None
+    return fd
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+    view = memoryview(data)
+    while view:
+        n = os.pwrite(fd, view, offset)
+        if n == 0:
+            raise OSError(f"failed to write {len(view)} bytes to output at offset {offset}")
+        view = view[n:]
+        offset += n
+
+
 def _open_files_error_annotation(mount_path: str) -> Optional[str]:
     if platform.system() != "Linux":
         return None
@@ -77,7 +77,10 @@ class _Volume(modal._object._Object):
     def iterdir(self, path: str, *, recursive: bool = True) -> collections.abc.AsyncIterator[FileEntry]: ...
     async def listdir(self, path: str, *, recursive: bool = False) -> list[FileEntry]: ...
     def read_file(self, path: str) -> collections.abc.AsyncIterator[bytes]: ...
-    async def read_file_into_fileobj(self, path: str, fileobj: typing.IO[bytes]) -> int: ...
+    async def _read_file_range(self, path: str, start: int, length: int) -> modal_proto.api_pb2.VolumeGetFileResponse: ...
+    async def read_file_into_fileobj(
+        self, path: str, fileobj: typing.IO[bytes], *, chunk_size: int = 8388608, concurrency: int = 8
+    ) -> int: ...
     async def remove_file(self, path: str, recursive: bool = False) -> None: ...
     async def copy_files(self, src_paths: collections.abc.Sequence[str], dst_path: str) -> None: ...
     async def batch_upload(self, force: bool = False) -> _VolumeUploadContextManager: ...
@@ -237,9 +240,19 @@ class Volume(modal.object.Object):
 
     read_file: __read_file_spec[typing_extensions.Self]
 
+    class ___read_file_range_spec(typing_extensions.Protocol[SUPERSELF]):
+        def __call__(self, path: str, start: int, length: int) -> modal_proto.api_pb2.VolumeGetFileResponse: ...
+        async def aio(self, path: str, start: int, length: int) -> modal_proto.api_pb2.VolumeGetFileResponse: ...
+
+    _read_file_range: ___read_file_range_spec[typing_extensions.Self]
+
     class __read_file_into_fileobj_spec(typing_extensions.Protocol[SUPERSELF]):
-        def __call__(self, path: str, fileobj: typing.IO[bytes]) -> int: ...
-        async def aio(self, path: str, fileobj: typing.IO[bytes]) -> int: ...
+        def __call__(
+            self, path: str, fileobj: typing.IO[bytes], *, chunk_size: int = 8388608, concurrency: int = 8
+        ) -> int: ...
+        async def aio(
+            self, path: str, fileobj: typing.IO[bytes], *, chunk_size: int = 8388608, concurrency: int = 8
+        ) -> int: ...
 
     read_file_into_fileobj: __read_file_into_fileobj_spec[typing_extensions.Self]
 
@@ -0,0 +1,102 @@
+"""
+Mixed-precision execution of the RFdiffusion SE(3) layers
+
+inference.precision=bf16|fp16 is not an RFdiffusion option: fast_start takes it
+out of the overrides and installs a PrecisionPolicy instead. Every
+SE3TransformerWrapper forward then runs under torch.autocast, so its matrix
+products and basis contractions run in bf16/fp16 while autocast keeps
+reductions (sums, norms, softmax) in fp32. Outputs are cast back to fp32, so the
+rest of the network is unchanged. e3nn modules inside the wrappers also get
+the compute dtype (see e3nn.util.precision).
+
+Use python check_precision.py to compare the equivariance error against fp32.
+"""
+
+import importlib
+
+PRECISIONS = ("fp32", "bf16", "fp16")
+PRECISION_OVERRIDE = "inference.precision="
+
+# Where RFdiffusion defines the SE(3)-Transformer wrapper, depending on the checkout
+SE3_MODULES = ["SE3_network", "rfdiffusion.SE3_network"]
+SE3_CLASS = "SE3TransformerWrapper"
+
+def pop_precision(args):
+    """Remove inference.precision=... from hydra overrides; returns (precision, remaining args)"""
+    precision, remaining = "fp32", []
+    for arg in args:
+        if arg.startswith(PRECISION_OVERRIDE):
+            precision = arg[len(PRECISION_OVERRIDE):].strip("'\"")
+        else:
+            remaining.append(arg)
+    if precision not in PRECISIONS:
+        raise ValueError(f"inference.precision must be one of {PRECISIONS}, got {precision!r}")
+    return precision, remaining
+
+def _to_float32(value):
+    """Cast reduced-precision tensors in a forward output back to fp32"""
+    import torch
+
+    if isinstance(value, torch.Tensor):
+        return value.float() if value.dtype in (torch.float16, torch.bfloat16) else value
+    if isinstance(value, dict):
+        return {key: _to_float32(v) for key, v in value.items()}
+    if isinstance(value, (tuple, list)):
+        return type(value)(_to_float32(v) for v in value)
+    return value
+
+class PrecisionPolicy:
+    """Run the SE(3)-Transformer wrappers in bf16/fp16 with fp32 outputs"""
+
+    def __init__(self, precision="bf16"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}, got {precision!r}")
+        self.precision = precision
+
+    @property
+    def dtype(self):
+        import torch
+
+        return {"fp32": None, "bf16": torch.bfloat16, "fp16": torch.float16}[self.precision]
+
+    def wrap(self, forward):
+        """Wrap an nn.Module forward to run under autocast"""
+        import torch
+
+        policy = self
+
+        def reduced_precision_forward(module, *args, **kwargs):
+            if not getattr(module, "_precision_set", False):
+                try:
+                    from e3nn.util.precision import set_precision
+                    set_precision(module, policy.precision)
+                except ImportError:
+                    pass
+                module._precision_set = True
+            device_type = "cuda" if torch.cuda.is_available() else "cpu"
+            with torch.autocast(device_type, dtype=policy.dtype):
+                out = forward(module, *args, **kwargs)
+            return _to_float32(out)
+
+        return reduced_precision_forward
+
+    def install(self):
+        """Patch the SE(3)-Transformer wrapper classes; returns an undo callable"""
+        patched = []
+        if self.dtype is not None:
+            for name in SE3_MODULES:
+                try:
+                    module = importlib.import_module(name)
+                except ImportError:
+                    continue
+                cls = getattr(module, SE3_CLASS, None)
+                if cls is not None and "forward" in cls.__dict__:
+                    patched.append((cls, cls.__dict__["forward"]))
+                    cls.forward = self.wrap(cls.__dict__["forward"])
+            if not patched:
+                print(f"Precision policy: no {SE3_CLASS} found, running in fp32")
+
+        def uninstall():
+            for cls, forward in patched:
+                cls.forward = forward
+        return uninstall
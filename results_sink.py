@@ -0,0 +1,123 @@
+"""
+Append-only on-disk sink for map results of large campaigns
+
+Results are written to a JSONL log as they arrive (in completion order) and only
+a small window of recent results is kept in memory. Each record carries the key
+of the input that produced it (the design input hash) and the log is indexed by
+key and byte offset, so results can still be iterated in input order by seeking,
+and a campaign restarted with the same log can skip the inputs it already has
+and re-run the ones that failed.
+"""
+
+import json
+import os
+from collections import deque
+
+# Recent results kept in memory for progress reporting
+DEFAULT_WINDOW = 32
+
+def _to_json(value):
+    """json.dumps fallback for numpy scalars/arrays and other leftovers"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+class ResultsSink:
+    """Stream map outputs to a JSONL file with a bounded in-memory window
+
+    Each line is {"key": <input key>, "index": <input index>, "result": <output>}.
+    A key recorded more than once (a re-run input) resolves to its latest record.
+    Iterating the sink yields the latest result per key in input order;
+    iter_unordered() yields every record in log order.
+    """
+
+    def __init__(self, path, window=DEFAULT_WINDOW):
+        self.path = path
+        self.recent = deque(maxlen=window)
+        self._offsets = {}  # input key -> (input index, byte offset of its latest line)
+        if os.path.exists(path):
+            self._load_offsets()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._handle = open(path, "ab")
+
+    def _load_offsets(self):
+        """Index an existing log, dropping a torn last line from an interrupted run"""
+        offset = 0
+        with open(self.path, "rb") as handle:
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    break
+                entry = json.loads(line)
+                self._offsets[entry["key"]] = (entry["index"], offset)
+                offset += len(line)
+        with open(self.path, "ab") as handle:
+            handle.truncate(offset)
+
+    def __contains__(self, key):
+        return key in self._offsets
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def _read(self, offset):
+        if not self._handle.closed:
+            self._handle.flush()
+        with open(self.path, "rb") as handle:
+            handle.seek(offset)
+            return json.loads(handle.readline())["result"]
+
+    def get(self, key, default=None):
+        """The latest result recorded for an input key"""
+        if key not in self._offsets:
+            return default
+        return self._read(self._offsets[key][1])
+
+    def append(self, key, index, result):
+        """Write one result to the log"""
+        line = json.dumps({"key": key, "index": index, "result": result}, default=_to_json).encode() + b"\n"
+        self._offsets[key] = (index, self._handle.tell())
+        self._handle.write(line)
+        self._handle.flush()
+        self.recent.append(result)
+
+    def consume(self, outputs, key_to_index, key, progress_every=100):
+        """Drain an unordered map output stream into the sink
+
+        key(result) identifies which input produced a result and key_to_index maps
+        that key to the input index.
+        """
+        count = 0
+        for result in outputs:
+            result_key = key(result)
+            self.append(result_key, key_to_index[result_key], result)
+            count += 1
+            if progress_every and count % progress_every == 0:
+                print(f"  {len(self)} results written to {self.path}")
+        return count
+
+    def close(self):
+        self._handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def iter_unordered(self):
+        """Yield (index, result) of every record in the order they were written"""
+        if not self._handle.closed:
+            self._handle.flush()
+        with open(self.path, "rb") as handle:
+            for line in handle:
+                entry = json.loads(line)
+                yield entry["index"], entry["result"]
+
+    def __iter__(self):
+        """Yield results in input order, reading one line at a time"""
+        if not self._handle.closed:
+            self._handle.flush()
+        with open(self.path, "rb") as handle:
+            for _, offset in sorted(self._offsets.values()):
+                handle.seek(offset)
+                yield json.loads(handle.readline())["result"]
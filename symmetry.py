@@ -0,0 +1,162 @@
+"""
+Point-group symmetry detection for input PDBs
+
+Chains are grouped by sequence, every copy in the largest group is superimposed
+onto the first with a batched Kabsch fit, and the resulting rotations are
+matched against the C_n and D_n point groups. The result is expressed in the
+(symmetry, order) terms used by run_rfdiffusion_test, so "auto" can be resolved
+on the client before any GPU job is launched.
+"""
+
+from collections import OrderedDict
+
+THREE_TO_ONE = {
+    "ALA": "A", "ARG": "R", "ASN": "N", "ASP": "D", "CYS": "C",
+    "GLN": "Q", "GLU": "E", "GLY": "G", "HIS": "H", "ILE": "I",
+    "LEU": "L", "LYS": "K", "MET": "M", "PHE": "F", "PRO": "P",
+    "SER": "S", "THR": "T", "TRP": "W", "TYR": "Y", "VAL": "V",
+    "MSE": "M",
+}
+
+# Tolerances for accepting a superposition and matching a group operator
+MAX_RMSD = 2.0            # Angstrom, after superposition of two copies
+ANGLE_TOLERANCE = 10.0    # degrees
+AXIS_TOLERANCE = 0.95     # |cos| between axes treated as parallel
+MIN_IDENTITY = 0.95       # sequence identity for two chains to be copies
+
+def parse_ca_chains(pdb_str):
+    """Return {chain: (sequence, [(x, y, z), ...])} from the CA atoms of a PDB string"""
+    chains = OrderedDict()
+    seen = set()
+    for line in pdb_str.splitlines():
+        if line.startswith("ENDMDL"):
+            break
+        if not line.startswith("ATOM") or line[12:16].strip() != "CA":
+            continue
+        if line[16] not in (" ", "A"):
+            continue
+        chain, resnum = line[21], line[22:27]
+        if (chain, resnum) in seen:
+            continue
+        seen.add((chain, resnum))
+        seq, coords = chains.setdefault(chain, ([], []))
+        seq.append(THREE_TO_ONE.get(line[17:20], "X"))
+        coords.append((float(line[30:38]), float(line[38:46]), float(line[46:54])))
+    return OrderedDict((chain, ("".join(seq), coords)) for chain, (seq, coords) in chains.items())
+
+def cluster_chains(chains):
+    """Group chain IDs whose sequences are copies of each other"""
+    clusters = []
+    for chain, (seq, _) in chains.items():
+        for cluster in clusters:
+            ref = chains[cluster[0]][0]
+            if len(ref) == len(seq) and sum(a == b for a, b in zip(ref, seq)) >= MIN_IDENTITY * len(seq):
+                cluster.append(chain)
+                break
+        else:
+            clusters.append([chain])
+    return clusters
+
+def batched_kabsch(mobile, target):
+    """Optimal rotations taking each centered mobile[i] onto target[i]
+
+    mobile, target: (n, L, 3) arrays. Returns rotations (n, 3, 3) and RMSDs (n,).
+    """
+    import numpy as np
+
+    mobile = mobile - mobile.mean(axis=1, keepdims=True)
+    target = target - target.mean(axis=1, keepdims=True)
+    H = np.einsum("nli,nlj->nij", mobile, target)
+    U, _, Vt = np.linalg.svd(H)
+    # Flip the last singular vector where needed so every R is a proper rotation
+    d = np.sign(np.linalg.det(np.einsum("nij,njk->nik", U, Vt)))
+    U[:, :, -1] *= d[:, None]
+    R = np.einsum("nij,njk->nik", U, Vt).transpose(0, 2, 1)
+    aligned = np.einsum("nij,nlj->nli", R, mobile)
+    rmsd = np.sqrt(((aligned - target) ** 2).sum(-1).mean(-1))
+    return R, rmsd
+
+def axis_angle(R):
+    """Rotation axes (n, 3) and angles in degrees (n,) of a stack of rotations"""
+    import numpy as np
+
+    angle = np.degrees(np.arccos(np.clip((np.trace(R, axis1=1, axis2=2) - 1) / 2, -1, 1)))
+    axis = np.stack([R[:, 2, 1] - R[:, 1, 2], R[:, 0, 2] - R[:, 2, 0], R[:, 1, 0] - R[:, 0, 1]], -1)
+    # Near 180 degrees the antisymmetric part vanishes; the axis is then the
+    # dominant column of (R + I) / 2 = a a^T
+    S = (R + np.eye(3)) / 2
+    column = np.take_along_axis(S, np.argmax(np.diagonal(S, axis1=1, axis2=2), -1)[:, None, None], 2)[..., 0]
+    axis = np.where((angle > 170)[:, None], column, axis)
+    axis /= np.maximum(np.linalg.norm(axis, axis=-1, keepdims=True), 1e-8)
+    return axis, angle
+
+def _is_multiple(angles, step):
+    """Whether every angle is within tolerance of a multiple of step (degrees)"""
+    import numpy as np
+
+    rem = np.mod(angles, step)
+    return bool(np.all(np.minimum(rem, step - rem) < ANGLE_TOLERANCE))
+
+def infer_point_group(R):
+    """Match rotations (chain 0 onto each copy, identity included) to C_n or D_n
+
+    Returns ("cyclic", n), ("dihedral", n) or None.
+    """
+    import numpy as np
+
+    n = len(R)
+    axis, angle = axis_angle(R)
+    nontrivial = angle > ANGLE_TOLERANCE
+
+    # Cyclic: all operators share one axis and step through multiples of 360/n
+    if nontrivial.any():
+        main = axis[nontrivial][np.argmin(angle[nontrivial])]
+        parallel = np.abs(axis[nontrivial] @ main) > AXIS_TOLERANCE
+        if parallel.all() and _is_multiple(angle, 360.0 / n):
+            return "cyclic", n
+
+    # Dihedral: n/2 operators about a main axis, n/2 two-folds perpendicular to it
+    if n >= 4 and n % 2 == 0:
+        m = n // 2
+        for candidate in axis[nontrivial]:
+            about_main = ~nontrivial | (np.abs(axis @ candidate) > AXIS_TOLERANCE)
+            two_folds = ~about_main & (np.abs(angle - 180) < ANGLE_TOLERANCE)
+            perpendicular = np.abs(axis[two_folds] @ candidate) < 1 - AXIS_TOLERANCE
+            if (about_main.sum() == m and two_folds.sum() == m and perpendicular.all()
+                    and _is_multiple(angle[about_main], 360.0 / m)):
+                return "dihedral", m
+    return None
+
+def detect_symmetry(pdb_str, verbose=True):
+    """Detect the symmetry of a PDB as (symmetry, order) for run_rfdiffusion_test
+
+    Returns ("none", 1) when no homo-oligomeric C_n/D_n arrangement is found.
+    """
+    import numpy as np
+
+    chains = parse_ca_chains(pdb_str)
+    clusters = [c for c in cluster_chains(chains) if len(c) > 1]
+    if not clusters:
+        if verbose:
+            print("Symmetry detection: no repeated chains, treating input as asymmetric")
+        return "none", 1
+
+    copies = max(clusters, key=len)
+    X = np.array([chains[chain][1] for chain in copies], dtype=np.float64)
+    X -= X.reshape(-1, 3).mean(0)
+    R, rmsd = batched_kabsch(np.repeat(X[:1], len(copies), 0), X)
+    if rmsd.max() > MAX_RMSD:
+        if verbose:
+            print(f"Symmetry detection: chains {','.join(copies)} differ by up to {rmsd.max():.1f} A RMSD")
+        return "none", 1
+
+    group = infer_point_group(R)
+    if group is None:
+        if verbose:
+            print(f"Symmetry detection: chains {','.join(copies)} do not form a C_n/D_n assembly")
+        return "none", 1
+    if verbose:
+        symmetry, order = group
+        print(f"Symmetry detection: {symmetry} order {order} from chains {','.join(copies)} "
+              f"(max RMSD {rmsd.max():.2f} A)")
+    return group
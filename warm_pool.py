@@ -0,0 +1,94 @@
+"""
+Warm container pools for the design and MPNN workers
+
+WarmPoolScheduler raises the warm pool size of worker classes right before a
+campaign dispatches and drops it back as soon as the dispatch finishes. The
+containers already running then stay up for the workers' scaledown_window, so
+back-to-back small batches land on warm containers without paying for idle
+GPUs overnight. ContainerStats is recorded inside the workers and
+tallied on the client into cold/warm start counts.
+"""
+
+import os
+import threading
+import time
+
+# Default warm pool policy, overridable from the environment at deploy time
+DEFAULT_MIN_CONTAINERS = int(os.environ.get("RFDIFFUSION_MIN_CONTAINERS", "0"))
+DEFAULT_SCALEDOWN_WINDOW = int(os.environ.get("RFDIFFUSION_SCALEDOWN_WINDOW", "300"))
+
+# An input that reaches a fresh container within this many seconds of it becoming
+# ready was waiting for that container to start, i.e. it paid a cold start
+COLD_START_THRESHOLD = 5.0
+
+class ContainerStats:
+    """Per-container bookkeeping, created in a worker's @modal.enter hook"""
+
+    def __init__(self):
+        self.ready_at = time.time()
+        self.inputs_served = 0
+
+    def record_input(self):
+        """Count an input and describe the container state it ran in"""
+        now = time.time()
+        cold = self.inputs_served == 0 and now - self.ready_at < COLD_START_THRESHOLD
+        self.inputs_served += 1
+        return {
+            "cold_start": cold,
+            "container_age_seconds": now - self.ready_at,
+            "inputs_served": self.inputs_served,
+        }
+
+def count_starts(results, key="container"):
+    """Tally (cold, warm) starts from the container info attached to results"""
+    cold = warm = 0
+    for result in results:
+        info = result.get(key) if isinstance(result, dict) else None
+        if info is None:
+            continue
+        if info["cold_start"]:
+            cold += 1
+        else:
+            warm += 1
+    return cold, warm
+
+class WarmPoolScheduler:
+    """Pre-warm worker pools before a campaign and scale them down when idle
+
+    pools maps a worker class instance (e.g. DesignWorker()) to the number of
+    containers to keep warm while the campaign is active. Use as a context
+    manager around each dispatch; the pools are scaled down synchronously on
+    exit, so this happens before the client process ends. Idle containers are
+    then reclaimed by Modal after the workers' scaledown_window, which is what
+    keeps them warm between dispatches.
+    """
+
+    def __init__(self, pools):
+        self.pools = pools
+        self._lock = threading.Lock()
+        self._warm = False
+
+    def prewarm(self):
+        with self._lock:
+            if self._warm:
+                return
+            for worker, size in self.pools.items():
+                print(f"Pre-warming {size} containers for {type(worker).__name__}")
+                worker.keep_warm(size)
+            self._warm = True
+
+    def scale_down(self):
+        with self._lock:
+            if not self._warm:
+                return
+            for worker in self.pools:
+                worker.keep_warm(0)
+            self._warm = False
+            print("Warm pools scaled down")
+
+    def __enter__(self):
+        self.prewarm()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.scale_down()